@@ -0,0 +1,351 @@
+"""Micro-benchmarks for the organizer's document analysis pipeline
+
+Runs against a synthetic corpus so results are reproducible without any PDFs:
+
+    python benchmark.py              # all benchmarks
+    python benchmark.py --docs 2000  # larger corpus
+    python benchmark.py normalization
+"""
+import argparse
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import dateutil.parser
+
+import organizer
+
+# Words used to pad synthetic documents
+FILLER_WORDS = (
+    "the of and to in for on with by from account total amount reference customer "
+    "number page item quantity price description payment terms service period"
+).split()
+
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+
+
+def make_categories():
+    """Build a category set shaped like a real categories.json"""
+    return {
+        "invoice": {"folder": "Invoices", "abbreviation": "INV",
+                    "keywords": ["invoice", "amount due", "vat number", "payment terms"]},
+        "bank": {"folder": "Bank", "abbreviation": "BANK",
+                 "keywords": ["statement", "account balance", "iban", "opening balance"]},
+        "insurance": {"folder": "Insurance", "abbreviation": "INS",
+                      "keywords": ["policy number", "premium", "insured", "claim"]},
+        "payslip": {"folder": "Payslips", "abbreviation": "PAY",
+                    "keywords": ["gross pay", "net pay", "tax code", "employee id"]},
+    }
+
+
+def make_document(rng, categories, words=400):
+    """Generate one synthetic extracted-text document"""
+    category = rng.choice(list(categories))
+    keywords = categories[category]["keywords"]
+    parts = []
+    for i in range(words):
+        roll = rng.random()
+        if roll < 0.03:
+            parts.append(rng.choice(keywords).replace(" ", "  "))
+        elif roll < 0.08:
+            # Digit clusters that are not dates (amounts, references, phone numbers)
+            parts.append(str(rng.randint(10, 999999)))
+        elif roll < 0.085:
+            parts.append(f"{rng.randint(1, 28)} {rng.choice(MONTH_NAMES)} {rng.randint(2015, 2025)}")
+        else:
+            parts.append(rng.choice(FILLER_WORDS))
+        if i % 12 == 11:
+            parts.append("\n")
+    return " ".join(parts)
+
+
+def make_corpus(count, seed=0):
+    """Generate a reproducible list of synthetic documents"""
+    rng = random.Random(seed)
+    categories = make_categories()
+    return [make_document(rng, categories) for _ in range(count)], categories
+
+
+class CountingRegex:
+    """Wrap a compiled regex and count substitution passes and bytes produced"""
+    def __init__(self, pattern, counters):
+        self.pattern = pattern
+        self.counters = counters
+
+    def sub(self, repl, string, count=0):
+        result = self.pattern.sub(repl, string, count)
+        self.counters["passes"] += 1
+        self.counters["chars"] += len(result)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.pattern, name)
+
+
+def bench_normalization(corpus, categories):
+    """Compare per-detector normalization against one shared NormalizedDocument"""
+    counters = {"passes": 0, "chars": 0}
+    originals = {}
+    for name in ("WHITESPACE_RE", "SPLIT_YEAR_RE", "SPLIT_YEAR_LEADING_RE"):
+        originals[name] = getattr(organizer, name)
+        setattr(organizer, name, CountingRegex(originals[name], counters))
+
+    def run(shared):
+        counters["passes"] = counters["chars"] = 0
+        start = time.perf_counter()
+        for text in corpus:
+            # Date detection, category detection and the manual-path re-detection
+            document = organizer.NormalizedDocument(text) if shared else text
+            organizer.extract_date_from_text(document)
+            organizer.match_category(document, categories)
+            organizer.match_category(document, categories)
+        elapsed = time.perf_counter() - start
+        return elapsed, counters["passes"], counters["chars"]
+
+    try:
+        rows = [("per-detector", run(False)), ("shared document", run(True))]
+    finally:
+        for name, pattern in originals.items():
+            setattr(organizer, name, pattern)
+
+    count = len(corpus)
+    print(f"{'normalization':<20}{'ms/doc':>10}{'passes/doc':>12}{'KB/doc':>10}")
+    for label, (elapsed, passes, chars) in rows:
+        print(f"  {label:<18}{elapsed * 1000 / count:>10.3f}{passes / count:>12.1f}{chars / count / 1024:>10.1f}")
+
+
+def bench_date_fallback(corpus, categories):
+    """Compare whole-text fuzzy dateutil parsing against bounded candidate windows"""
+    documents = [organizer.NormalizedDocument(text) for text in corpus]
+
+    def whole_text(clean_text):
+        try:
+            return dateutil.parser.parse(clean_text, fuzzy=True, dayfirst=True)
+        except (ValueError, OverflowError):
+            return None
+
+    rows = []
+    for label, parse in (("whole text", whole_text), ("candidate windows", organizer.parse_date_windows)):
+        found = 0
+        timings = []
+        for document in documents:
+            start = time.perf_counter()
+            date = parse(document.date_text)
+            timings.append(time.perf_counter() - start)
+            if date and 1900 <= date.year <= 2100:
+                found += 1
+        timings.sort()
+        rows.append((label, sum(timings) / len(timings), timings[int(len(timings) * 0.99) - 1], found))
+
+    print(f"{'date fallback':<20}{'ms/doc':>10}{'p99 ms':>10}{'valid':>8}")
+    for label, mean, p99, found in rows:
+        print(f"  {label:<18}{mean * 1000:>10.3f}{p99 * 1000:>10.3f}{found:>8}")
+
+
+# Labelled texts and the date that should win; checked by the date_labels benchmark
+DATE_LABEL_CASES = [
+    ("Invoice date: 05/06/2023 Due date: 05/07/2023", "2023-06-05"),
+    ("Due date 01/01/2024 dated 15/12/2023", "2023-12-15"),
+    ("Date: 3 March 2024 born 1 May 1970", "2024-03-03"),
+    ("Date of birth: 01/02/1980\nInvoice 05/06/2023", "2023-06-05"),
+]
+
+
+def bench_date_labels(corpus, categories):
+    """Check that date labels (invoice date, due date, date of birth) pick the right date"""
+    failures = []
+    start = time.perf_counter()
+    for text, expected in DATE_LABEL_CASES:
+        date, _, _ = organizer.extract_date_with_confidence(text)
+        found = date.strftime("%Y-%m-%d") if date else None
+        if found != expected:
+            failures.append((text, expected, found))
+    elapsed = time.perf_counter() - start
+
+    print(f"{'date labels':<20}{len(DATE_LABEL_CASES) - len(failures)}/{len(DATE_LABEL_CASES)} correct "
+          f"in {elapsed * 1000:.2f} ms")
+    for text, expected, found in failures:
+        print(f"  {text!r}: expected {expected}, got {found}")
+
+
+def make_listing(rng, categories, count):
+    """Generate filenames and catalog metadata shaped like a filed category folder"""
+    names = set()
+    metadata = {}
+    abbreviations = [(name, data["abbreviation"]) for name, data in categories.items()]
+    while len(names) < count:
+        category, abbreviation = rng.choice(abbreviations)
+        year, month, day = rng.randint(2015, 2025), rng.randint(1, 12), rng.randint(1, 28)
+        name = f"{day:02d}{month:02d}{year % 100:02d}_{abbreviation}"
+        if rng.random() < 0.5:
+            name += f"_{rng.choice(FILLER_WORDS)}_{rng.randint(1, 9999)}"
+        name += ".pdf"
+        if name not in names:
+            names.add(name)
+            metadata[name] = (category, f"{year}-{month:02d}-{day:02d}")
+    return sorted(names), metadata
+
+
+def bench_listing_filter(corpus, categories, entries=100000):
+    """Build the filter index over a large listing, then time each keystroke"""
+    names, metadata = make_listing(random.Random(len(corpus)), categories, entries)
+    index = organizer.ListingIndex()
+    start = time.perf_counter()
+    index.rebuild(names, metadata)
+    build = time.perf_counter() - start
+
+    print(f"{'listing filter':<20}{entries} entries, index built in {build * 1000:.0f} ms")
+    print(f"  {'typed':<18}{'ms':>10}{'matches':>10}{'shown':>8}")
+    for query in ("i", "in", "inv", "inv 2", "inv 20", "inv 2023", "bank page", "zzz"):
+        start = time.perf_counter()
+        matches = index.query(query)
+        # Same steps the UI takes to show the first page of results
+        if len(matches) * 8 < len(names):
+            page = sorted(matches)[:100]
+        else:
+            page = list(itertools.islice((name for name in names if name in matches), 100))
+        elapsed = time.perf_counter() - start
+        print(f"  {query!r:<18}{elapsed * 1000:>10.2f}{len(matches):>10}{len(page):>8}")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.add(f"010125_INV_new_{i}.pdf", ("invoice", "2025-01-01"))
+    for i in range(1000):
+        index.remove(f"010125_INV_new_{i}.pdf")
+    elapsed = time.perf_counter() - start
+    print(f"  incremental add+remove: {elapsed * 1000 / 2000:.3f} ms/file")
+
+
+def bench_near_duplicates(corpus, categories, noise_words=5):
+    """Look up noisy rescans in the banded fingerprint index and compare with a pairwise scan"""
+    fingerprints = [organizer.NormalizedDocument(text).fingerprint for text in corpus]
+    rng = random.Random(len(corpus))
+    rescans = []
+    for text in corpus[:100]:
+        words = text.split()
+        for _ in range(noise_words):
+            words[rng.randrange(len(words))] = "ocrnoise"
+        rescans.append(organizer.NormalizedDocument(" ".join(words)).fingerprint)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = organizer.FingerprintIndex(os.path.join(directory, "fingerprints.db"))
+        index.add_many((f"doc{i}", fingerprint) for i, fingerprint in enumerate(fingerprints))
+
+        start = time.perf_counter()
+        found = 0
+        for i, fingerprint in enumerate(rescans):
+            matches = index.near(fingerprint)
+            found += bool(matches) and matches[0][1] == f"doc{i}"
+        banded = time.perf_counter() - start
+        index.connection.close()
+
+    start = time.perf_counter()
+    for fingerprint in rescans:
+        [other for other in fingerprints
+         if organizer.hamming_distance(fingerprint, other) <= organizer.NEAR_DUPLICATE_DISTANCE]
+    pairwise = time.perf_counter() - start
+
+    count = len(rescans)
+    print(f"{'near duplicates':<20}{len(corpus)} filed, {count} rescans with {noise_words} noisy words")
+    print(f"  {'banded index':<18}{banded * 1000 / count:>10.3f} ms/lookup, found {found}/{count}")
+    print(f"  {'pairwise scan':<18}{pairwise * 1000 / count:>10.3f} ms/lookup")
+
+
+def bench_copy(corpus, categories, files=16, megabytes=16):
+    """File a batch from a tmpfs inbox to disk: shutil.copy2 + shutil.move against the copy engine"""
+    inbox_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    payload = os.urandom(megabytes * 1024 * 1024)
+
+    def copy2_and_move(source, filed, archived):
+        shutil.copy2(source, filed)
+        shutil.move(source, archived)
+        return "copy2+move"
+
+    def copy_engine(source, filed, archived):
+        method = organizer.copy_file(source, filed)
+        organizer.move_file(source, archived, copy_from=filed)
+        return method
+
+    rows = []
+    for label, file_one in (("copy2 + move", copy2_and_move), ("copy engine", copy_engine)):
+        with tempfile.TemporaryDirectory(dir=inbox_root) as inbox, tempfile.TemporaryDirectory(dir=".") as archive:
+            for folder in ("filed", "sorted"):
+                os.mkdir(os.path.join(archive, folder))
+            sources = []
+            for i in range(files):
+                sources.append(os.path.join(inbox, f"scan{i}.pdf"))
+                with open(sources[-1], "wb") as f:
+                    f.write(payload)
+            start = time.perf_counter()
+            for source in sources:
+                name = os.path.basename(source)
+                method = file_one(source, os.path.join(archive, "filed", name), os.path.join(archive, "sorted", name))
+            elapsed = time.perf_counter() - start
+        rows.append((label, method, files * len(payload) / elapsed / 1024 ** 3))
+
+    print(f"{'copy':<20}{files} x {megabytes} MB from {inbox_root or 'the temp folder'} to the working folder")
+    for label, method, rate in rows:
+        print(f"  {label:<18}{rate:>10.2f} GB/s  ({method})")
+
+
+def bench_durability(corpus, categories, files=200, kilobytes=256):
+    """File a batch into the working folder under each durability mode"""
+    payload = os.urandom(kilobytes * 1024)
+    fs = organizer.AsyncFS()
+
+    print(f"{'durability':<20}{files} x {kilobytes} KB filed and archived in the working folder")
+    print(f"  {'mode':<18}{'ms/file':>10}{'sync ms':>10}")
+    for mode in (organizer.DURABILITY_NONE, organizer.DURABILITY_BATCH, organizer.DURABILITY_STRICT):
+        with tempfile.TemporaryDirectory(dir=".") as root:
+            for folder in ("inbox", "filed", "sorted"):
+                os.mkdir(os.path.join(root, folder))
+            sources = []
+            for i in range(files):
+                sources.append(os.path.join(root, "inbox", f"scan{i}.pdf"))
+                with open(sources[-1], "wb") as f:
+                    f.write(payload)
+            journal = organizer.DurabilityJournal(mode)
+            start = time.perf_counter()
+            for source in sources:
+                name = os.path.basename(source)
+                filed = os.path.join(root, "filed", name)
+                organizer.copy_file(source, filed, journal)
+                organizer.move_file(source, os.path.join(root, "sorted", name), filed, journal)
+            synced = time.perf_counter()
+            journal.commit(fs)
+            end = time.perf_counter()
+        print(f"  {mode:<18}{(end - start) * 1000 / files:>10.3f}{(end - synced) * 1000:>10.1f}")
+
+
+BENCHMARKS = {
+    "normalization": bench_normalization,
+    "date_fallback": bench_date_fallback,
+    "date_labels": bench_date_labels,
+    "listing_filter": bench_listing_filter,
+    "near_duplicates": bench_near_duplicates,
+    "copy": bench_copy,
+    "durability": bench_durability,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Organizer analysis benchmarks")
+    parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+    parser.add_argument("--docs", type=int, default=500, help="Number of synthetic documents")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus")
+    args = parser.parse_args()
+
+    corpus, categories = make_corpus(args.docs, args.seed)
+    for name in args.names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark '{name}' (choose from {', '.join(BENCHMARKS)})")
+        BENCHMARKS[name](corpus, categories)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import errno
 import json
 import re
 import shutil
@@ -11,6 +12,23 @@ import platform
 import dateutil.parser
 import threading
 import queue
+import time
+import argparse
+import sqlite3
+import io
+import bisect
+import math
+import hashlib
+import itertools
+import concurrent.futures
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from functools import cached_property, lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from urllib.parse import parse_qs, urlparse
+
+PROCESS_START = time.perf_counter()  # Baseline for the startup profiler
 
 # Add pdfplumber for faster PDF processing
 try:
@@ -28,7 +46,2985 @@ except ImportError:
     SV_TTK_AVAILABLE = False
     print("sv_ttk not available, falling back to standard theming")
 
+# numpy powers the optional trained category classifier
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("numpy not available, trained category classifier disabled")
+
+# Read size used when pulling a PDF off disk (large reads suit NFS/SMB mounts)
+INGEST_CHUNK_SIZE = 4 * 1024 * 1024
+
+class IngestedPDF:
+    """A PDF read from disk exactly once, shared by the hasher and both parser backends"""
+    def __init__(self, path, data, bytes_read):
+        self.path = path
+        self.data = data
+        self.size = len(data)
+        self.bytes_read = bytes_read
+        self._sha256 = None
+
+    @property
+    def sha256(self):
+        """Content hash of the buffer, computed on first use"""
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.data).hexdigest()
+        return self._sha256
+
+    def open_stream(self):
+        """Return a fresh in-memory stream over the buffer for a parser backend"""
+        # BytesIO shares the immutable bytes object until written to, so this does not copy
+        return io.BytesIO(self.data)
+
+    @property
+    def read_amplification(self):
+        """Bytes read from disk relative to the file size (1.0 means a single pass)"""
+        return self.bytes_read / self.size if self.size else 1.0
+
+def ingest_pdf(path, chunk_size=INGEST_CHUNK_SIZE):
+    """Read a PDF from disk in a single pass and return an IngestedPDF"""
+    chunks = []
+    bytes_read = 0
+    # Unbuffered so every byte counted here is a byte actually requested from the filesystem
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            bytes_read += len(chunk)
+    
+    # Avoid the join copy for the common case of a file that fits in one read
+    data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    return IngestedPDF(path, data, bytes_read)
+
+def hash_file(path, chunk_size=INGEST_CHUNK_SIZE):
+    """SHA-256 and size of a file, streamed so archived files are never held in memory"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+# Largest single kernel copy request; big requests keep the number of system calls per file small
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Errors that mean a kernel copy method is not available for this pair of files
+COPY_UNSUPPORTED_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ETXTBSY}
+
+def copy_file_contents(source, destination, chunk_size=COPY_CHUNK_SIZE, sync=False):
+    """Copy a file's bytes, inside the kernel where possible; returns the method used
+    
+    Tries copy_file_range (which can share blocks on filesystems that support it), then
+    sendfile, then a buffered copy through Python. With sync the copy is on disk on return.
+    """
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        method = _copy_contents(src, dst, chunk_size)
+        if sync:
+            os.fsync(dst.fileno())
+        return method
+
+def _copy_contents(src, dst, chunk_size):
+    """Body of copy_file_contents for two open files"""
+    size = os.fstat(src.fileno()).st_size
+    for method in ("copy_file_range", "sendfile"):
+        kernel_copy = getattr(os, method, None)
+        if kernel_copy is None:
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                count = min(chunk_size, size - offset)
+                if method == "copy_file_range":
+                    sent = kernel_copy(src.fileno(), dst.fileno(), count, offset, offset)
+                else:
+                    sent = kernel_copy(dst.fileno(), src.fileno(), offset, count)
+                if not sent:
+                    break
+                offset += sent
+        except OSError as e:
+            if e.errno not in COPY_UNSUPPORTED_ERRORS:
+                raise
+        if offset >= size:
+            return method
+        # Start again with the next method
+        dst.seek(0)
+        dst.truncate()
+    src.seek(0)
+    shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+    return "buffered"
+
+# Durability modes for filing: no syncing, one sync pass per batch, or a sync for every file
+DURABILITY_NONE = "none"
+DURABILITY_BATCH = "batch"
+DURABILITY_STRICT = "strict"
+
+def fsync_path(path):
+    """Flush a file or folder entry to disk (folders cannot be synced on Windows and are skipped)"""
+    if os.name == "nt":
+        if os.path.isdir(path):
+            return
+        flags = os.O_RDWR | getattr(os, "O_BINARY", 0)
+    else:
+        flags = os.O_RDONLY
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class DurabilityJournal:
+    """Tracks what a batch of file operations wrote and removed, and syncs it as the mode requires
+    
+    In every mode but "none", copies are written under a temporary name and renamed into
+    place, so a crash never leaves a truncated file under a real name. "strict" syncs each
+    copy and its folder as it lands; "batch" syncs everything once in commit() and only then
+    deletes the sources of cross-device moves, so a crash leaves at worst a duplicate.
+    """
+    def __init__(self, mode=DURABILITY_NONE):
+        self.mode = mode if mode in (DURABILITY_NONE, DURABILITY_BATCH, DURABILITY_STRICT) else DURABILITY_NONE
+        self.lock = threading.Lock()
+        self.files = []
+        self.folders = set()
+        self.removals = []
+        self.synced = (0, 0)  # (files, folders) synced by commit()
+
+    def partial_path(self, destination):
+        """Name to write a copy under before it is complete"""
+        if self.mode == DURABILITY_NONE:
+            return destination
+        folder, filename = os.path.split(destination)
+        return os.path.join(folder, f".{filename}.partial")
+
+    def copied(self, partial, destination):
+        """A copy is complete: move it into place and sync it (now or at commit)"""
+        if partial != destination:
+            os.replace(partial, destination)
+        if self.mode == DURABILITY_STRICT:
+            fsync_path(os.path.dirname(destination) or '.')
+        elif self.mode == DURABILITY_BATCH:
+            with self.lock:
+                self.files.append(destination)
+                self.folders.add(os.path.dirname(destination) or '.')
+
+    def renamed(self, source, destination):
+        """A file moved within a filesystem: both folder entries changed"""
+        folders = {os.path.dirname(source) or '.', os.path.dirname(destination) or '.'}
+        if self.mode == DURABILITY_STRICT:
+            for folder in folders:
+                fsync_path(folder)
+        elif self.mode == DURABILITY_BATCH:
+            with self.lock:
+                self.folders.update(folders)
+
+    def remove(self, path):
+        """Delete a source whose content is now stored elsewhere (deferred to commit in batch mode)"""
+        if self.mode == DURABILITY_BATCH:
+            with self.lock:
+                self.removals.append(path)
+            return
+        os.remove(path)
+        if self.mode == DURABILITY_STRICT:
+            fsync_path(os.path.dirname(path) or '.')
+
+    def commit(self, fs=None):
+        """Batch mode: sync every written file and changed folder once, then delete moved sources"""
+        with self.lock:
+            files, folders, removals = self.files, self.folders, self.removals
+            self.files, self.folders, self.removals = [], set(), []
+        if self.mode != DURABILITY_BATCH:
+            return
+        sync = fs.batch if fs is not None else (lambda function, items: {item: function(item) for item in items})
+        try:
+            # File data first, then the folder entries pointing at it
+            for paths in (files, sorted(folders)):
+                errors = [result for result in sync(fsync_path, paths).values() if isinstance(result, OSError)]
+                if errors:
+                    raise errors[0]
+        except OSError as e:
+            # Nothing is known to be on disk, so the sources stay where they are
+            print(f"Error syncing filed documents, leaving {len(removals)} sources in place: {str(e)}")
+            return
+        self.synced = (len(files), len(folders))
+        removed_from = set()
+        for path in removals:
+            try:
+                os.remove(path)
+                removed_from.add(os.path.dirname(path) or '.')
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing {path}: {str(e)}")
+        for folder in removed_from:
+            try:
+                fsync_path(folder)
+            except OSError as e:
+                print(f"Error syncing {folder}: {str(e)}")
+
+# Used where no journal is passed in: no syncing, same behaviour as before durability modes existed
+NO_DURABILITY = DurabilityJournal(DURABILITY_NONE)
+
+def is_partial_copy(name):
+    """Whether a file name is an unfinished copy (left behind if filing crashed mid-copy)"""
+    return name.startswith(".") and name.endswith(".partial")
+
+def copy_file(source, destination, durability=NO_DURABILITY):
+    """Copy a file with its timestamps and permissions, like shutil.copy2; returns the method used"""
+    partial = durability.partial_path(destination)
+    try:
+        method = copy_file_contents(source, partial, sync=durability.mode == DURABILITY_STRICT)
+        shutil.copystat(source, partial)
+        durability.copied(partial, destination)
+    except BaseException:
+        if partial != destination:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+        raise
+    return method
+
+def move_file(source, destination, copy_from=None, durability=NO_DURABILITY):
+    """Move a file: a rename within a filesystem, a kernel copy and delete across filesystems
+    
+    copy_from names an identical file (such as the copy just filed) to read instead of the
+    source, so a file filed and archived on another mount is not read from the source twice.
+    """
+    try:
+        os.rename(source, destination)
+        durability.renamed(source, destination)
+        return "rename"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    method = copy_file(copy_from or source, destination, durability)
+    durability.remove(source)
+    return method
+
+def extract_pdf_text(filename, max_pages=3, ingested=None):
+    """Extract text from PDF file with optimized performance
+    
+    Args:
+        filename: Path to the PDF file
+        max_pages: Maximum number of pages to extract (default 3)
+        ingested: Optional IngestedPDF already read from disk; when omitted
+            the file is read once here and shared by both parser backends
+    
+    Returns:
+        Extracted text as string
+    """
+    # Read the file once so pdfplumber and the PyPDF2 fallback share the same buffer
+    if ingested is None:
+        try:
+            ingested = ingest_pdf(filename)
+        except Exception as e:
+            print(f"Error reading {filename}: {str(e)}")
+            return ""
+    
+    # Use pdfplumber if available, it's faster and more reliable
+    if PDFPLUMBER_AVAILABLE:
+        try:
+            with pdfplumber.open(ingested.open_stream()) as pdf:
+                # Only process the first few pages for speed
+                pages_to_extract = min(len(pdf.pages), max_pages)
+                
+                text = ""
+                # Process pages in batches for better performance
+                for i in range(pages_to_extract):
+                    try:
+                        page = pdf.pages[i]
+                        page_text = page.extract_text(x_tolerance=3) or ""
+                        
+                        # Only add non-empty pages
+                        if page_text.strip():
+                            text += page_text + "\n\n"
+                            
+                            # If we found substantial text, we can stop early
+                            if len(text) > 2000:
+                                break
+                    except Exception as e:
+                        print(f"Error extracting text from page {i}: {str(e)}")
+                        continue
+                
+                return text
+        except Exception as e:
+            print(f"Error with pdfplumber: {str(e)}. Falling back to PyPDF2.")
+            # Fall back to PyPDF2
+    
+    # PyPDF2 fallback
+    try:
+        reader = PyPDF2.PdfReader(ingested.open_stream())
+        text = ""
+        # Extract text from limited pages
+        num_pages = min(len(reader.pages), max_pages)
+        
+        for i in range(num_pages):
+            try:
+                page_text = reader.pages[i].extract_text() or ""
+                if page_text.strip():
+                    text += page_text + "\n\n"
+                    
+                    # If we found substantial text, we can stop early for performance
+                    if len(text) > 2000:
+                        break
+            except Exception as page_error:
+                print(f"Error extracting text from page {i}: {str(page_error)}")
+                continue
+                
+        return text
+    except Exception as e:
+        print(f"Error extracting text with PyPDF2: {str(e)}")
+        return ""
+
+# Regexes shared by the normalization and detection helpers, compiled once
+WHITESPACE_RE = re.compile(r'\s+')
+SPLIT_YEAR_RE = re.compile(r'(\b20\d{1,2})\s+(\d{1})\b')  # Split years like "202 5"
+SPLIT_YEAR_LEADING_RE = re.compile(r'(\b2)\s+(\d{3})\b')  # Split years like "2 023"
+TOKEN_RE = re.compile(r'\w+')
+
+# SimHash fingerprints: 64 bits split into 6 bands of 10-11 bits, so any two fingerprints at
+# most 5 bits apart share at least one band exactly and are found by an index lookup.
+# Rescans with OCR noise land a few bits apart; unrelated documents are 15+ bits apart.
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 6
+NEAR_DUPLICATE_DISTANCE = SIMHASH_BANDS - 1
+# Too little text for a fingerprint to mean anything (blank pages, failed extraction)
+NEAR_DUPLICATE_MIN_TOKENS = 20
+
+def _shingle_hash(shingle):
+    """Stable 64-bit hash of a shingle"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+def simhash(tokens):
+    """64-bit SimHash over word-pair shingles, weighted by how often each occurs"""
+    shingles = Counter(" ".join(pair) for pair in zip(tokens, tokens[1:])) or Counter(tokens)
+    if not shingles:
+        return 0
+    if NUMPY_AVAILABLE:
+        hashes = np.array([_shingle_hash(shingle) for shingle in shingles], dtype=">u8")
+        weights = np.fromiter(shingles.values(), dtype=np.float64, count=len(shingles))
+        # Column i of the unpacked bits is bit 63 - i of each hash
+        bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)
+        totals = weights @ (bits * 2.0 - 1.0)
+        return sum(1 << (SIMHASH_BITS - 1 - i) for i in np.flatnonzero(totals > 0).tolist())
+    totals = [0] * SIMHASH_BITS
+    for shingle, weight in shingles.items():
+        value = _shingle_hash(shingle)
+        for bit in range(SIMHASH_BITS):
+            totals[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit, total in enumerate(totals) if total > 0)
+
+def hamming_distance(a, b):
+    """Number of bits in which two fingerprints differ"""
+    return bin(a ^ b).count("1")
+
+def simhash_bands(fingerprint):
+    """The fingerprint cut into SIMHASH_BANDS contiguous bit ranges"""
+    bands = []
+    shift = 0
+    for band in range(SIMHASH_BANDS):
+        width = SIMHASH_BITS // SIMHASH_BANDS + (band < SIMHASH_BITS % SIMHASH_BANDS)
+        bands.append(fingerprint >> shift & ((1 << width) - 1))
+        shift += width
+    return bands
+
+class NormalizedDocument:
+    """Extracted text with each normalized view computed lazily, once per document"""
+    def __init__(self, text):
+        self.text = text or ""
+
+    @cached_property
+    def collapsed(self):
+        """Text with every whitespace run collapsed to a single space"""
+        return WHITESPACE_RE.sub(' ', self.text)
+
+    @cached_property
+    def lower(self):
+        """Lowercased original text"""
+        return self.text.lower()
+
+    @cached_property
+    def collapsed_lower(self):
+        """Lowercased text with whitespace collapsed"""
+        return self.collapsed.lower()
+
+    @cached_property
+    def date_text(self):
+        """Collapsed text with common OCR errors in years fixed ("202 5" -> "2025")"""
+        clean_text = SPLIT_YEAR_RE.sub(r'\1\2', self.collapsed)
+        return SPLIT_YEAR_LEADING_RE.sub(r'\1\2', clean_text)
+
+    @cached_property
+    def tokens(self):
+        """Lowercased word tokens"""
+        return TOKEN_RE.findall(self.collapsed_lower)
+
+    @cached_property
+    def fingerprint(self):
+        """SimHash of the text, or None if there is too little text to compare"""
+        if len(self.tokens) < NEAR_DUPLICATE_MIN_TOKENS:
+            return None
+        return simhash(self.tokens)
+
+def as_document(text):
+    """Wrap raw text in a NormalizedDocument unless it already is one"""
+    if isinstance(text, NormalizedDocument):
+        return text
+    return NormalizedDocument(text)
+
+@lru_cache(maxsize=4096)
+def keyword_forms(keyword):
+    """Return the (lowercased, whitespace-normalized) forms of a keyword, cached across documents"""
+    lowered = keyword.lower()
+    return lowered, WHITESPACE_RE.sub(' ', lowered)
+
+def match_category(text, categories):
+    """Return (best category, number of matching keywords) for a document"""
+    doc = as_document(text)
+    text_lower = doc.lower
+    normalized_text = doc.collapsed_lower
+    
+    best_match = None
+    max_matches = 0
+    
+    # Check each category's keywords
+    for category, data in categories.items():
+        keywords = data.get("keywords", [])
+        if not keywords:
+            continue
+            
+        matches = 0
+        for keyword in keywords:
+            # Normalize spaces in keyword too
+            keyword_lower, normalized_keyword = keyword_forms(keyword)
+            
+            # Try both original and normalized matching
+            if normalized_keyword in normalized_text or keyword_lower in text_lower:
+                matches += 1
+        
+        # Update if this category has more matching keywords
+        if matches > max_matches:
+            max_matches = matches
+            best_match = category
+    
+    return best_match, max_matches
+
+# Hard cap on the short windows handed to dateutil per document
+MAX_DATE_WINDOWS = 24
+
+# Characters of context kept on each side of a date anchor
+DATE_WINDOW_RADIUS = 12
+
+MONTH_TOKEN_PATTERN = r'(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)'
+
+# Text that can anchor a date: month names, separated digit groups, plausible years or compact dates
+DATE_ANCHOR_RE = re.compile(
+    rf'\b{MONTH_TOKEN_PATTERN}\b'
+    r'|\b\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{1,4})?\b'
+    r'|\b(?:19|20)\d{2}\b'
+    r'|\b\d{6}(?:\d{2})?\b',
+    re.IGNORECASE
+)
+
+# Missing fields are filled from this default, so a window without a year is rejected below
+_NO_YEAR_DEFAULT = datetime(1, 1, 1)
+
+def find_date_windows(clean_text, max_windows=MAX_DATE_WINDOWS, radius=DATE_WINDOW_RADIUS):
+    """Return up to max_windows short (start, end) spans around date anchors, trimmed to whole words"""
+    windows = []
+    for match in DATE_ANCHOR_RE.finditer(clean_text):
+        # Anchors already covered by the previous window (e.g. the year in "5 April 2024") add nothing
+        if windows and match.end() <= windows[-1][1]:
+            continue
+            
+        if len(windows) >= max_windows:
+            break
+            
+        # Windows never overlap, so neighbouring numbers do not leak into each other's parse
+        start = max(windows[-1][1] if windows else 0, match.start() - radius)
+        end = min(len(clean_text), match.end() + radius)
+        
+        # Drop partial words at the edges so dateutil only sees whole tokens
+        if start > 0 and clean_text[start - 1] != ' ':
+            space = clean_text.find(' ', start, match.start())
+            start = space + 1 if space != -1 else match.start()
+        if end < len(clean_text):
+            space = clean_text.rfind(' ', match.end(), end)
+            end = space if space != -1 else match.end()
+            
+        windows.append((start, end))
+    return windows
+
+def _parse_window(window_text):
+    """Fuzzy-parse one short window, returning a date only if it includes a plausible year"""
+    try:
+        date = dateutil.parser.parse(window_text, fuzzy=True, dayfirst=True, default=_NO_YEAR_DEFAULT)
+    except (ValueError, OverflowError):
+        return None
+        
+    # Verify the date is reasonable (between 1900 and 2100)
+    if 1900 <= date.year <= 2100:
+        return date
+    return None
+
+def parse_date_windows(clean_text, max_windows=MAX_DATE_WINDOWS):
+    """Fuzzy-parse bounded windows around digit clusters and month names, returning the first valid date"""
+    for start, end in find_date_windows(clean_text, max_windows):
+        date = _parse_window(clean_text[start:end])
+        if date:
+            return date
+    return None
+
+# Month names mapped to month numbers for textual dates
+MONTH_NUMBERS = {
+    'jan': 1, 'january': 1,
+    'feb': 2, 'february': 2,
+    'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4,
+    'may': 5,
+    'jun': 6, 'june': 6,
+    'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8,
+    'sep': 9, 'sept': 9, 'september': 9,
+    'oct': 10, 'october': 10,
+    'nov': 11, 'november': 11,
+    'dec': 12, 'december': 12
+}
+
+# Every explicit date shape we recognize, matched in a single scan of the text
+DATE_CANDIDATE_RE = re.compile(
+    r'(?P<iso>\b(?P<iso_y>\d{4})-(?P<iso_m>\d{2})-(?P<iso_d>\d{2})\b)'
+    r'|(?P<ymd>\b(?P<ymd_y>\d{4})[/.](?P<ymd_m>\d{1,2})[/.](?P<ymd_d>\d{1,2})\b)'
+    r'|(?P<num>\b(?P<num_a>\d{1,2})[/.-](?P<num_b>\d{1,2})[/.-]\s?(?P<num_y>\d{4}|\d{2})\b)'
+    rf'|(?P<dmy>\b(?P<dmy_d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<dmy_m>{MONTH_TOKEN_PATTERN})\.?[,\s]+(?P<dmy_y>\d{{4}}|\d{{2}})\b)'
+    rf'|(?P<mdy>\b(?P<mdy_m>{MONTH_TOKEN_PATTERN})\.?\s+(?P<mdy_d>\d{{1,2}})(?:st|nd|rd|th)?[,\s]+(?P<mdy_y>\d{{4}}|\d{{2}})\b)'
+    r'|(?P<year>\b(?:19|20)\d{2}\b)',
+    re.IGNORECASE
+)
+
+# Labels that usually introduce the document's own date
+DATE_LABEL_RE = re.compile(
+    r'\b(?P<strong>invoice date|date of issue|issue date|issued on|statement date|billing date|document date|'
+    r'rechnungsdatum|factuurdatum)\b'
+    r'|\b(?P<negative>due date|due|payable by|expiry|expires|valid until|date of birth|born|order date|delivery date)\b'
+    # The bare words come last so "date of birth" is not taken for a plain "date" label
+    r'|\b(?P<weak>date|dated|datum)\b',
+    re.IGNORECASE
+)
+
+# How far (in characters) a label may precede the date it describes
+DATE_LABEL_DISTANCE = 30
+
+# Base scores by format: unambiguous shapes score higher than ones that need guessing
+DATE_FORMAT_SCORES = {
+    "iso": 0.9,
+    "ymd": 0.85,
+    "textual": 0.85,
+    "numeric": 0.75,
+    "numeric_ambiguous": 0.55,
+    "numeric_short_year": 0.5,
+    "window": 0.4,
+    "year_only": 0.1
+}
+
+# A window needs a month name or separated digits to be more than a bare year
+WINDOW_DATE_SHAPE_RE = re.compile(rf'\b{MONTH_TOKEN_PATTERN}\b|\d[/.-]\d', re.IGNORECASE)
+
+# Dates scoring below this are sent to manual review instead of being filed automatically
+DATE_CONFIDENCE_THRESHOLD = 0.6
+
+# Confidence given to a date taken from the filename (often the scan date, not the document date)
+FILENAME_DATE_CONFIDENCE = 0.5
+
+class DateCandidate:
+    """One possible document date together with how it was found and its score"""
+    def __init__(self, date, position, kind, score=0.0):
+        self.date = date
+        self.position = position
+        self.kind = kind
+        self.score = score
+
+    def __repr__(self):
+        return f"DateCandidate({self.date:%Y-%m-%d}, {self.kind}, score={self.score:.2f})"
+
+def _expand_year(year_str):
+    """Turn a 2- or 4-digit year string into a full year"""
+    year = int(year_str)
+    if len(year_str) == 2:
+        year = 2000 + year if year < 50 else 1900 + year
+    return year
+
+def _make_date(year, month, day):
+    """Build a datetime if the parts form a valid date in the supported range"""
+    if not 1900 <= year <= 2100:
+        return None
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+def _candidate_from_match(match, dayfirst):
+    """Convert one DATE_CANDIDATE_RE match into a DateCandidate (or None if it is not a valid date)"""
+    kind = match.lastgroup
+    position = match.start()
+    
+    if kind == "iso":
+        date = _make_date(int(match["iso_y"]), int(match["iso_m"]), int(match["iso_d"]))
+        return DateCandidate(date, position, "iso") if date else None
+        
+    if kind == "ymd":
+        date = _make_date(int(match["ymd_y"]), int(match["ymd_m"]), int(match["ymd_d"]))
+        return DateCandidate(date, position, "ymd") if date else None
+        
+    if kind == "num":
+        first, second = int(match["num_a"]), int(match["num_b"])
+        year = _expand_year(match["num_y"])
+        day, month = (first, second) if dayfirst else (second, first)
+        date = _make_date(year, month, day)
+        ambiguous = first <= 12 and second <= 12 and first != second
+        if not date:
+            # The preferred order is impossible (e.g. 03/14/2024 with dayfirst), so the other one is certain
+            date = _make_date(year, day, month)
+            ambiguous = False
+        if not date:
+            return None
+        if len(match["num_y"]) == 2:
+            kind = "numeric_short_year"
+        else:
+            kind = "numeric_ambiguous" if ambiguous else "numeric"
+        return DateCandidate(date, position, kind)
+        
+    if kind in ("dmy", "mdy"):
+        month = MONTH_NUMBERS.get(match[f"{kind}_m"].lower())
+        date = _make_date(_expand_year(match[f"{kind}_y"]), month, int(match[f"{kind}_d"])) if month else None
+        return DateCandidate(date, position, "textual") if date else None
+        
+    # Year only: the month and day are invented, so this is the weakest kind of evidence
+    today = datetime.now()
+    year = int(match["year"])
+    date = _make_date(year, today.month, today.day) or _make_date(year, today.month, 28)
+    return DateCandidate(date, position, "year_only") if date else None
+
+def extract_date_candidates(text, dayfirst=True):
+    """Collect every date candidate in one pass and return them ranked best-first
+    
+    Each candidate is scored from its format (ambiguity), how early it appears and
+    whether a label such as "Invoice date" or "Due date" precedes it.
+    """
+    clean_text = as_document(text).date_text
+    text_length = max(1, len(clean_text))
+    
+    candidates = []
+    year_only = []
+    for match in DATE_CANDIDATE_RE.finditer(clean_text):
+        candidate = _candidate_from_match(match, dayfirst)
+        if candidate is None:
+            continue
+        if candidate.kind == "year_only":
+            year_only.append(candidate)
+        else:
+            candidates.append(candidate)
+    
+    # Only fall back to the bounded fuzzy windows when no explicit shape matched;
+    # windows holding nothing but a year are left to the weaker year-only candidate
+    if not candidates:
+        for start, end in find_date_windows(clean_text):
+            window_text = clean_text[start:end]
+            if not WINDOW_DATE_SHAPE_RE.search(window_text):
+                continue
+            date = _parse_window(window_text)
+            if date:
+                candidates.append(DateCandidate(date, start, "window"))
+    
+    # A bare year is only a candidate when nothing better exists
+    if not candidates:
+        candidates = year_only[:1]
+    if not candidates:
+        return []
+    
+    # Label positions, so each candidate can look up the nearest preceding label
+    labels = [(label.end(), label.lastgroup) for label in DATE_LABEL_RE.finditer(clean_text)]
+    label_ends = [end for end, _ in labels]
+    
+    # A label describes only the first date after it, not later ones within reach
+    positions = sorted(candidate.position for candidate in candidates)
+    
+    # Count repeats: a date printed several times is more likely the document date
+    occurrences = {}
+    for candidate in candidates:
+        occurrences[candidate.date] = occurrences.get(candidate.date, 0) + 1
+    
+    for candidate in candidates:
+        score = DATE_FORMAT_SCORES[candidate.kind]
+        
+        # Earlier dates (headers) are favoured over dates deep in the body
+        score -= 0.15 * (candidate.position / text_length)
+        
+        # Label proximity
+        index = bisect.bisect_right(label_ends, candidate.position) - 1
+        previous = bisect.bisect_left(positions, candidate.position) - 1
+        if (index >= 0 and candidate.position - label_ends[index] <= DATE_LABEL_DISTANCE
+                and (previous < 0 or positions[previous] < label_ends[index])):
+            label_kind = labels[index][1]
+            if label_kind == "strong":
+                score += 0.3
+            elif label_kind == "weak":
+                score += 0.15
+            else:
+                score -= 0.25
+        
+        # Repetition bonus, capped
+        score += min(0.1, 0.05 * (occurrences[candidate.date] - 1))
+        
+        candidate.score = max(0.0, min(1.0, score))
+    
+    candidates.sort(key=lambda c: (-c.score, c.position))
+    return candidates
+
+def date_confidence(candidates):
+    """Confidence in the top-ranked candidate, reduced when a different date scores almost as well"""
+    if not candidates:
+        return 0.0
+    best = candidates[0]
+    confidence = best.score
+    for other in candidates[1:]:
+        if other.date != best.date:
+            if best.score - other.score < 0.1:
+                confidence *= 0.8
+            break
+    return confidence
+
+def extract_date_with_confidence(text, dayfirst=True):
+    """Return (best date, confidence between 0 and 1, ranked candidates) for a document"""
+    candidates = extract_date_candidates(text, dayfirst)
+    if not candidates:
+        return None, 0.0, []
+    return candidates[0].date, date_confidence(candidates), candidates
+
+def unique_candidate_dates(candidates, limit=5):
+    """The distinct dates among ranked candidates, best first"""
+    dates = []
+    for candidate in candidates:
+        if candidate.date not in dates:
+            dates.append(candidate.date)
+            if len(dates) >= limit:
+                break
+    return dates
+
+def extract_date_from_text(text, dayfirst=True):
+    """Find the most likely document date in extracted text (str or NormalizedDocument)"""
+    return extract_date_with_confidence(text, dayfirst)[0]
+
+def _date_from_matches(matches):
+    """First valid date among regex matches of three digit groups (order guessed from the group lengths)"""
+    if not matches:
+        return None
+
+    for match in matches:
+        try:
+            # Try to determine date format
+            part1, part2, part3 = match[0], match[1], match[2]
+
+            # Try to determine if it's YYYYMMDD, DDMMYYYY, etc.
+            if len(part1) == 4:  # First part is 4 digits, likely YYYY
+                # YYYY-MM-DD format
+                year = int(part1)
+                month = int(part2)
+                day = int(part3)
+            elif len(part3) == 4:  # Last part is 4 digits, likely YYYY
+                # DD-MM-YYYY or MM-DD-YYYY format
+                # Check plausible ranges to determine which is day vs month
+                if int(part1) <= 31 and int(part2) <= 12:
+                    # Likely DD-MM-YYYY
+                    day = int(part1)
+                    month = int(part2)
+                    year = int(part3)
+                elif int(part1) <= 12 and int(part2) <= 31:
+                    # Likely MM-DD-YYYY
+                    month = int(part1)
+                    day = int(part2)
+                    year = int(part3)
+                else:
+                    continue  # Invalid date format
+            else:
+                # Handle 2-digit years
+                if int(part1) <= 31 and int(part2) <= 12:
+                    # Likely DD-MM-YY
+                    day = int(part1)
+                    month = int(part2)
+                    year = 2000 + int(part3) if int(part3) < 50 else 1900 + int(part3)
+                elif int(part1) <= 12 and int(part2) <= 31:
+                    # Likely MM-DD-YY
+                    month = int(part1)
+                    day = int(part2)
+                    year = 2000 + int(part3) if int(part3) < 50 else 1900 + int(part3)
+                else:
+                    # Try YY-MM-DD
+                    year = 2000 + int(part1) if int(part1) < 50 else 1900 + int(part1)
+                    month = int(part2)
+                    day = int(part3)
+
+            # Validate month and day
+            if not (1 <= month <= 12 and 1 <= day <= 31):
+                continue
+
+            # Additional validation - check if day is valid for the given month and year
+            max_days = 31
+            if month in [4, 6, 9, 11]:  # Apr, Jun, Sep, Nov
+                max_days = 30
+            elif month == 2:  # February
+                # Check for leap year
+                if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0):
+                    max_days = 29
+                else:
+                    max_days = 28
+
+            if day > max_days:
+                continue
+
+            # Ensure year is valid for Windows (>= 1900)
+            if year < 1900 or year > 2100:
+                continue
+
+            # Create date object
+            return datetime(year, month, day)
+        except:
+            continue
+
+    return None
+
+def date_from_filename(filename):
+    """Date embedded in a filename (scanner names like 20240131_scan.pdf), or None"""
+    # Clean filename - remove potential OCR artifacts
+    clean_filename = re.sub(r'\s+', '', filename)  # Remove all spaces
+
+    # First try ISO format explicitly
+    iso_matches = re.findall(r'(\d{4})[_-]?(\d{2})[_-]?(\d{2})', clean_filename)
+    if iso_matches:
+        for year_str, month_str, day_str in iso_matches:
+            try:
+                year, month, day = int(year_str), int(month_str), int(day_str)
+                if 1900 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
+                    return datetime(year, month, day)
+            except:
+                pass
+
+    # Try to find date pattern in filename - expanded patterns
+    date_patterns = [
+        r'(\d{2})(\d{2})(\d{2,4})',  # DDMMYY or DDMMYYYY
+        r'(\d{2,4})(\d{2})(\d{2})',  # YYYYMMDD or YYMMDD
+        r'(\d{2})[_-](\d{2})[_-](\d{2,4})',  # DD-MM-YY or DD_MM_YYYY
+        r'(\d{2})[_-](\d{2})[_-](\d{2})'     # YY-MM-DD
+    ]
+
+    # First try clean filename
+    for pattern in date_patterns:
+        matches = re.findall(pattern, clean_filename)
+        found_date = _date_from_matches(matches)
+        if found_date:
+            return found_date
+
+    # If that fails, try the original filename
+    for pattern in date_patterns:
+        matches = re.findall(pattern, filename)
+        found_date = _date_from_matches(matches)
+        if found_date:
+            return found_date
+
+    return None
+
+# File holding the trained category classifier
+CLASSIFIER_MODEL_FILE = "category_model.npz"
+
+# Classifier predictions below this probability still go to manual review
+CLASSIFIER_THRESHOLD = 0.6
+
+class CategoryClassifier:
+    """TF-IDF nearest-centroid classifier trained offline from already-filed documents
+    
+    Each category is represented by the L2-normalized centroid of its documents'
+    TF-IDF vectors, so classifying a batch is one matrix multiply of the batch's
+    document vectors against the centroid matrix.
+    """
+    # Softmax temperature applied to cosine similarities when turning them into probabilities
+    SHARPNESS = 20.0
+    
+    # Upper bound on the dense float32 block built per multiply (in cells)
+    MAX_BLOCK_CELLS = 8 * 1024 * 1024
+
+    def __init__(self, categories, vocabulary, idf, centroids):
+        self.categories = list(categories)
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.centroids = centroids
+
+    @staticmethod
+    def document_terms(document):
+        """Alphabetic tokens of a document (numbers, amounts and dates are noise for classification)"""
+        return [token for token in as_document(document).tokens if len(token) > 1 and token.isalpha()]
+
+    @classmethod
+    def train(cls, labelled_documents, max_features=20000, min_df=2):
+        """Train from (category, document) pairs, where document is text or a NormalizedDocument"""
+        term_lists = []
+        labels = []
+        document_frequency = {}
+        for category, document in labelled_documents:
+            terms = cls.document_terms(document)
+            if not terms:
+                continue
+            term_lists.append(terms)
+            labels.append(category)
+            for term in set(terms):
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        
+        if not term_lists:
+            raise ValueError("No documents with usable text to train on")
+            
+        # Keep the most common terms that appear in at least min_df documents
+        kept = [term for term, df in document_frequency.items() if df >= min_df]
+        kept.sort(key=lambda term: -document_frequency[term])
+        kept = kept[:max_features]
+        vocabulary = {term: index for index, term in enumerate(kept)}
+        
+        total = len(term_lists)
+        df = np.array([document_frequency[term] for term in kept], dtype=np.float32)
+        idf = np.log((1.0 + total) / (1.0 + df)) + 1.0
+        
+        categories = sorted(set(labels))
+        category_index = {category: index for index, category in enumerate(categories)}
+        centroids = np.zeros((len(categories), len(vocabulary)), dtype=np.float32)
+        
+        model = cls(categories, vocabulary, idf, centroids)
+        rows, cols, values = model._sparse_vectors(term_lists)
+        
+        # Sum each document's vector into its category's row, then normalize the rows
+        label_rows = np.array([category_index[label] for label in labels], dtype=np.int64)
+        np.add.at(centroids, (label_rows[rows], cols), values)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids /= norms
+        return model
+
+    def _sparse_vectors(self, term_lists):
+        """Build L2-normalized sublinear TF-IDF vectors as COO (rows, cols, values) arrays"""
+        rows, cols, counts = [], [], []
+        for row, terms in enumerate(term_lists):
+            term_counts = {}
+            for term in terms:
+                index = self.vocabulary.get(term)
+                if index is not None:
+                    term_counts[index] = term_counts.get(index, 0) + 1
+            rows.extend([row] * len(term_counts))
+            cols.extend(term_counts.keys())
+            counts.extend(term_counts.values())
+        
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        values = (1.0 + np.log(np.array(counts, dtype=np.float32))) * self.idf[cols]
+        
+        # Normalize each document vector to unit length
+        squared = np.zeros(len(term_lists), dtype=np.float32)
+        np.add.at(squared, rows, values * values)
+        norms = np.sqrt(squared)
+        norms[norms == 0] = 1.0
+        values = values / norms[rows]
+        return rows, cols, values
+
+    def predict_batch(self, documents):
+        """Classify many documents at once, returning a list of (category, probability)"""
+        if not documents:
+            return []
+            
+        term_lists = [self.document_terms(document) for document in documents]
+        rows, cols, values = self._sparse_vectors(term_lists)
+        
+        # Scatter into dense blocks sized to bound memory, one multiply per block
+        vocabulary_size = max(1, len(self.vocabulary))
+        block_rows = max(1, self.MAX_BLOCK_CELLS // vocabulary_size)
+        scores = np.empty((len(documents), len(self.categories)), dtype=np.float32)
+        for start in range(0, len(documents), block_rows):
+            end = min(start + block_rows, len(documents))
+            mask = (rows >= start) & (rows < end)
+            block = np.zeros((end - start, vocabulary_size), dtype=np.float32)
+            block[rows[mask] - start, cols[mask]] = values[mask]
+            scores[start:end] = block @ self.centroids.T
+        
+        # Softmax over cosine similarities gives a comparable confidence per document
+        scaled = scores * self.SHARPNESS
+        scaled -= scaled.max(axis=1, keepdims=True)
+        probabilities = np.exp(scaled)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        
+        best = probabilities.argmax(axis=1)
+        results = []
+        for row, index in enumerate(best):
+            # Documents without a single known term carry no evidence at all
+            if not term_lists[row] or scores[row, index] <= 0:
+                results.append((None, 0.0))
+            else:
+                results.append((self.categories[index], float(probabilities[row, index])))
+        return results
+
+    def save(self, path=CLASSIFIER_MODEL_FILE):
+        """Write the model to a compressed .npz file"""
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(path, categories=np.array(self.categories), terms=np.array(terms),
+                            idf=self.idf, centroids=self.centroids)
+
+    @classmethod
+    def load(cls, path=CLASSIFIER_MODEL_FILE):
+        """Load a model written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            vocabulary = {str(term): index for index, term in enumerate(data["terms"])}
+            return cls([str(c) for c in data["categories"]], vocabulary,
+                       data["idf"].astype(np.float32), data["centroids"].astype(np.float32))
+
+# File holding what has been learned from manual category decisions
+LEARNED_MODEL_FILE = "learned_categories.json"
+
+# A learned prediction is only used when at least this posterior probability...
+LEARNED_THRESHOLD = 0.8
+
+# ...and at least this share of the document's terms were seen in that category before
+LEARNED_MIN_OVERLAP = 0.6
+
+class ManualDecisionModel:
+    """Naive Bayes term counts updated incrementally from each manual category decision
+    
+    Learning a document touches only that document's distinct terms, and an inverted
+    index keeps prediction proportional to the document rather than the vocabulary.
+    """
+    def __init__(self, data=None):
+        data = data or {}
+        # category -> {"docs": documents learned, "total": term occurrences, "terms": {term: count}}
+        self.categories = data.get("categories", {})
+        self.total_docs = sum(stats["docs"] for stats in self.categories.values())
+        
+        # term -> set of categories that have seen it
+        self.postings = {}
+        for category, stats in self.categories.items():
+            for term in stats["terms"]:
+                self.postings.setdefault(term, set()).add(category)
+        self.dirty = False
+        
+        # learn() runs on the UI thread while the analysis threads call predict()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=LEARNED_MODEL_FILE):
+        """Load the model, starting empty if the file does not exist or is unreadable"""
+        try:
+            with open(path, "r") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            print(f"Error loading learned categories: {str(e)}")
+            return cls()
+
+    def save(self, path=LEARNED_MODEL_FILE):
+        """Write the model if it changed, replacing the old file atomically"""
+        if not self.dirty:
+            return
+        temp_path = path + ".tmp"
+        with self.lock, open(temp_path, "w") as f:
+            json.dump({"categories": self.categories}, f)
+        os.replace(temp_path, path)
+        self.dirty = False
+
+    def learn(self, document, category):
+        """Record that a document belongs to a category (O(terms in the document))"""
+        terms = set(CategoryClassifier.document_terms(document))
+        if not terms:
+            return
+        with self.lock:
+            stats = self.categories.setdefault(category, {"docs": 0, "total": 0, "terms": {}})
+            counts = stats["terms"]
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+                self.postings.setdefault(term, set()).add(category)
+            stats["docs"] += 1
+            stats["total"] += len(terms)
+            self.total_docs += 1
+            self.dirty = True
+
+    def forget_category(self, category):
+        """Drop everything learned for a category (e.g. after it was removed)"""
+        with self.lock:
+            stats = self.categories.pop(category, None)
+            if not stats:
+                return
+            for term in stats["terms"]:
+                categories = self.postings.get(term)
+                if categories:
+                    categories.discard(category)
+            self.total_docs -= stats["docs"]
+            self.dirty = True
+
+    def predict(self, document, allowed_categories=None):
+        """Return (category, posterior) if the learned evidence is strong enough, else (None, 0.0)"""
+        terms = set(CategoryClassifier.document_terms(document))
+        with self.lock:
+            return self._predict(terms, allowed_categories)
+
+    def _predict(self, terms, allowed_categories):
+        """Score the terms against every allowed category; the caller holds the lock"""
+        if not terms or not self.total_docs:
+            return None, 0.0
+            
+        vocabulary_size = len(self.postings) + 1
+        
+        # Log-likelihood of every term being unseen, per category; shared terms are corrected below
+        log_scores = {}
+        for category, stats in self.categories.items():
+            if allowed_categories is not None and category not in allowed_categories:
+                continue
+            log_scores[category] = (math.log(stats["docs"] / self.total_docs)
+                                    - len(terms) * math.log(stats["total"] + vocabulary_size))
+        if not log_scores:
+            return None, 0.0
+        
+        # Walk only the postings of the document's terms
+        shared = {category: 0 for category in log_scores}
+        for term in terms:
+            for category in self.postings.get(term, ()):
+                if category in log_scores:
+                    log_scores[category] += math.log(self.categories[category]["terms"][term] + 1)
+                    shared[category] += 1
+        
+        best = max(log_scores, key=log_scores.get)
+        top = log_scores[best]
+        posterior = 1.0 / sum(math.exp(score - top) for score in log_scores.values())
+        
+        # A lone learned category always "wins" the posterior, so also require real term overlap
+        if posterior < LEARNED_THRESHOLD or shared[best] / len(terms) < LEARNED_MIN_OVERLAP:
+            return None, 0.0
+        return best, posterior
+
+def iter_filed_documents(categories, max_per_category=None):
+    """Yield (category, path) for every PDF already filed in a category folder"""
+    for category, data in categories.items():
+        folder = data.get("folder", category.capitalize())
+        if not os.path.isdir(folder):
+            continue
+        count = 0
+        for _, entry in scan_category_folder(folder):
+            if entry.name.lower().endswith('.pdf'):
+                yield category, entry.path
+                count += 1
+                if max_per_category and count >= max_per_category:
+                    break
+
+def train_classifier_from_folders(categories, model_path=CLASSIFIER_MODEL_FILE, max_per_category=None,
+                                  progress=None):
+    """Extract text from the filed corpus, train a CategoryClassifier and save it"""
+    labelled = []
+    for count, (category, path) in enumerate(iter_filed_documents(categories, max_per_category), 1):
+        text = extract_pdf_text(path)
+        if text.strip():
+            labelled.append((category, NormalizedDocument(text)))
+        if progress:
+            progress(count, path)
+    
+    classifier = CategoryClassifier.train(labelled)
+    classifier.save(model_path)
+    return classifier, len(labelled)
+
+# Categories live in categories.json plus a journal of changes made since it was last written
+CATEGORIES_FILE = "categories.json"
+
+# Fold the journal back into categories.json after this many commits
+CATEGORY_JOURNAL_LIMIT = 50
+
+class CategoryStore:
+    """Journaled category store with atomic incremental commits and a monotonic version
+    
+    categories.json stays a plain {name: data} snapshot. Each commit appends one JSON
+    line holding only the changed categories to categories.json.journal, so a commit
+    is atomic (a torn last line is ignored on load). categories.json.version holds the
+    current version, which other code can poll cheaply with read_version().
+    """
+    def __init__(self, path=CATEGORIES_FILE, read_only=False, load=True):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.version_path = path + ".version"
+        self.read_only = read_only  # Readers in other threads or processes never write
+        self.categories = {}
+        self.version = 0
+        self.snapshot_version = 0
+        self.journal_entries = 0
+        if load:
+            self.load()
+
+    @staticmethod
+    def read_version(path=CATEGORIES_FILE):
+        """Current store version without loading any categories (0 if there is none)"""
+        try:
+            with open(path + ".version", "r") as f:
+                return json.load(f).get("version", 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def load(self):
+        """Read the snapshot and replay the journal on top of it"""
+        try:
+            with open(self.path, "r") as f:
+                self.categories = json.load(f)
+        except FileNotFoundError:
+            self.categories = {}
+            if not self.read_only:
+                self._write_snapshot()
+        
+        try:
+            with open(self.version_path, "r") as f:
+                meta = json.load(f)
+            self.version = meta.get("version", 0)
+            self.snapshot_version = meta.get("snapshot_version", 0)
+        except (FileNotFoundError, ValueError):
+            self.version = self.snapshot_version = 0
+        
+        self.journal_entries = 0
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # Torn write from a crash; nothing after it was committed
+                    self.journal_entries += 1
+                    # Entries already folded into the snapshot are skipped (replay is idempotent anyway)
+                    if entry["version"] <= self.snapshot_version:
+                        continue
+                    self._apply(entry["changes"])
+                    self.version = max(self.version, entry["version"])
+        except FileNotFoundError:
+            pass
+        
+        # Start each session from a clean snapshot
+        if self.journal_entries and not self.read_only:
+            self.compact()
+
+    def _apply(self, changes):
+        for name, data in changes.items():
+            if data is None:
+                self.categories.pop(name, None)
+            else:
+                self.categories[name] = data
+
+    def snapshot(self):
+        """Deep copy of the categories that callers may modify freely"""
+        return json.loads(json.dumps(self.categories))
+
+    def commit(self, changes):
+        """Atomically apply {name: data or None to delete}; returns the new version"""
+        if self.read_only:
+            raise RuntimeError("category store was opened read-only")
+        changes = {name: (json.loads(json.dumps(data)) if data is not None else None)
+                   for name, data in changes.items()
+                   if self.categories.get(name) != data}
+        if not changes:
+            return self.version
+        
+        version = self.version + 1
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps({"version": version, "changes": changes}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        
+        self._apply(changes)
+        self.version = version
+        self.journal_entries += 1
+        self._write_version()
+        
+        if self.journal_entries >= CATEGORY_JOURNAL_LIMIT:
+            self.compact()
+        return version
+
+    def replace_all(self, new_categories):
+        """Commit only the categories that differ from new_categories"""
+        changes = {name: data for name, data in new_categories.items() if self.categories.get(name) != data}
+        for name in self.categories:
+            if name not in new_categories:
+                changes[name] = None
+        return self.commit(changes)
+
+    def compact(self):
+        """Rewrite categories.json from memory and empty the journal"""
+        self._write_snapshot()
+        self.snapshot_version = self.version
+        self._write_version()
+        # The rename must be on disk before the journal it replaces is emptied
+        fsync_path(os.path.dirname(os.path.abspath(self.path)))
+        # Only now is the journal redundant; a crash before this line just replays it again
+        open(self.journal_path, "w").close()
+        self.journal_entries = 0
+
+    def _write_snapshot(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.categories, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def _write_version(self):
+        temp_path = self.version_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"version": self.version, "snapshot_version": self.snapshot_version}, f)
+        os.replace(temp_path, self.version_path)
+
+def _freeze(value):
+    """Read-only deep copy of JSON-style data (dicts become mapping proxies, lists tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value):
+    """Plain (mutable, picklable) copy of data frozen by _freeze"""
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+class CategorySnapshot:
+    """Immutable, versioned copy of the categories with a precompiled keyword matcher
+    
+    Snapshots are never modified after construction. A new one is published by
+    assigning it to an attribute, so a worker that reads the attribute once per file
+    always sees one complete version and never needs a lock.
+    """
+    __slots__ = ("version", "categories", "matchers")
+
+    def __init__(self, categories, version=0):
+        self.version = version
+        self.categories = _freeze(categories)
+        # (category, keyword forms) in category order, categories without keywords left out
+        self.matchers = tuple(
+            (category, tuple(keyword_forms(keyword) for keyword in data.get("keywords", ())))
+            for category, data in self.categories.items()
+            if data.get("keywords")
+        )
+
+    def __reduce__(self):
+        # Mapping proxies cannot be pickled; rebuild from plain data in worker processes
+        return (CategorySnapshot, (_thaw(self.categories), self.version))
+
+    @classmethod
+    def from_store(cls, path=CATEGORIES_FILE):
+        """Snapshot of the categories currently in the store (read-only; does not compact)"""
+        store = CategoryStore(path, read_only=True)
+        return cls(store.categories, store.version)
+
+    def refreshed(self, path=CATEGORIES_FILE):
+        """This snapshot, or a new one if the store has moved to another version"""
+        if CategoryStore.read_version(path) == self.version:
+            return self
+        return CategorySnapshot.from_store(path)
+
+    def match(self, text):
+        """Same result as match_category, using the precompiled keyword forms"""
+        doc = as_document(text)
+        text_lower = doc.lower
+        normalized_text = doc.collapsed_lower
+        
+        best_match = None
+        max_matches = 0
+        for category, forms in self.matchers:
+            matches = 0
+            for keyword_lower, normalized_keyword in forms:
+                if normalized_keyword in normalized_text or keyword_lower in text_lower:
+                    matches += 1
+            if matches > max_matches:
+                max_matches = matches
+                best_match = category
+        return best_match, max_matches
+
+# The last inbox listing, shown immediately at startup while the real scan runs
+LISTING_SNAPSHOT_FILE = "listing_snapshot.json"
+
+def list_inbox_pdfs(folder='.'):
+    """PDF filenames waiting in the inbox folder"""
+    return [file for file in os.listdir(folder) if file.lower().endswith('.pdf')]
+
+def inbox_roots(settings):
+    """Configured inbox roots as [{"path", "name", "workers"}]; just the working directory if none are set
+    
+    Each root is a path (or {"path", "name", "workers"}) in the "inbox_roots" setting; all roots
+    file into the same category folders. "workers" is the root's share of analysis threads.
+    """
+    roots = []
+    for root in settings.get("inbox_roots") or ["."]:
+        if isinstance(root, str):
+            root = {"path": root}
+        path = os.path.normpath(root.get("path", "."))
+        roots.append({
+            "path": path,
+            "name": root.get("name") or ("Inbox" if path == "." else os.path.basename(path)),
+            "workers": root.get("workers")
+        })
+    return roots
+
+def list_inbox_roots(roots, fs=None):
+    """PDFs waiting in every inbox root, as paths relative to the working directory (roots listed in parallel)"""
+    paths = [root["path"] for root in roots]
+    if fs is not None:
+        listings = fs.batch(list_inbox_pdfs, paths)
+    else:
+        listings = {}
+        for path in paths:
+            try:
+                listings[path] = list_inbox_pdfs(path)
+            except OSError as e:
+                listings[path] = e
+    files = []
+    for path in paths:
+        if isinstance(listings[path], OSError):
+            print(f"Error listing inbox '{path}': {str(listings[path])}")
+            continue
+        files.extend(listings[path] if path == "." else (os.path.join(path, name) for name in listings[path]))
+    return files
+
+def load_listing_snapshot(path=LISTING_SNAPSHOT_FILE):
+    """Filenames from the last saved inbox listing (empty if there is none)"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("files", [])
+    except (FileNotFoundError, ValueError):
+        return []
+    except Exception as e:
+        print(f"Error loading listing snapshot: {str(e)}")
+        return []
+
+def save_listing_snapshot(files, path=LISTING_SNAPSHOT_FILE):
+    """Persist the inbox listing for the next startup, replacing the old file atomically"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"saved_at": datetime.now().isoformat(timespec="seconds"), "files": files}, f)
+    os.replace(temp_path, path)
+
+# Instances sharing an inbox claim files by renaming them into their own staging folder under this
+CLAIMS_FOLDER = ".claims"
+LEASE_FILE = ".lease"
+LEASE_HEARTBEAT_SECONDS = 15
+LEASE_TIMEOUT_SECONDS = 120
+
+class InboxClaims:
+    """Claim-by-rename coordination for an inbox shared by several organizer instances
+    
+    Each instance owns <inbox>/.claims/<worker id>/. A rename into it is atomic, so exactly
+    one instance gets each file. A heartbeat keeps the lease file in the staging folder fresh;
+    a staging folder whose lease has gone stale (its instance crashed) is taken over by
+    whichever instance notices and its files are put back in the inbox.
+    """
+    def __init__(self, inbox='.', worker_id=None, timeout=LEASE_TIMEOUT_SECONDS,
+                 heartbeat=LEASE_HEARTBEAT_SECONDS):
+        self.inbox = inbox
+        self.worker_id = worker_id or f"{platform.node()}-{os.getpid()}"
+        self.root = os.path.join(inbox, CLAIMS_FOLDER)
+        self.staging = os.path.join(self.root, self.worker_id)
+        self.lease = os.path.join(self.staging, LEASE_FILE)
+        self.timeout = timeout
+        self.heartbeat = heartbeat
+        self.stop_event = threading.Event()
+        self.lost = False  # Set if another instance took over our staging folder
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Create the staging folder and keep its lease fresh until stop()"""
+        os.makedirs(self.staging, exist_ok=True)
+        self.renew()
+        threading.Thread(target=self.run_heartbeat, daemon=True).start()
+
+    def stop(self):
+        """Stop the heartbeat and give every file still claimed back to the inbox"""
+        self.stop_event.set()
+        self.release_all()
+        try:
+            os.remove(self.lease)
+            os.rmdir(self.staging)
+        except OSError:
+            pass
+
+    def renew(self):
+        """Refresh the lease; its modification time (by the share's clock) is the heartbeat"""
+        with open(self.lease, "w") as f:
+            json.dump({"worker": self.worker_id, "pid": os.getpid(),
+                       "renewed": datetime.now().isoformat(timespec="seconds")}, f)
+
+    def rejoin(self):
+        """Recreate our staging folder and lease after another instance took them over
+        
+        The instance that took over has already returned our claimed files to the inbox.
+        """
+        with self.lock:
+            if not self.lost and os.path.isdir(self.staging):
+                return
+            os.makedirs(self.staging, exist_ok=True)
+            self.renew()
+            self.lost = False
+            print(f"Rejoined the shared inbox as {self.worker_id}")
+
+    def run_heartbeat(self):
+        while not self.stop_event.wait(self.heartbeat):
+            if self.lost:
+                continue  # The next claim rejoins
+            if not os.path.isdir(self.staging):
+                print(f"Inbox lease for {self.worker_id} was taken over by another instance")
+                self.lost = True
+                continue
+            try:
+                self.renew()
+            except OSError as e:
+                print(f"Error renewing inbox lease: {str(e)}")
+
+    def claim(self, filename):
+        """Move an inbox file into our staging folder; its new path, or None if another instance has it"""
+        if self.lost:
+            self.rejoin()
+        source = os.path.join(self.inbox, os.path.basename(filename))
+        staged = os.path.join(self.staging, os.path.basename(filename))
+        try:
+            os.rename(source, staged)
+        except FileNotFoundError:
+            if not os.path.exists(source):
+                return None
+            # The source is still there, so our staging folder is what went missing
+            self.lost = True
+            self.rejoin()
+            try:
+                os.rename(source, staged)
+            except FileNotFoundError:
+                return None
+        return staged
+
+    def release(self, path):
+        """Put a claimed file back in the inbox (under a new name if the old one was reused)"""
+        filename = os.path.basename(path)
+        destination = os.path.join(self.inbox, filename)
+        if os.path.exists(destination):
+            stem, ext = os.path.splitext(filename)
+            destination = os.path.join(self.inbox, f"{stem}_{datetime.now().strftime('%Y%m%d%H%M%S')}{ext}")
+        try:
+            os.rename(path, destination)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release_all(self, folder=None):
+        """Put every file in a staging folder (ours by default) back in the inbox; returns how many"""
+        folder = folder or self.staging
+        released = 0
+        try:
+            with os.scandir(folder) as entries:
+                paths = [entry.path for entry in entries if entry.is_file() and entry.name != LEASE_FILE]
+        except FileNotFoundError:
+            return 0
+        for path in paths:
+            # A file that cannot be moved now (locked on a share) stays for a later pass
+            try:
+                released += self.release(path)
+            except OSError as e:
+                print(f"Error returning {path} to the inbox: {str(e)}")
+        return released
+
+    def reclaim_stale(self):
+        """Return the files of crashed instances to the inbox; returns how many were put back
+        
+        Leases are compared with our own freshly renewed one, so clocks on different hosts
+        never need to agree: only the file server's timestamps are used.
+        """
+        self.renew()
+        now = os.stat(self.lease).st_mtime
+        released = 0
+        with os.scandir(self.root) as entries:
+            others = [entry for entry in entries if entry.is_dir() and entry.path != self.staging]
+        for entry in others:
+            try:
+                lease = os.stat(os.path.join(entry.path, LEASE_FILE)).st_mtime
+            except FileNotFoundError:
+                lease = entry.stat().st_mtime
+            if now - lease < self.timeout:
+                continue
+            # Rename the folder first: of several instances noticing, only one wins the takeover.
+            # The name is unique per folder, so a takeover left half done cannot block the next;
+            # it has no lease any more and is reclaimed again once it has gone stale.
+            takeover = os.path.join(self.root, f"{self.worker_id}.{entry.name}.reclaiming")
+            try:
+                os.rename(entry.path, takeover)
+            except OSError:
+                continue
+            returned = self.release_all(takeover)
+            released += returned
+            print(f"Reclaimed inbox lease of {entry.name} ({returned} files returned to the inbox)")
+            try:
+                os.remove(os.path.join(takeover, LEASE_FILE))
+            except FileNotFoundError:
+                pass
+            try:
+                os.rmdir(takeover)
+            except OSError as e:
+                print(f"Error removing {takeover}: {str(e)}")
+        return released
+
+class StartupProfiler:
+    """Timestamps of startup milestones, measured from process start"""
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self.marks = {}
+
+    def mark(self, label):
+        self.marks.setdefault(label, time.perf_counter() - self.start)
+
+    def report(self):
+        return ", ".join(f"{label} {seconds * 1000:.0f} ms" for label, seconds in self.marks.items())
+
+# SQLite database holding the search index (and other archive metadata)
+DATABASE_FILE = "organizer.db"
+
+def open_database(path=DATABASE_FILE):
+    """Open the organizer database for use from several threads"""
+    connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    # WAL lets searches run while a batch of filed documents is being written
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+class SearchIndex:
+    """Full-text index (SQLite FTS5) over the text of every filed document"""
+    def __init__(self, path=DATABASE_FILE):
+        self.lock = threading.Lock()
+        self.available = False
+        try:
+            self.connection = open_database(path)
+            with self.connection:
+                # Regular table maps paths to FTS rowids so updates never scan the index
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS search_documents (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL)"
+                )
+                self.connection.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS search_text USING fts5("
+                    "category, filename, content, tokenize='unicode61 remove_diacritics 2')"
+                )
+            self.available = True
+        except sqlite3.Error as e:
+            print(f"Full-text search not available: {str(e)}")
+
+    def add_documents(self, documents):
+        """Index (path, category, text) tuples in a single transaction, replacing older entries"""
+        if not self.available or not documents:
+            return
+        with self.lock, self.connection:
+            for path, category, text in documents:
+                path = os.path.normpath(path)
+                self._delete(path)
+                cursor = self.connection.execute("INSERT INTO search_documents (path) VALUES (?)", (path,))
+                self.connection.execute(
+                    "INSERT INTO search_text (rowid, category, filename, content) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, category, os.path.basename(path), text)
+                )
+
+    def add_document(self, path, category, text):
+        """Index a single filed document"""
+        self.add_documents([(path, category, text)])
+
+    def _delete(self, path):
+        """Remove a path from the index (caller holds the lock and transaction)"""
+        row = self.connection.execute("SELECT id FROM search_documents WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.connection.execute("DELETE FROM search_text WHERE rowid = ?", (row[0],))
+            self.connection.execute("DELETE FROM search_documents WHERE id = ?", (row[0],))
+
+    def remove(self, path):
+        """Drop a deleted document from the index"""
+        if not self.available:
+            return
+        with self.lock, self.connection:
+            self._delete(os.path.normpath(path))
+
+    def rename_many(self, renames):
+        """Follow (old_path, new_path) renames in a single transaction without re-indexing any text"""
+        if not self.available or not renames:
+            return
+        with self.lock, self.connection:
+            for old_path, new_path in renames:
+                old_path, new_path = os.path.normpath(old_path), os.path.normpath(new_path)
+                row = self.connection.execute("SELECT id FROM search_documents WHERE path = ?", (old_path,)).fetchone()
+                if not row:
+                    continue
+                self._delete(new_path)
+                self.connection.execute("UPDATE search_documents SET path = ? WHERE id = ?", (new_path, row[0]))
+                self.connection.execute("UPDATE search_text SET filename = ? WHERE rowid = ?",
+                                        (os.path.basename(new_path), row[0]))
+
+    def rename(self, old_path, new_path):
+        """Follow a renamed document without re-indexing its text"""
+        self.rename_many([(old_path, new_path)])
+
+    @staticmethod
+    def build_query(text):
+        """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix"""
+        words = TOKEN_RE.findall(text.lower())
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, text, limit=100):
+        """Return up to limit (path, category, snippet) results, best match first"""
+        query = self.build_query(text)
+        if not self.available or not query:
+            return []
+        with self.lock:
+            return self.connection.execute(
+                "SELECT d.path, t.category, snippet(search_text, 2, '[', ']', '...', 10) "
+                "FROM search_text t JOIN search_documents d ON d.id = t.rowid "
+                "WHERE search_text MATCH ? ORDER BY bm25(search_text, 2.0, 5.0, 1.0) LIMIT ?",
+                (query, limit)
+            ).fetchall()
+
+def _to_signed64(value):
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+class FingerprintIndex:
+    """SimHash fingerprints of filed content, banded so near-duplicates are found without a scan"""
+    def __init__(self, path=DATABASE_FILE):
+        self.lock = threading.Lock()
+        self.available = False
+        try:
+            self.connection = open_database(path)
+            with self.connection:
+                # Keyed by content hash, so renames and moves never touch this table
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS fingerprints (sha256 TEXT PRIMARY KEY, simhash INTEGER NOT NULL, "
+                    + ", ".join(f"band{band} INTEGER NOT NULL" for band in range(SIMHASH_BANDS)) + ")"
+                )
+                for band in range(SIMHASH_BANDS):
+                    self.connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS fingerprints_band{band} ON fingerprints (band{band})"
+                    )
+            self.available = True
+        except sqlite3.Error as e:
+            print(f"Near-duplicate detection not available: {str(e)}")
+
+    def add_many(self, fingerprints):
+        """Store (sha256, fingerprint) pairs in a single transaction"""
+        rows = [(sha256, _to_signed64(fingerprint), *simhash_bands(fingerprint))
+                for sha256, fingerprint in fingerprints if sha256 and fingerprint is not None]
+        if not self.available or not rows:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO fingerprints VALUES ({', '.join('?' * (SIMHASH_BANDS + 2))})", rows
+            )
+
+    def add(self, sha256, fingerprint):
+        """Store the fingerprint of one filed document"""
+        self.add_many([(sha256, fingerprint)])
+
+    def near(self, fingerprint, max_distance=NEAR_DUPLICATE_DISTANCE):
+        """(distance, sha256) of stored content within max_distance bits, closest first"""
+        if not self.available or fingerprint is None:
+            return []
+        # One indexed lookup per band; only the candidates sharing a band are compared
+        where = " OR ".join(f"band{band} = ?" for band in range(SIMHASH_BANDS))
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT sha256, simhash FROM fingerprints WHERE {where}", simhash_bands(fingerprint)
+            ).fetchall()
+        matches = []
+        for sha256, stored in rows:
+            distance = hamming_distance(fingerprint, stored & ((1 << 64) - 1))
+            if distance <= max_distance:
+                matches.append((distance, sha256))
+        return sorted(matches)
+
+    def backfill_from_search_index(self, batch_size=500):
+        """Fingerprint catalogued documents from the text already in the search index; returns the count"""
+        if not self.available:
+            return 0
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT c.sha256, t.content FROM catalog c "
+                "JOIN search_documents d ON d.path = c.path JOIN search_text t ON t.rowid = d.id "
+                "LEFT JOIN fingerprints f ON f.sha256 = c.sha256 "
+                "WHERE c.sha256 IS NOT NULL AND f.sha256 IS NULL"
+            ).fetchall()
+        count = 0
+        for start in range(0, len(rows), batch_size):
+            batch = [(sha256, NormalizedDocument(text).fingerprint) for sha256, text in rows[start:start + batch_size]]
+            self.add_many(batch)
+            count += sum(1 for _, fingerprint in batch if fingerprint is not None)
+        return count
+
+# Content-addressed store for originals, kept inside the sorted folder
+BLOB_FOLDER = ".blobs"
+
+class BlobStore:
+    """Original scans stored once per distinct content, with a manifest of the names they arrived under"""
+    def __init__(self, root, path=DATABASE_FILE):
+        self.root = os.path.join(root, BLOB_FOLDER)
+        self.lock = threading.Lock()
+        self.storing = {}  # sha256 -> Event set once the store of that content has finished
+        self.available = False
+        try:
+            self.connection = open_database(path)
+            with self.connection:
+                # The unique key doubles as the index for lookups by original filename
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS sorted_manifest (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                    "sha256 TEXT NOT NULL, size INTEGER, stored_at TEXT, UNIQUE (name, sha256))"
+                )
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS sorted_manifest_sha256 ON sorted_manifest (sha256)"
+                )
+            self.available = True
+        except sqlite3.Error as e:
+            print(f"Deduplicated sorted archive not available: {str(e)}")
+
+    def blob_path(self, sha256):
+        """Where the blob for a content hash lives (fanned out over 256 subfolders)"""
+        return os.path.join(self.root, sha256[:2], sha256 + ".pdf")
+
+    def store(self, source, name=None, sha256=None, size=None, copy_from=None, durability=NO_DURABILITY):
+        """Move a file into the store; returns (blob path, True if its content was new)
+        
+        A repeated original is removed after its name is recorded, so it costs no extra disk.
+        copy_from and durability are passed on to move_file.
+        """
+        if sha256 is None or size is None:
+            sha256, size = hash_file(source)
+        name = name or os.path.basename(source)
+        blob = self.blob_path(sha256)
+        
+        # Reserve the content under the lock; the move itself (a full copy across devices) runs
+        # outside it, so filing workers archive different originals in parallel
+        while True:
+            with self.lock:
+                pending = self.storing.get(sha256)
+                if pending is None:
+                    is_new = not os.path.exists(blob)
+                    done = self.storing[sha256] = threading.Event()
+                    break
+            # Another worker is storing the same content; look again once it is finished
+            pending.wait()
+        try:
+            if is_new:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                move_file(source, blob, copy_from, durability)
+            else:
+                durability.remove(source)
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT INTO sorted_manifest (name, sha256, size, stored_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (name, sha256) DO UPDATE SET stored_at = excluded.stored_at",
+                    (name, sha256, size, datetime.now().isoformat(timespec="seconds"))
+                )
+        finally:
+            with self.lock:
+                del self.storing[sha256]
+            done.set()
+        return blob, is_new
+
+    def entries(self):
+        """(id, name, sha256) for every manifest entry, sorted by name"""
+        if not self.available:
+            return []
+        with self.lock:
+            return self.connection.execute("SELECT id, name, sha256 FROM sorted_manifest ORDER BY name").fetchall()
+
+    def rename(self, entry_id, new_name):
+        """Record a new original name for a manifest entry (raises sqlite3.IntegrityError if taken)"""
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE sorted_manifest SET name = ? WHERE id = ?", (new_name, entry_id))
+
+    def remove(self, entry_id):
+        """Drop a manifest entry, deleting its blob once nothing refers to it; returns the deleted blob path"""
+        with self.lock:
+            with self.connection:
+                row = self.connection.execute("SELECT sha256 FROM sorted_manifest WHERE id = ?", (entry_id,)).fetchone()
+                if not row:
+                    return None
+                self.connection.execute("DELETE FROM sorted_manifest WHERE id = ?", (entry_id,))
+                remaining = self.connection.execute(
+                    "SELECT COUNT(*) FROM sorted_manifest WHERE sha256 = ?", (row[0],)
+                ).fetchone()[0]
+            # A store of the same content in progress is about to refer to the blob again
+            if remaining or row[0] in self.storing:
+                return None
+            blob = self.blob_path(row[0])
+            try:
+                os.remove(blob)
+            except FileNotFoundError:
+                pass
+            return blob
+
+    def stats(self):
+        """(originals, blobs, bytes of originals, bytes actually stored)"""
+        if not self.available:
+            return 0, 0, 0, 0
+        with self.lock:
+            originals, logical = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sorted_manifest"
+            ).fetchone()
+            blobs, stored = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM "
+                "(SELECT sha256, MAX(size) AS size FROM sorted_manifest GROUP BY sha256)"
+            ).fetchone()
+        return originals, blobs, logical, stored
+
+    def import_folder(self, folder, progress=None):
+        """Move the loose files of a folder into the store; returns [(old path, blob path)]"""
+        moved = []
+        with os.scandir(folder) as entries:
+            files = [entry.path for entry in entries if entry.is_file() and not is_partial_copy(entry.name)]
+        for count, path in enumerate(files, 1):
+            try:
+                blob, _ = self.store(path)
+            except OSError as e:
+                print(f"Error storing {path}: {str(e)}")
+                continue
+            moved.append((path, blob))
+            if progress and count % 100 == 0:
+                progress(count, len(files))
+        return moved
+
+# Filing runs on a thread pool; each filesystem (device) gets its own cap on concurrent operations
+FILING_THREADS = 8
+FILING_THREADS_PER_DEVICE = 4
+
+class FilingAction:
+    """One planned step for an analyzed file: "file" it, recognise it as "known", or "set_aside" for review"""
+    def __init__(self, pdf_file, kind, data, destination=None, category=None, filed_date=None, note=""):
+        self.pdf_file = pdf_file
+        self.kind = kind
+        self.data = data
+        self.destination = destination
+        self.sorted_destination = None
+        self.category = category
+        self.filed_date = filed_date
+        self.note = note
+        self.known_copy = None
+        self.link = False
+        self.duplicate = False
+        self.near = False
+        # Filled in by the worker that carries the action out
+        self.error = None
+        self.fallback_destination = None
+        self.move_error = None
+
+    def describe(self):
+        """One line for the dry-run view"""
+        if self.kind == "known":
+            verb = "link to" if self.link else "archive, already filed as"
+            return f"{self.pdf_file} → {verb} {self.known_copy}{self.note}"
+        if self.kind == "set_aside":
+            return f"{self.pdf_file} → Needs further processing{self.note}"
+        return f"{self.pdf_file} → {self.destination}{self.note}"
+
+class FilingPlan:
+    """Destinations for a batch, with every name reserved up front so execution needs no existence checks"""
+    def __init__(self):
+        self.actions = []
+        self.folders = set()
+        self.names = {}  # folder -> names on disk or already claimed by this plan
+        self.lock = threading.Lock()
+        # Timings of the execution, for the summary
+        self.started = None
+        self.filing_seconds = 0.0
+        self.sync_seconds = 0.0
+
+    def taken(self, folder):
+        """Names in a folder, listed once per plan"""
+        names = self.names.get(folder)
+        if names is None:
+            names = set()
+            try:
+                with os.scandir(folder) as entries:
+                    names.update(entry.name for entry in entries)
+            except OSError:
+                pass  # Created when the plan runs
+            self.names[folder] = names
+        return names
+
+    def prefetch(self, fs, folders):
+        """List folders in parallel ahead of claiming names in them"""
+        with self.lock:
+            folders = [folder for folder in folders if folder not in self.names]
+        listings = fs.list_many(folders)
+        with self.lock:
+            for folder, names in listings.items():
+                self.names.setdefault(folder, names)
+
+    def claim(self, folder, filename, suffix="numbered", force=False):
+        """Reserve a free path for filename in folder and return it
+        
+        Taken names get a " (n)" suffix, or "_<timestamp>" for originals in sorted;
+        force adds the suffix even when the plain name is free.
+        """
+        with self.lock:
+            self.folders.add(folder)
+            names = self.taken(folder)
+            basename, ext = os.path.splitext(filename)
+            if suffix == "timestamp":
+                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+                candidates = itertools.chain(
+                    [f"{basename}_{timestamp}{ext}"],
+                    (f"{basename}_{timestamp}_{counter}{ext}" for counter in itertools.count(1))
+                )
+            else:
+                candidates = (f"{basename} ({counter}){ext}" for counter in itertools.count(1))
+            if force or filename in names:
+                filename = next(name for name in candidates if name not in names)
+            names.add(filename)
+            return os.path.join(folder, filename)
+
+class DeviceLimiter:
+    """Caps concurrent file operations per filesystem so one slow disk does not take every worker"""
+    def __init__(self, limit=FILING_THREADS_PER_DEVICE):
+        self.limit = max(1, limit)
+        self.lock = threading.Lock()
+        self.semaphores = {}
+
+    def device(self, path):
+        """Device id of the nearest existing ancestor of a path"""
+        path = os.path.abspath(path)
+        while True:
+            try:
+                return os.stat(path).st_dev
+            except OSError:
+                parent = os.path.dirname(path)
+                if parent == path:
+                    return None
+                path = parent
+
+    @contextmanager
+    def hold(self, *paths):
+        """Hold a slot on every device the paths live on (acquired in a fixed order, so never deadlocks)"""
+        devices = sorted({self.device(path) for path in paths if path} - {None})
+        with self.lock:
+            semaphores = [self.semaphores.setdefault(device, threading.Semaphore(self.limit))
+                          for device in devices]
+        for semaphore in semaphores:
+            semaphore.acquire()
+        try:
+            yield
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+
+# How long a folder's catalog entries are trusted before the next background rescan
+CATALOG_RECONCILE_INTERVAL = 300
+
+def parse_filename_date(date_str, date_format="ddmmyy"):
+    """Turn a 6-digit filename date back into a datetime (None if it is not a valid date)"""
+    if not re.match(r'^\d{6}$', date_str or ""):
+        return None
+    first, middle, last = int(date_str[0:2]), int(date_str[2:4]), int(date_str[4:6])
+    if date_format == "mmddyy":
+        month, day, year = first, middle, last
+    elif date_format == "yymmdd":
+        year, month, day = first, middle, last
+    else:
+        day, month, year = first, middle, last
+    return _make_date(year + 2000 if year < 50 else year + 1900, month, day)
+
+# Category folder layouts: everything in one folder, or YYYY/MM subfolders by document date
+LAYOUT_FLAT = "flat"
+LAYOUT_YEAR_MONTH = "year_month"
+
+# Subfolder names that belong to the date-sharded layout
+SHARD_YEAR_RE = re.compile(r'^\d{4}$')
+SHARD_MONTH_RE = re.compile(r'^(0[1-9]|1[0-2])$')
+
+def category_layout(data):
+    """Folder layout configured for a category (flat unless it asks for date shards)"""
+    return data.get("layout", LAYOUT_FLAT)
+
+def shard_folder(folder, layout, date):
+    """Folder under a category folder that a document dated `date` is filed into"""
+    if layout == LAYOUT_YEAR_MONTH and date is not None:
+        return os.path.join(folder, f"{date.year:04d}", f"{date.month:02d}")
+    return folder
+
+def is_shard_path(relative_dir):
+    """True for '' (the category folder itself) and for YYYY or YYYY/MM shard folders"""
+    if not relative_dir:
+        return True
+    parts = relative_dir.split(os.sep)
+    if len(parts) > 2 or not SHARD_YEAR_RE.match(parts[0]):
+        return False
+    return len(parts) == 1 or bool(SHARD_MONTH_RE.match(parts[1]))
+
+def scan_category_folder(folder, relative="", depth=0):
+    """Yield (path relative to folder, DirEntry) for every file in a folder and its date shards"""
+    subfolders = []
+    try:
+        with os.scandir(os.path.join(folder, relative) if relative else folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    if not is_partial_copy(entry.name):
+                        yield (os.path.join(relative, entry.name) if relative else entry.name), entry
+                elif depth < 2 and entry.is_dir() and (SHARD_MONTH_RE if depth else SHARD_YEAR_RE).match(entry.name):
+                    subfolders.append(entry.name)
+    except FileNotFoundError:
+        return
+    # Descend after the listing is closed so only one directory handle is open at a time
+    for name in sorted(subfolders):
+        yield from scan_category_folder(folder, os.path.join(relative, name) if relative else name, depth + 1)
+
+# Metadata calls on a network share are latency-bound; this many are kept in flight at once
+FS_THREADS = 16
+
+class AsyncFS:
+    """Filesystem metadata calls on a bounded thread pool, so their round trips overlap
+    
+    Each batch call submits one request per path and waits for them all; on a share where
+    every stat costs a round trip, a batch takes about as long as its slowest request.
+    """
+    def __init__(self, threads=FS_THREADS):
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="fs")
+
+    def submit(self, function, *args):
+        """Run one call on the pool; returns its future"""
+        return self.pool.submit(function, *args)
+
+    def batch(self, function, items):
+        """{item: result} for function applied to every item in parallel; an OSError becomes the result"""
+        items = list(dict.fromkeys(items))
+        futures = [self.pool.submit(function, item) for item in items]
+        results = {}
+        for item, future in zip(items, futures):
+            try:
+                results[item] = future.result()
+            except OSError as e:
+                results[item] = e
+        return results
+
+    def exists_many(self, paths):
+        """{path: True if it exists}"""
+        return self.batch(os.path.exists, paths)
+
+    def stat_many(self, paths):
+        """{path: os.stat_result, or None if it could not be stat'ed}"""
+        return {path: None if isinstance(result, OSError) else result
+                for path, result in self.batch(os.stat, paths).items()}
+
+    def makedirs_many(self, folders):
+        """{folder: None once it exists, or the OSError that prevented creating it}"""
+        return self.batch(lambda folder: os.makedirs(folder, exist_ok=True), folders)
+
+    def list_many(self, folders):
+        """{folder: set of entry names}; missing folders list as empty"""
+        def names(folder):
+            with os.scandir(folder) as entries:
+                return {entry.name for entry in entries}
+        return {folder: set() if isinstance(result, OSError) else result
+                for folder, result in self.batch(names, folders).items()}
+
+    def scan_category_folder(self, folder):
+        """Relative paths of every file in a folder and its date shards, listing each shard level in parallel"""
+        def level(relative, depth):
+            files, shards = [], []
+            with os.scandir(os.path.join(folder, relative) if relative else folder) as entries:
+                for entry in entries:
+                    name = os.path.join(relative, entry.name) if relative else entry.name
+                    if entry.is_file():
+                        if not is_partial_copy(entry.name):
+                            files.append(name)
+                    elif depth < 2 and entry.is_dir() and (SHARD_MONTH_RE if depth else SHARD_YEAR_RE).match(entry.name):
+                        shards.append(name)
+            return files, shards
+        
+        names = []
+        pending = [""]
+        for depth in range(3):
+            if not pending:
+                break
+            listings = self.batch(lambda relative: level(relative, depth), pending)
+            pending = []
+            for relative in sorted(listings):
+                if isinstance(listings[relative], OSError):
+                    continue
+                files, shards = listings[relative]
+                names.extend(files)
+                pending.extend(shards)
+        return names
+
+def numbered_destination(folder, filename):
+    """First free "name (n).pdf" variant of a filename in a folder"""
+    basename, ext = os.path.splitext(filename)
+    counter = 1
+    while os.path.exists(os.path.join(folder, f"{basename} ({counter}){ext}")):
+        counter += 1
+    return os.path.join(folder, f"{basename} ({counter}){ext}")
+
+def migrate_folder_layout(folder, layout, catalog=None, search_index=None, date_format="ddmmyy",
+                          progress=None, batch_size=500):
+    """Move a category folder's files into the given layout; returns (moved, left in place)
+    
+    Dates come from the catalog, falling back to the date at the start of the filename;
+    files without either stay where they are.
+    """
+    dates = catalog.folder_metadata(folder) if catalog is not None else {}
+    moved = skipped = 0
+    renames = []
+    
+    def flush():
+        # Keep the catalog and search index in step, one transaction per batch
+        if catalog is not None:
+            catalog.rename_many(renames)
+        if search_index is not None:
+            search_index.rename_many(renames)
+        renames.clear()
+        if progress:
+            progress(moved)
+    
+    # List everything first so files are never met again in the shards they were just moved to
+    for relative, entry in list(scan_category_folder(folder)):
+        name = os.path.basename(relative)
+        target = folder
+        if layout == LAYOUT_YEAR_MONTH:
+            date = None
+            iso_date = dates.get(relative, (None, None))[1]
+            if iso_date:
+                try:
+                    date = datetime.strptime(iso_date, "%Y-%m-%d")
+                except ValueError:
+                    date = None
+            if date is None:
+                match = re.match(r'^(\d{6})', name)
+                date = parse_filename_date(match.group(1), date_format) if match else None
+            if date is None:
+                skipped += 1
+                continue
+            target = shard_folder(folder, layout, date)
+        
+        if os.path.normpath(os.path.dirname(entry.path)) == os.path.normpath(target):
+            continue
+        try:
+            os.makedirs(target, exist_ok=True)
+            destination = os.path.join(target, name)
+            if os.path.exists(destination):
+                destination = numbered_destination(target, name)
+            os.rename(entry.path, destination)
+        except OSError as e:
+            print(f"Error moving {entry.path}: {str(e)}")
+            skipped += 1
+            continue
+        renames.append((entry.path, destination))
+        moved += 1
+        if len(renames) >= batch_size:
+            flush()
+    flush()
+    
+    # Flattening leaves the shard folders empty; remove them, months before years
+    if layout == LAYOUT_FLAT:
+        for dirpath, _, _ in sorted(os.walk(folder), key=lambda walked: -len(walked[0])):
+            relative_dir = os.path.relpath(dirpath, folder)
+            if relative_dir != "." and is_shard_path(relative_dir):
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass  # Not empty: something else lives there
+    return moved, skipped
+
+class DocumentCatalog:
+    """Catalog of filed documents so folder views never have to list the share"""
+    def __init__(self, path=DATABASE_FILE):
+        self.lock = threading.Lock()
+        self.available = False
+        try:
+            self.connection = open_database(path)
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS catalog ("
+                    "path TEXT PRIMARY KEY, folder TEXT NOT NULL, filename TEXT NOT NULL, "
+                    "category TEXT, date TEXT, size INTEGER, sha256 TEXT, filed_at TEXT)"
+                )
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS catalog_folder ON catalog (folder, filename)"
+                )
+                # Content hashes find byte-identical re-scans anywhere in the archive
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS catalog_sha256 ON catalog (sha256)"
+                )
+            self.available = True
+        except sqlite3.Error as e:
+            print(f"Document catalog not available: {str(e)}")
+
+    @staticmethod
+    def _row(path, category=None, date=None, size=None, sha256=None, filed_at=None):
+        """Build a catalog row; dates are stored as ISO strings"""
+        path = os.path.normpath(path)
+        if isinstance(date, datetime):
+            date = date.date().isoformat()
+        filed_at = filed_at or datetime.now().isoformat(timespec="seconds")
+        return (path, os.path.dirname(path), os.path.basename(path), category, date, size, sha256, filed_at)
+
+    def add_entries(self, entries):
+        """Record (path, category, date, size, sha256) tuples in a single transaction"""
+        if not self.available or not entries:
+            return
+        rows = [self._row(*entry) for entry in entries]
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO catalog VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def add_entry(self, path, category=None, date=None, size=None, sha256=None):
+        """Record a single filed document"""
+        self.add_entries([(path, category, date, size, sha256)])
+
+    def remove(self, path):
+        """Forget a deleted document"""
+        if not self.available:
+            return
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM catalog WHERE path = ?", (os.path.normpath(path),))
+
+    def find_by_hash(self, sha256):
+        """(path, category) of every catalogued document with this content hash"""
+        if not self.available or not sha256:
+            return []
+        with self.lock:
+            return self.connection.execute(
+                "SELECT path, category FROM catalog WHERE sha256 = ?", (sha256,)
+            ).fetchall()
+
+    def unhashed_paths(self):
+        """Paths of catalogued documents whose content hash is not known yet"""
+        if not self.available:
+            return []
+        with self.lock:
+            rows = self.connection.execute("SELECT path FROM catalog WHERE sha256 IS NULL").fetchall()
+        return [row[0] for row in rows]
+
+    def set_hashes(self, hashes):
+        """Store (path, sha256, size) tuples in a single transaction"""
+        if not self.available or not hashes:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE catalog SET sha256 = ?, size = ? WHERE path = ?",
+                [(sha256, size, path) for path, sha256, size in hashes]
+            )
+
+    def rename_many(self, renames):
+        """Follow (old_path, new_path) renames in a single transaction, keeping their metadata"""
+        if not self.available or not renames:
+            return
+        with self.lock, self.connection:
+            for old_path, new_path in renames:
+                old_path, new_path = os.path.normpath(old_path), os.path.normpath(new_path)
+                self.connection.execute("DELETE FROM catalog WHERE path = ?", (new_path,))
+                self.connection.execute(
+                    "UPDATE catalog SET path = ?, folder = ?, filename = ? WHERE path = ?",
+                    (new_path, os.path.dirname(new_path), os.path.basename(new_path), old_path)
+                )
+
+    def rename(self, old_path, new_path):
+        """Follow a renamed document, keeping its metadata"""
+        self.rename_many([(old_path, new_path)])
+
+    def _folder_rows(self, folder, columns):
+        """Yield (path relative to folder, *columns) for a folder and its date shards"""
+        folder = os.path.normpath(folder)
+        prefix = folder + os.sep
+        # A range over the folder index picks up the shard subfolders without a scan
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT folder, filename, {columns} FROM catalog "
+                "WHERE folder = ? OR (folder > ? AND folder < ?)",
+                (folder, prefix, folder + chr(ord(os.sep) + 1))
+            ).fetchall()
+        for row_folder, filename, *values in rows:
+            relative_dir = row_folder[len(prefix):] if row_folder != folder else ""
+            if is_shard_path(relative_dir):
+                yield (os.path.join(relative_dir, filename) if relative_dir else filename), *values
+
+    def list_folder(self, folder):
+        """Files catalogued in a folder and its date shards, as sorted paths relative to the folder"""
+        if not self.available:
+            return []
+        return sorted(row[0] for row in self._folder_rows(folder, "size"))
+
+    def folder_metadata(self, folder):
+        """Map each catalogued file (relative path) in a folder to its (category, date) for filtering"""
+        if not self.available:
+            return {}
+        return {name: (category, date) for name, category, date in self._folder_rows(folder, "category, date")}
+
+    def reconcile(self, folder, category=None, fs=None):
+        """Rescan a folder and fix up the catalog; returns (added, removed) counts
+        
+        With an AsyncFS the shard listings and stats of new files are done in parallel.
+        """
+        if not self.available:
+            return 0, 0
+        folder = os.path.normpath(folder)
+        
+        # Snapshot before listing: anything filed while we scan is not ours to delete
+        catalogued = set(self.list_folder(folder))
+        
+        # One listing per directory (plus date shards); d_type from scandir avoids a stat per entry
+        if fs is not None:
+            names = set(fs.scan_category_folder(folder))
+        else:
+            names = {name for name, _ in scan_category_folder(folder)}
+        
+        # Only files that appeared behind our back need a stat
+        new_names = sorted(names - catalogued)
+        if fs is not None:
+            stats = fs.stat_many(os.path.join(folder, name) for name in new_names)
+        else:
+            stats = {}
+            for name in new_names:
+                try:
+                    stats[os.path.join(folder, name)] = os.stat(os.path.join(folder, name))
+                except OSError:
+                    pass
+        added = []
+        for name in new_names:
+            stat = stats.get(os.path.join(folder, name))
+            if stat is None:
+                continue
+            filed_at = datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds")
+            added.append(self._row(os.path.join(folder, name), category, size=stat.st_size, filed_at=filed_at))
+        removed = [(os.path.join(folder, name),) for name in catalogued - names]
+        
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO catalog VALUES (?, ?, ?, ?, ?, ?, ?, ?)", added)
+            self.connection.executemany("DELETE FROM catalog WHERE path = ?", removed)
+        return len(added), len(removed)
+
+# Filter terms split on punctuation and underscores so "20231231_INV.pdf" matches "inv"
+FILTER_TOKEN_RE = re.compile(r'[^\W_]+')
+
+class ListingIndex:
+    """Incremental prefix index over the listed filenames (plus catalog metadata) for filter-as-you-type"""
+    # Prefixes up to this length match thousands of terms; their unions are cached and kept current
+    CACHED_PREFIX_LENGTH = 2
+
+    def __init__(self):
+        self.terms = []         # Sorted distinct terms, searched with bisect
+        self.postings = {}      # term -> set of names containing it
+        self.name_terms = {}    # name -> its terms, so removal never scans
+        self.metadata = {}      # name -> extra searchable values (category, date)
+        self.prefix_cache = {}  # short prefix -> names with a term starting with it
+
+    @staticmethod
+    def terms_for(name, metadata=()):
+        text = " ".join([name] + [value for value in metadata if value]).lower()
+        return set(FILTER_TOKEN_RE.findall(text))
+
+    def rebuild(self, names, metadata=None):
+        """Index a whole listing at once (sorting the term list a single time)"""
+        metadata = metadata or {}
+        self.postings = {}
+        self.name_terms = {}
+        self.metadata = {}
+        self.prefix_cache = {}
+        for name in names:
+            values = metadata.get(name, ())
+            terms = self.terms_for(name, values)
+            self.name_terms[name] = terms
+            if values:
+                self.metadata[name] = values
+            for term in terms:
+                self.postings.setdefault(term, set()).add(name)
+        self.terms = sorted(self.postings)
+        # Warm every cached prefix length; filling one lazily would cost its first keystroke ~10 ms
+        for term in self.terms:
+            for length in range(1, min(len(term), self.CACHED_PREFIX_LENGTH) + 1):
+                self.prefix_cache.setdefault(term[:length], set()).update(self.postings[term])
+
+    def add(self, name, metadata=()):
+        self.remove(name)
+        terms = self.terms_for(name, metadata)
+        self.name_terms[name] = terms
+        if metadata:
+            self.metadata[name] = metadata
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = set()
+                bisect.insort(self.terms, term)
+            postings.add(name)
+        for prefix in self._short_prefixes(terms):
+            if prefix in self.prefix_cache:
+                self.prefix_cache[prefix].add(name)
+
+    def remove(self, name):
+        terms = self.name_terms.pop(name, None)
+        self.metadata.pop(name, None)
+        for term in terms or ():
+            postings = self.postings[term]
+            postings.discard(name)
+            if not postings:
+                del self.postings[term]
+                del self.terms[bisect.bisect_left(self.terms, term)]
+        for prefix in self._short_prefixes(terms or ()):
+            if prefix in self.prefix_cache:
+                self.prefix_cache[prefix].discard(name)
+
+    def _short_prefixes(self, terms):
+        return {term[:length] for term in terms for length in range(1, self.CACHED_PREFIX_LENGTH + 1)}
+
+    def _prefix_postings(self, word):
+        """Posting sets of every term starting with word"""
+        start = bisect.bisect_left(self.terms, word)
+        end = bisect.bisect_left(self.terms, word + "\uffff", start)
+        return [self.postings[term] for term in self.terms[start:end]]
+
+    def rename(self, old_name, new_name):
+        """Re-key an entry, keeping its metadata"""
+        metadata = self.metadata.get(old_name, ())
+        self.remove(old_name)
+        self.add(new_name, metadata)
+
+    def query(self, text):
+        """Names where every word of text prefixes some term, or None when text has no words
+
+        The returned set may be shared with the index; callers must not modify it.
+        """
+        words = FILTER_TOKEN_RE.findall(text.lower())
+        if not words:
+            return None
+        result = None
+        # Longest words first: they select the fewest terms, so the intersection shrinks fastest
+        for word in sorted(set(words), key=len, reverse=True):
+            if len(word) <= self.CACHED_PREFIX_LENGTH:
+                matches = self.prefix_cache.get(word)
+                if matches is None:
+                    matches = self.prefix_cache[word] = set().union(*self._prefix_postings(word))
+            else:
+                matches = set().union(*self._prefix_postings(word))
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        return result
+
+def detect_category_with_source(text, snapshot, learned_model=None):
+    """(category, confidence, source) for a document
+    
+    Keyword matches come first; when no keyword matches, what was learned from earlier
+    manual decisions is used and counted as a confident match.
+    """
+    category, confidence = snapshot.match(text)
+    if confidence >= 1 or learned_model is None:
+        return category, confidence, "keywords"
+    learned_category, _ = learned_model.predict(text, snapshot.categories)
+    if learned_category:
+        return learned_category, 1, "learned"
+    return category, confidence, "keywords"
+
+def analyze_text(pdf_file, pdf_text, snapshot, learned_model=None, dayfirst=True):
+    """Date and category detection for a PDF's extracted text
+    
+    The part of analysis shared by the app's workers and the service mode; the date falls
+    back to one in the filename.
+    """
+    document = NormalizedDocument(pdf_text)
+    detected_date, date_confidence, date_candidates = extract_date_with_confidence(document, dayfirst)
+    if not detected_date:
+        detected_date = date_from_filename(os.path.basename(pdf_file))
+        date_confidence = FILENAME_DATE_CONFIDENCE if detected_date else 0.0
+    category, confidence, category_source = detect_category_with_source(document, snapshot, learned_model)
+    return {
+        "text": pdf_text,
+        "date": detected_date,
+        "date_confidence": date_confidence,
+        "date_candidates": unique_candidate_dates(date_candidates),
+        "category": category,
+        "confidence": confidence,
+        "category_source": category_source,
+        "category_version": snapshot.version,
+        "document": document,
+        "fingerprint": document.fingerprint
+    }
+
+def apply_classifier(classifier, analysis_results, categories):
+    """Classify analyzed documents in one batch and fill in categories keywords missed
+    
+    Returns True if the classifier ran.
+    """
+    if classifier is None:
+        return False
+    keys = [key for key, data in analysis_results.items() if "text" in data]
+    if not keys:
+        return False
+    documents = [analysis_results[key].get("document") or analysis_results[key]["text"] for key in keys]
+    predictions = classifier.predict_batch(documents)
+    
+    for key, (category, probability) in zip(keys, predictions):
+        data = analysis_results[key]
+        # Ignore categories that have been removed since the model was trained
+        if category not in categories:
+            continue
+        data["classifier_category"] = category
+        data["classifier_confidence"] = probability
+        
+        # Keyword matches win; the classifier only fills in when no keyword matched
+        if data.get("confidence", 0) < 1:
+            data["category"] = category
+            data["category_source"] = "classifier"
+    return True
+
+def needs_review(result, classifier_threshold=CLASSIFIER_THRESHOLD, date_threshold=DATE_CONFIDENCE_THRESHOLD):
+    """Whether a category and date detected for a document are too uncertain to file automatically"""
+    if not result.get("date") or not result.get("category"):
+        return True
+    
+    # The category needs either a keyword match or a confident classifier prediction
+    if result.get("confidence", 0) < 1:
+        if result.get("category_source") != "classifier":
+            return True
+        if result.get("classifier_confidence", 0.0) < classifier_threshold:
+            return True
+    
+    # Doubtful dates (ambiguous formats, bare years, dates far from any label) go to review
+    return result.get("date_confidence", 1.0) < date_threshold
+
+# How often a pipeline checks the category store, learned model and classifier for changes
+PIPELINE_REFRESH_SECONDS = 1.0
+
+class ClassificationPipeline:
+    """Extraction, date and category detection for PDFs, without the Tk app
+    
+    Keeps the categories, learned model and classifier loaded, and picks up changes the
+    app writes to them at most once every PIPELINE_REFRESH_SECONDS.
+    """
+    def __init__(self, settings=None):
+        settings = settings or {}
+        self.dayfirst = settings.get("date_format", "ddmmyy") != "mmddyy"
+        self.classifier_threshold = settings.get("classifier_threshold", CLASSIFIER_THRESHOLD)
+        self.date_threshold = settings.get("date_confidence_threshold", DATE_CONFIDENCE_THRESHOLD)
+        self.lock = threading.Lock()
+        self.snapshot = CategorySnapshot.from_store()
+        self.learned_model = None
+        self.classifier = None
+        self.mtimes = {}
+        self.refreshed_at = None
+        self.refresh()
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def refresh(self, force=False):
+        """Reload whatever changed on disk since the last check"""
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.refreshed_at is not None and now - self.refreshed_at < PIPELINE_REFRESH_SECONDS:
+                return
+            self.refreshed_at = now
+            self.snapshot = self.snapshot.refreshed()
+            
+            mtime = self._mtime(LEARNED_MODEL_FILE)
+            if self.learned_model is None or mtime != self.mtimes.get(LEARNED_MODEL_FILE):
+                self.learned_model = ManualDecisionModel.load()
+                self.mtimes[LEARNED_MODEL_FILE] = mtime
+            
+            mtime = self._mtime(CLASSIFIER_MODEL_FILE)
+            if mtime != self.mtimes.get(CLASSIFIER_MODEL_FILE):
+                self.classifier = None
+                if NUMPY_AVAILABLE and mtime is not None:
+                    try:
+                        self.classifier = CategoryClassifier.load(CLASSIFIER_MODEL_FILE)
+                    except Exception as e:
+                        print(f"Error loading category classifier: {str(e)}")
+                self.mtimes[CLASSIFIER_MODEL_FILE] = mtime
+
+    @property
+    def version(self):
+        """Changes whenever a result could change: categories, learned model or classifier"""
+        return (self.snapshot.version, self.mtimes.get(LEARNED_MODEL_FILE), self.mtimes.get(CLASSIFIER_MODEL_FILE))
+
+    def analyze(self, ingested, name=None, max_pages=3):
+        """Extract and analyze one PDF read into an IngestedPDF (before classification)"""
+        name = name or ingested.path
+        start = time.perf_counter()
+        text = extract_pdf_text(name, max_pages, ingested)
+        result = analyze_text(name, text, self.snapshot, self.learned_model, self.dayfirst)
+        result.update({"name": name, "sha256": ingested.sha256, "file_size": ingested.size,
+                       "parse_seconds": time.perf_counter() - start})
+        return result
+
+    def classify(self, results):
+        """Run the classifier over a batch of analyzed results and decide which need review"""
+        apply_classifier(self.classifier, dict(enumerate(results)), self.snapshot.categories)
+        for result in results:
+            result["needs_review"] = needs_review(result, self.classifier_threshold, self.date_threshold)
+        return results
+
+    @staticmethod
+    def to_json(result):
+        """The JSON-serializable part of a result"""
+        date = result.get("date")
+        return {
+            "name": result.get("name"),
+            "sha256": result.get("sha256"),
+            "file_size": result.get("file_size"),
+            "date": date.strftime("%Y-%m-%d") if date else None,
+            "date_confidence": result.get("date_confidence"),
+            "date_candidates": [candidate.strftime("%Y-%m-%d") for candidate in result.get("date_candidates", ())],
+            "category": result.get("category"),
+            "confidence": result.get("confidence"),
+            "category_source": result.get("category_source"),
+            "classifier_category": result.get("classifier_category"),
+            "classifier_confidence": result.get("classifier_confidence"),
+            "category_version": result.get("category_version"),
+            "needs_review": result.get("needs_review"),
+            "parse_seconds": result.get("parse_seconds")
+        }
+
+# Service mode: a local HTTP endpoint in front of a pool of warm parser processes
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_BATCH_SIZE = 32
+SERVICE_BATCH_WAIT = 0.005  # Seconds to wait for more requests to join a batch
+SERVICE_CACHE_SIZE = 1024
+SERVICE_MAX_BODY = 64 * 1024 * 1024
+
+# The pipeline of each parser process, built once by the pool initializer
+_service_pipeline = None
+
+def _service_worker_init(settings):
+    """Pool initializer: load categories and models once per parser process"""
+    global _service_pipeline
+    _service_pipeline = ClassificationPipeline(settings)
+
+def _service_warm(_index):
+    """No-op job that makes the pool start its processes before the first request"""
+    return os.getpid()
+
+def _service_analyze(name, data=None, path=None):
+    """Parser process: read (or take) one PDF and analyze it"""
+    _service_pipeline.refresh()
+    ingested = ingest_pdf(path) if data is None else IngestedPDF(name, data, len(data))
+    result = _service_pipeline.analyze(ingested, name)
+    # Lets the service tell results of an outdated worker pipeline from current ones
+    result["pipeline_version"] = _service_pipeline.version
+    # The normalized document is rebuilt cheaply if needed; do not ship it between processes
+    del result["document"]
+    return result
+
+class ClassificationService:
+    """Batches concurrent classification requests onto a process pool, with an LRU result cache
+    
+    Requests arriving within SERVICE_BATCH_WAIT of each other form one batch: identical
+    documents in it are parsed once, and the classifier runs once over the whole batch.
+    """
+    def __init__(self, settings=None, workers=None, cache_size=SERVICE_CACHE_SIZE):
+        self.pipeline = ClassificationPipeline(settings)
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_service_worker_init, initargs=(settings,)
+        )
+        self.requests = queue.Queue()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        threading.Thread(target=self.run_batches, daemon=True).start()
+
+    def warm(self):
+        """Start every parser process now rather than on the first requests"""
+        list(self.pool.map(_service_warm, range(self.workers)))
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+    def submit(self, name, data=None, path=None):
+        """Queue a PDF (bytes, or a local path) for classification; returns a future of its JSON result"""
+        if data is not None:
+            key = ("sha256", hashlib.sha256(data).hexdigest())
+        else:
+            stat = os.stat(path)
+            key = ("path", os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        self.pipeline.refresh()
+        key += (self.pipeline.version,)
+        
+        future = concurrent.futures.Future()
+        with self.lock:
+            self.stats["requests"] += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+        if cached is not None:
+            future.set_result(dict(cached, name=name))
+        else:
+            self.requests.put((key, name, data, path, future))
+        return future
+
+    def run_batches(self):
+        """Collect queued requests into batches and hand them to the pool"""
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + SERVICE_BATCH_WAIT
+            while len(batch) < SERVICE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Identical documents in a batch are parsed once
+            jobs = {}
+            for key, name, data, path, future in batch:
+                if key not in jobs:
+                    jobs[key] = (self.pool.submit(_service_analyze, name, data, path), [])
+                jobs[key][1].append((name, future))
+            with self.lock:
+                self.stats["batches"] += 1
+                self.stats["parsed"] += len(jobs)
+            # Finish on another thread so the next batch can be submitted meanwhile
+            threading.Thread(target=self.finish_batch, args=(jobs,), daemon=True).start()
+
+    def finish_batch(self, jobs):
+        """Wait for a batch's parses, classify them together, then answer and cache"""
+        results = {}
+        for key, (job, waiters) in jobs.items():
+            try:
+                results[key] = job.result()
+            except Exception as e:
+                for _, future in waiters:
+                    future.set_exception(e)
+        try:
+            self.pipeline.classify(list(results.values()))
+            
+            for key, result in results.items():
+                answer = ClassificationPipeline.to_json(result)
+                # A worker that had not yet picked up a change answers with its old pipeline;
+                # that answer is still returned, but not cached under the newer version
+                if result.get("pipeline_version") == key[-1]:
+                    with self.lock:
+                        self.cache[key] = answer
+                        while len(self.cache) > self.cache_size:
+                            self.cache.popitem(last=False)
+                for name, future in jobs[key][1]:
+                    future.set_result(dict(answer, name=name))
+        except Exception as e:
+            # Never leave a request waiting forever
+            print(f"Error finishing classification batch: {str(e)}")
+            for key in results:
+                for _, future in jobs[key][1]:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def health(self):
+        """Service state for GET /health"""
+        with self.lock:
+            stats = dict(self.stats)
+            cached = len(self.cache)
+        return {"status": "ok", "workers": self.workers, "category_version": self.pipeline.snapshot.version,
+                "classifier": self.pipeline.classifier is not None, "cached_results": cached, **stats}
+
+class ClassificationRequestHandler(BaseHTTPRequestHandler):
+    """POST /classify with a PDF body (?name=scan.pdf), or JSON {"paths": [...]} for local files"""
+    server_version = "PDFOrganizer"
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self.send_json(404, {"error": "not found"})
+            return
+        self.send_json(200, self.server.service.health())
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/classify":
+            self.send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > SERVICE_MAX_BODY:
+            self.send_json(413, {"error": f"request larger than {SERVICE_MAX_BODY} bytes"})
+            return
+        body = self.rfile.read(length)
+        service = self.server.service
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                # Submit every path before waiting, so they are batched together
+                paths = json.loads(body or b"{}").get("paths", [])
+                futures = []
+                for path in paths:
+                    try:
+                        futures.append(service.submit(path, path=path))
+                    except OSError as e:
+                        futures.append(e)
+                results = []
+                for path, future in zip(paths, futures):
+                    try:
+                        if isinstance(future, Exception):
+                            raise future
+                        results.append(future.result())
+                    except Exception as e:
+                        # One unreadable file does not fail the others
+                        results.append({"name": path, "error": str(e)})
+                self.send_json(200, {"results": results})
+            else:
+                name = parse_qs(url.query).get("name", ["document.pdf"])[0]
+                self.send_json(200, service.submit(name, data=body).result())
+        except (OSError, ValueError) as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # One line per request is too much at high request rates; errors still reach stderr
+        pass
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, workers=None, settings_path="pdf_organizer_settings.json"):
+    """Run the classification service until interrupted"""
+    settings = {}
+    if os.path.exists(settings_path):
+        with open(settings_path, "r") as f:
+            settings = json.load(f)
+    service = ClassificationService(settings, workers)
+    service.warm()
+    server = ThreadingHTTPServer((host, port), ClassificationRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"Classifying PDFs on http://{host}:{server.server_port}/classify with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
 class CategoryEditor(tk.Toplevel):
+    # Wait this long after the last keystroke before filtering the category list
+    FILTER_DELAY_MS = 150
+    # Height of a keyword row, used to size the row pool before the first row is measured
+    KEYWORD_ROW_HEIGHT = 30
+
     def __init__(self, parent, categories, callback):
         super().__init__(parent)
         self.title("Category Editor")
@@ -47,11 +3043,23 @@ class CategoryEditor(tk.Toplevel):
         # Set initial variables
         self.current_category = None
         self.previous_selection = None  # Track previous selection to detect changes
-        self.keyword_entries = []
         self.has_unsaved_changes = False
         self.currently_editing = False  # Flag to track if we're in edit mode
         self.ignore_selection_change = False  # Flag to ignore temporary selection changes
         
+        # Category filtering: a prefix index over names, folders and abbreviations
+        self.category_index = ListingIndex()
+        self.sorted_categories = []
+        self.visible_categories = []
+        self.category_positions = {}  # name -> row in the listbox
+        self.filter_job = None
+        
+        # Keyword list: only a pool of rows big enough for the viewport is ever built
+        self.keyword_values = []  # Working copy of the current category's keywords
+        self.keyword_rows = []
+        self.keyword_offset = 0
+        self.updating_keyword_rows = False
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -151,6 +3159,12 @@ class CategoryEditor(tk.Toplevel):
                                           command=self.auto_capitalize_folder)
         self.capitalize_button.pack(side=tk.LEFT, padx=(3, 0))
         
+        # Very large categories can be split into YYYY/MM subfolders by document date
+        self.shard_var = tk.BooleanVar()
+        self.shard_check = ttk.Checkbutton(self.folder_frame, text="By year/month", variable=self.shard_var)
+        self.shard_check.pack(side=tk.LEFT, padx=(6, 0))
+        self.shard_var.trace_add("write", self.on_field_change)
+        
         # Abbreviation
         ttk.Label(self.right_panel, text="Abbreviation:").grid(row=2, column=0, padx=5, pady=8, sticky=tk.W)
         
@@ -176,27 +3190,25 @@ class CategoryEditor(tk.Toplevel):
         self.keywords_container.grid(row=3, column=1, padx=5, pady=(8, 0), sticky="nsew")
         self.keywords_container.columnconfigure(0, weight=1)
         
-        # Scrollable frame for keywords
-        self.canvas = tk.Canvas(self.keywords_container, borderwidth=0, highlightthickness=0)
-        self.scrollbar = ttk.Scrollbar(self.keywords_container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
+        # Virtualized keyword list: a fixed pool of rows is rebound as the list scrolls
+        self.keyword_rows_frame = ttk.Frame(self.keywords_container)
+        self.keyword_scrollbar = ttk.Scrollbar(self.keywords_container, orient="vertical",
+                                               command=self.scroll_keywords)
         
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw", tags="self.scrollable_frame")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        # Allow the keyword area to expand
+        self.keyword_rows_frame.pack(side="left", fill="both", expand=True)
+        self.keyword_scrollbar.pack(side="right", fill="y")
+        # The pool is sized from the frame, so the rows must not resize the frame
+        self.keyword_rows_frame.pack_propagate(False)
         
-        # Allow the scrollable area to expand
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        # Grow or shrink the row pool with the window
+        self.keyword_rows_frame.bind("<Configure>", self.resize_keyword_pool)
         
         # Enable mousewheel scrolling
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.keyword_rows_frame.bind_all("<MouseWheel>", self._on_mousewheel)
         
-        # Bind click event to canvas to maintain selection
-        self.canvas.bind("<Button-1>", self.on_canvas_click)
+        # Bind click event to the keyword area to maintain selection
+        self.keyword_rows_frame.bind("<Button-1>", self.on_canvas_click)
         
         # Add keyword button
         self.add_keyword_frame = ttk.Frame(self.right_panel)
@@ -207,6 +3219,12 @@ class CategoryEditor(tk.Toplevel):
         self.new_keyword_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 3))
         self.new_keyword_entry.bind("<Return>", lambda e: self.add_keyword())
         self.new_keyword_entry.bind("<FocusIn>", self.on_field_focus)
+        # Pasting several lines adds them all as keywords
+        self.new_keyword_entry.bind("<<Paste>>", self.on_keyword_paste)
+        
+        self.import_keywords_button = ttk.Button(self.add_keyword_frame, text="Import...", 
+                                               command=self.import_keywords)
+        self.import_keywords_button.pack(side=tk.RIGHT, padx=(3, 0))
         
         self.add_keyword_button = ttk.Button(self.add_keyword_frame, text="Add Keyword", 
                                            command=self.add_keyword)
@@ -236,16 +3254,9 @@ class CategoryEditor(tk.Toplevel):
                                      command=self.save_changes)
         self.save_button.pack(side=tk.RIGHT, padx=5)
         
-        # Populate the list and set initial state
+        # Populate the list and set initial state (selects the first category if there is one)
         self.populate_categories()
         
-        # Set initial selection if categories exist
-        if self.category_listbox.size() > 0:
-            self.category_listbox.selection_set(0)  # Select first item
-            self.category_listbox.event_generate('<<ListboxSelect>>')  # Trigger selection event
-        else:
-            self.update_ui_state()  # Update UI state for empty list
-        
         # Make dialog modal
         self.transient(self.parent)
         self.grab_set()
@@ -263,11 +3274,9 @@ class CategoryEditor(tk.Toplevel):
         """Ensure the current category selection is maintained"""
         if self.current_category and not self.category_listbox.curselection():
             # Find the item in the listbox
-            for i in range(self.category_listbox.size()):
-                if self.category_listbox.get(i) == self.current_category:
-                    self.category_listbox.selection_set(i)
-                    self.ignore_selection_change = True
-                    break
+            if self.current_category in self.category_positions:
+                self.category_listbox.selection_set(self.category_positions[self.current_category])
+                self.ignore_selection_change = True
         # Allow the event to propagate
         return
     
@@ -281,46 +3290,76 @@ class CategoryEditor(tk.Toplevel):
     
     def _on_mousewheel(self, event):
         """Handle mousewheel scrolling in the keywords area"""
-        self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+        self.scroll_keywords("scroll", int(-1*(event.delta/120)), "units")
     
     def on_field_change(self, *args):
         """Track changes to form fields"""
         self.has_unsaved_changes = True
     
     def filter_categories(self, *args):
-        """Filter the categories list based on the search text"""
-        search_text = self.search_var.get().lower()
-        
-        self.category_listbox.delete(0, tk.END)
+        """Filter the categories list once typing pauses"""
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(self.FILTER_DELAY_MS, self.apply_category_filter)
+    
+    def apply_category_filter(self):
+        """Show the categories matching the search text, touching the listbox only if that changed"""
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+            self.filter_job = None
+        
+        matches = self.category_index.query(self.search_var.get())
+        if matches is None:
+            visible = self.sorted_categories
+        else:
+            visible = [category for category in self.sorted_categories if category in matches]
         
-        for category in sorted(self.categories.keys()):
-            if search_text in category.lower():
-                self.category_listbox.insert(tk.END, category)
+        if visible != self.visible_categories:
+            self.visible_categories = list(visible)
+            self.category_positions = {category: i for i, category in enumerate(self.visible_categories)}
+            self.category_listbox.delete(0, tk.END)
+            if self.visible_categories:
+                # One insert call for the whole list instead of one per category
+                self.category_listbox.insert(tk.END, *self.visible_categories)
         
         # Handle selection after filtering
-        if self.category_listbox.size() > 0:
-            # Try to select previously selected category if it's still in the filtered list
-            found = False
-            if self.current_category:
-                for i in range(self.category_listbox.size()):
-                    if self.category_listbox.get(i) == self.current_category:
-                        self.category_listbox.selection_set(i)
-                        self.category_listbox.see(i)
-                        found = True
-                        break
-                        
-            # If previous selection not found, select first item
-            if not found:
-                self.category_listbox.selection_set(0)
-                self.current_category = self.category_listbox.get(0)
+        if self.visible_categories:
+            # Keep the previously selected category if it's still in the filtered list
+            if self.select_category_in_list(self.current_category):
+                return
                 
-            # Update UI with selected category
+            # If previous selection not found, select first item and show its details
+            self.category_listbox.selection_set(0)
             self.on_category_select(None)
         else:
             # No categories match filter
             self.current_category = None
             self.update_ui_state()
     
+    def select_category_in_list(self, category):
+        """Select and reveal a category in the listbox; False if it is filtered out"""
+        position = self.category_positions.get(category)
+        if position is None:
+            return False
+        self.category_listbox.selection_clear(0, tk.END)
+        self.category_listbox.selection_set(position)
+        self.category_listbox.see(position)
+        return True
+    
+    def index_category(self, category):
+        """Add or refresh a category in the filter index"""
+        data = self.categories[category]
+        if category not in self.category_index.name_terms:
+            bisect.insort(self.sorted_categories, category)
+        self.category_index.add(category, (data.get("folder", ""), data.get("abbreviation", "")))
+    
+    def unindex_category(self, category):
+        """Drop a category from the filter index"""
+        index = bisect.bisect_left(self.sorted_categories, category)
+        if index < len(self.sorted_categories) and self.sorted_categories[index] == category:
+            del self.sorted_categories[index]
+        self.category_index.remove(category)
+    
     def on_category_select(self, event):
         """Handle category selection"""
         # If there's no selection or we should ignore the change, do nothing
@@ -349,9 +3388,13 @@ class CategoryEditor(tk.Toplevel):
         # Update current category
         self.current_category = selected_category
         
+        # Start the new category's keywords at the top
+        self.keyword_offset = 0
+        
         # Update details fields
         self.name_var.set(selected_category)
         self.folder_var.set(self.categories[selected_category].get("folder", selected_category.capitalize()))
+        self.shard_var.set(category_layout(self.categories[selected_category]) == LAYOUT_YEAR_MONTH)
         self.abbr_var.set(self.categories[selected_category].get("abbreviation", selected_category.upper()[:4]))
         
         # Update keywords
@@ -364,54 +3407,94 @@ class CategoryEditor(tk.Toplevel):
         self.update_ui_state()
     
     def refresh_keywords(self):
-        """Refresh the keywords display"""
-        # Save scroll position
-        current_scroll = self.canvas.yview()
+        """Reload the keywords of the current category into the list"""
+        if self.current_category:
+            self.keyword_values = list(self.categories[self.current_category].get("keywords", []))
+        else:
+            self.keyword_values = []
+        self.render_keyword_rows()
+    
+    def make_keyword_row(self, slot):
+        """Build one reusable row of the keyword pool"""
+        keyword_frame = ttk.Frame(self.keyword_rows_frame)
+        
+        # Keyword index label
+        index_label = ttk.Label(keyword_frame, width=4)
+        index_label.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # Keyword entry
+        keyword_var = tk.StringVar()
+        keyword_entry = ttk.Entry(keyword_frame, textvariable=keyword_var)
+        keyword_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        keyword_var.trace_add("write", lambda *args: self.on_keyword_edit(slot))
+        keyword_entry.bind("<FocusIn>", self.on_field_focus)
+        
+        # Delete button removes whichever keyword the row currently shows
+        delete_button = ttk.Button(keyword_frame, text="×", width=3,
+                                 command=lambda: self.remove_keyword(self.keyword_offset + slot))
+        delete_button.pack(side=tk.RIGHT)
+        
+        return keyword_frame, index_label, keyword_var
+    
+    def resize_keyword_pool(self, event=None):
+        """Keep just enough rows to fill the visible keyword area"""
+        height = self.keyword_rows_frame.winfo_height()
+        if self.keyword_rows:
+            row_height = max(1, self.keyword_rows[0][0].winfo_reqheight() + 4)
+        else:
+            row_height = self.KEYWORD_ROW_HEIGHT
+        needed = max(1, height // row_height)
         
-        # Clear existing keywords UI
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        while len(self.keyword_rows) < needed:
+            self.keyword_rows.append(self.make_keyword_row(len(self.keyword_rows)))
+        while len(self.keyword_rows) > needed:
+            self.keyword_rows.pop()[0].destroy()
         
-        self.keyword_entries = []
+        self.render_keyword_rows()
+    
+    def render_keyword_rows(self):
+        """Bind the row pool to the keywords at the current scroll offset"""
+        visible = len(self.keyword_rows)
+        total = len(self.keyword_values)
+        self.keyword_offset = max(0, min(self.keyword_offset, total - visible))
+        
+        # Setting the row variables must not count as user edits
+        self.updating_keyword_rows = True
+        try:
+            for slot, (keyword_frame, index_label, keyword_var) in enumerate(self.keyword_rows):
+                index = self.keyword_offset + slot
+                if index < total:
+                    index_label.config(text=f"{index + 1}.")
+                    keyword_var.set(self.keyword_values[index])
+                    keyword_frame.pack(fill=tk.X, pady=2)
+                else:
+                    keyword_frame.pack_forget()
+        finally:
+            self.updating_keyword_rows = False
         
-        if not self.current_category:
+        # Update the scrollbar to show which part of the list is visible
+        if total:
+            self.keyword_scrollbar.set(self.keyword_offset / total, min(1.0, (self.keyword_offset + visible) / total))
+        else:
+            self.keyword_scrollbar.set(0.0, 1.0)
+    
+    def scroll_keywords(self, action, amount, unit=None):
+        """Scrollbar and mousewheel handler for the keyword list"""
+        if action == "moveto":
+            self.keyword_offset = int(float(amount) * len(self.keyword_values))
+        elif action == "scroll":
+            step = len(self.keyword_rows) if unit == "pages" else 1
+            self.keyword_offset += int(amount) * step
+        self.render_keyword_rows()
+    
+    def on_keyword_edit(self, slot):
+        """Copy an edit in a pooled row back into the working keyword list"""
+        if self.updating_keyword_rows:
             return
-            
-        # Get keywords
-        keywords = self.categories[self.current_category].get("keywords", [])
-        
-        # Add keyword entries
-        for i, keyword in enumerate(keywords):
-            keyword_frame = ttk.Frame(self.scrollable_frame)
-            keyword_frame.pack(fill=tk.X, pady=2)
-            
-            # Keyword index label
-            index_label = ttk.Label(keyword_frame, text=f"{i+1}.", width=3)
-            index_label.pack(side=tk.LEFT, padx=(0, 5))
-            
-            # Keyword entry
-            keyword_var = tk.StringVar(value=keyword)
-            keyword_entry = ttk.Entry(keyword_frame, textvariable=keyword_var)
-            keyword_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
-            keyword_var.trace_add("write", self.on_field_change)
-            keyword_entry.bind("<FocusIn>", self.on_field_focus)
-            
-            # Delete button
-            delete_button = ttk.Button(keyword_frame, text="×", width=3,
-                                     command=lambda idx=i: self.remove_keyword(idx))
-            delete_button.pack(side=tk.RIGHT)
-            
-            self.keyword_entries.append(keyword_var)
-        
-        # Reset canvas scroll region
-        self.canvas.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        
-        # Restore scroll position if possible
-        try:
-            self.canvas.yview_moveto(current_scroll[0])
-        except:
-            pass
+        index = self.keyword_offset + slot
+        if index < len(self.keyword_values):
+            self.keyword_values[index] = self.keyword_rows[slot][2].get()
+            self.has_unsaved_changes = True
     
     def add_keyword(self):
         """Add a new keyword to the current category"""
@@ -422,26 +3505,21 @@ class CategoryEditor(tk.Toplevel):
         if not keyword:
             return
             
-        # Add keyword to the list
-        if "keywords" not in self.categories[self.current_category]:
-            self.categories[self.current_category]["keywords"] = []
-            
-        current_keywords = self.categories[self.current_category]["keywords"]
-        
         # Check if keyword already exists
-        if keyword in current_keywords:
+        if keyword in self.keyword_values:
             # Just clear the field
             self.new_keyword_var.set("")
             return
             
-        # Add the keyword to the current category
-        current_keywords.append(keyword)
+        # Add the keyword to the current category and the list being edited
+        self.categories[self.current_category].setdefault("keywords", []).append(keyword)
+        self.keyword_values.append(keyword)
         
         # Mark changes
         self.has_unsaved_changes = True
         
         # Update UI without changing selection
-        self.refresh_keywords()
+        self.render_keyword_rows()
         
         # Clear the new keyword field
         self.new_keyword_var.set("")
@@ -455,26 +3533,107 @@ class CategoryEditor(tk.Toplevel):
         # Make sure selection is maintained
         self.ensure_selection_maintained()
     
+    def add_keywords(self, text):
+        """Add every keyword in a block of text (one per line, or comma/semicolon separated)"""
+        if not self.current_category:
+            return 0
+        
+        # A set makes duplicate checks constant time however long the list is
+        existing = set(self.keyword_values)
+        new_keywords = []
+        skipped = 0
+        for keyword in re.split(r'[\r\n,;]+', text):
+            keyword = keyword.strip()
+            if not keyword:
+                continue
+            if keyword in existing:
+                skipped += 1
+                continue
+            existing.add(keyword)
+            new_keywords.append(keyword)
+        
+        if new_keywords:
+            self.categories[self.current_category].setdefault("keywords", []).extend(new_keywords)
+            self.keyword_values.extend(new_keywords)
+            self.has_unsaved_changes = True
+            
+            # Show the end of the list where the new keywords are
+            self.keyword_offset = len(self.keyword_values)
+            self.render_keyword_rows()
+        
+        self.status_var.set(f"Added {len(new_keywords)} keywords ({skipped} duplicates skipped)")
+        self.ensure_selection_maintained()
+        return len(new_keywords)
+    
+    def on_keyword_paste(self, event=None):
+        """Treat a multi-line paste into the new keyword field as a bulk import"""
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return None
+        if not re.search(r'[\r\n]', text.strip()):
+            return None  # Single keyword: let the entry paste it normally
+        self.add_keywords(text)
+        return "break"
+    
+    def import_keywords(self):
+        """Open a dialog to paste or load many keywords at once"""
+        if not self.current_category:
+            return
+        
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Import Keywords - {self.current_category}")
+        dialog.geometry("400x350")
+        dialog.transient(self)
+        dialog.grab_set()
+        
+        ttk.Label(dialog, text="One keyword per line (commas and semicolons also separate):").pack(
+            anchor=tk.W, padx=10, pady=(10, 5))
+        
+        text_box = tk.Text(dialog, wrap=tk.NONE, height=12)
+        text_box.pack(fill=tk.BOTH, expand=True, padx=10)
+        text_box.focus_set()
+        
+        def load_file():
+            path = filedialog.askopenfilename(parent=dialog, title="Load Keywords",
+                                              filetypes=[("Text files", "*.txt *.csv"), ("All files", "*.*")])
+            if not path:
+                return
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text_box.insert(tk.END, f.read())
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not read file: {str(e)}", parent=dialog)
+        
+        def import_text():
+            self.add_keywords(text_box.get("1.0", tk.END))
+            dialog.destroy()
+        
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(button_frame, text="Load from File...", command=load_file).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Add Keywords", command=import_text).pack(side=tk.RIGHT, padx=5)
+    
     def remove_keyword(self, index):
         """Remove a keyword at the specified index"""
         if not self.current_category:
             return
             
-        if "keywords" not in self.categories[self.current_category]:
-            return
-            
-        current_keywords = self.categories[self.current_category]["keywords"]
-        if index < 0 or index >= len(current_keywords):
+        if index < 0 or index >= len(self.keyword_values):
             return
             
-        # Remove the keyword
-        removed_keyword = current_keywords.pop(index)
+        # Remove the keyword from the list being edited and from the category
+        removed_keyword = self.keyword_values.pop(index)
+        current_keywords = self.categories[self.current_category].get("keywords", [])
+        if index < len(current_keywords):
+            current_keywords.pop(index)
         
         # Mark changes
         self.has_unsaved_changes = True
         
         # Update UI without changing selection
-        self.refresh_keywords()
+        self.render_keyword_rows()
         
         # Show success message
         self.status_var.set(f"Keyword '{removed_keyword}' removed")
@@ -500,14 +3659,16 @@ class CategoryEditor(tk.Toplevel):
             self.abbr_entry.focus_set()
             return False
             
-        # Get keywords from entries
-        keywords = [var.get().strip() for var in self.keyword_entries]
+        # Get keywords from the working list
+        keywords = [k.strip() for k in self.keyword_values]
         keywords = [k for k in keywords if k]  # Remove empty strings
         
         # Update category details
         self.categories[self.current_category]["folder"] = folder
+        self.categories[self.current_category]["layout"] = LAYOUT_YEAR_MONTH if self.shard_var.get() else LAYOUT_FLAT
         self.categories[self.current_category]["abbreviation"] = abbreviation
         self.categories[self.current_category]["keywords"] = keywords
+        self.index_category(self.current_category)
         
         # Reset unsaved changes flag
         self.has_unsaved_changes = False
@@ -540,11 +3701,14 @@ class CategoryEditor(tk.Toplevel):
         self.destroy()
 
     def populate_categories(self):
-        """Populate the categories listbox"""
-        self.category_listbox.delete(0, tk.END)
-        
-        for category in sorted(self.categories.keys()):
-            self.category_listbox.insert(tk.END, category)
+        """Index every category and populate the categories listbox"""
+        self.sorted_categories = sorted(self.categories.keys())
+        self.category_index.rebuild(self.sorted_categories, {
+            category: (data.get("folder", ""), data.get("abbreviation", ""))
+            for category, data in self.categories.items()
+        })
+        self.visible_categories = None  # Force the listbox to be filled
+        self.apply_category_filter()
     
     def update_ui_state(self):
         """Update the state of UI elements based on selection"""
@@ -565,6 +3729,7 @@ class CategoryEditor(tk.Toplevel):
         self.new_keyword_entry.config(state=details_state)
         self.add_keyword_button.config(state=details_state)
         self.capitalize_button.config(state=details_state)
+        self.shard_check.config(state=details_state)
         self.auto_abbr_button.config(state=details_state)
         self.save_details_button.config(state=details_state)
         
@@ -600,21 +3765,19 @@ class CategoryEditor(tk.Toplevel):
             "keywords": []
         }
         
-        # Update the list
-        self.populate_categories()
+        # Update the list, clearing the filter so the new category is visible
+        self.index_category(new_name)
+        self.current_category = new_name
+        self.search_var.set("")
+        self.apply_category_filter()
         
-        # Find and select the new category
-        for i in range(self.category_listbox.size()):
-            if self.category_listbox.get(i) == new_name:
-                self.category_listbox.selection_clear(0, tk.END)
-                self.category_listbox.selection_set(i)
-                self.category_listbox.see(i)
-                self.current_category = new_name
-                break
+        # Start the new category's keywords at the top
+        self.keyword_offset = 0
                 
         # Update UI
         self.name_var.set(new_name)
         self.folder_var.set(self.categories[new_name].get("folder", new_name.capitalize()))
+        self.shard_var.set(category_layout(self.categories[new_name]) == LAYOUT_YEAR_MONTH)
         self.abbr_var.set(self.categories[new_name].get("abbreviation", new_name.upper()[:4]))
         self.refresh_keywords()
         self.update_ui_state()
@@ -661,21 +3824,17 @@ class CategoryEditor(tk.Toplevel):
         # Update category
         self.categories[new_name] = self.categories.pop(old_name)
         
-        # Update UI
-        self.populate_categories()
-        
-        # Find and select the renamed category
-        for i in range(self.category_listbox.size()):
-            if self.category_listbox.get(i) == new_name:
-                self.category_listbox.selection_clear(0, tk.END)
-                self.category_listbox.selection_set(i)
-                self.category_listbox.see(i)
-                self.current_category = new_name
-                break
+        # Update the list, clearing the filter so the renamed category is visible
+        self.unindex_category(old_name)
+        self.index_category(new_name)
+        self.current_category = new_name
+        self.search_var.set("")
+        self.apply_category_filter()
                 
         # Update UI
         self.name_var.set(new_name)
         self.folder_var.set(self.categories[new_name].get("folder", new_name.capitalize()))
+        self.shard_var.set(category_layout(self.categories[new_name]) == LAYOUT_YEAR_MONTH)
         self.abbr_var.set(self.categories[new_name].get("abbreviation", new_name.upper()[:4]))
         self.refresh_keywords()
         self.update_ui_state()
@@ -702,17 +3861,13 @@ class CategoryEditor(tk.Toplevel):
         # Remove category
         del self.categories[category]
         
-        # Update the list
-        self.populate_categories()
-        
         # Reset current category
         self.current_category = None
         self.has_unsaved_changes = False
         
-        # Select first category if available
-        if self.category_listbox.size() > 0:
-            self.category_listbox.selection_set(0)
-            self.category_listbox.event_generate('<<ListboxSelect>>')
+        # Update the list; the first remaining category gets selected
+        self.unindex_category(category)
+        self.apply_category_filter()
             
         # Show success message
         self.status_var.set(f"Category '{category}' removed")
@@ -759,7 +3914,7 @@ class CategoryEditor(tk.Toplevel):
             )
         
         # Apply to keyword entries (if any)
-        self.refresh_keywords()
+        self.render_keyword_rows()
 
 class DateFormatDialog(tk.Toplevel):
     def __init__(self, parent, current_format, callback):
@@ -859,27 +4014,64 @@ class PDFOrganizer(tk.Tk):
         self.geometry("800x600")  # Smaller window size for 1280x900 screens
         self.minsize(800, 600)  # Set minimum window size
         
+        # Time the road to first paint and to an interactive window
+        self.profiler = StartupProfiler()
+        
+        # Background threads hand UI updates to the Tk thread through this queue
+        self.ui_queue = queue.Queue()
+        self.startup_complete = False
+        
         # Define folder paths first
         self.sorted_folder = "sorted"
         self.needs_processing_folder = "needs_further_processing"
         
-        # Load categories from JSON
-        self.categories = self.load_categories()
+        # Categories and learned decisions are loaded in the background; start empty
+        self.category_store = None
+        self.category_version = 0
+        self.categories = {}
+        self.learned_model = ManualDecisionModel()
+        
+        # Full-text index over filed documents
+        self.search_index = SearchIndex()
         
-        # Now that folder paths are defined, ensure all folders exist
-        self.ensure_category_folders()
+        # Fingerprints of filed text, for spotting rescans of documents already filed
+        self.fingerprints = FingerprintIndex()
         
-        # Ensure sorted folder exists
-        if not os.path.exists(self.sorted_folder):
-            os.makedirs(self.sorted_folder)
+        # Catalog of filed documents that serves the folder views
+        self.catalog = DocumentCatalog()
+        self.reconciling_folders = set()
+        self.reconciled_at = {}
         
-        # Ensure "needs further processing" folder exists
-        if not os.path.exists(self.needs_processing_folder):
-            os.makedirs(self.needs_processing_folder)
+        # Optional deduplicated store for originals; the sorted view lists it by original name
+        self.sorted_store = BlobStore(self.sorted_folder)
+        self.blob_listing = {}  # listed name -> (manifest id, blob path)
+        self.filing_dry_run = False
+        
+        # Folders known to exist, so each is created or checked once
+        self.existing_folders = set()
+        
+        # Analysis workers read categories only through published snapshots
+        self.publish_categories()
         
         # Load settings or use defaults
         self.settings = self.load_settings()
         
+        # Metadata calls that can overlap (folder checks, listings, stats) go through a shared pool
+        self.fs = AsyncFS(self.settings.get("fs_threads", FS_THREADS))
+        
+        # Inbox roots, each analyzed by its own worker threads; all share the category folders
+        self.inbox_roots = inbox_roots(self.settings)
+        
+        # With several instances on one inbox, files are claimed one at a time as they are analyzed
+        self.inbox_claims = {}  # inbox root path -> InboxClaims
+        if self.settings.get("shared_inbox", False):
+            for root in self.inbox_roots:
+                self.inbox_claims[root["path"]] = InboxClaims(
+                    root["path"], worker_id=self.settings.get("worker_id"),
+                    timeout=self.settings.get("lease_timeout", LEASE_TIMEOUT_SECONDS)
+                )
+        self.claimed_elsewhere = 0
+        
         # Apply theme based on settings
         self.apply_theme()
         
@@ -888,6 +4080,12 @@ class PDFOrganizer(tk.Tk):
         self.current_page = 1
         self.total_pages = 1
         self.all_pdfs = []  # Store all PDF filenames
+        self.filtered_pdfs = []  # The part of all_pdfs matching the filter field (None: paged on demand)
+        self.filter_matches = None
+        self.filtered_count = 0
+        self.listing_index = None  # Built in the background for each listing
+        self.listing_index_folder = None  # Folder the index was built for; reloads of it only patch the index
+        self.listing_generation = 0
         
         # Current folder being viewed (empty string means root)
         self.current_folder = ""
@@ -895,39 +4093,200 @@ class PDFOrganizer(tk.Tk):
         # Set up the main frame
         self.setup_ui()
         
-        # Load PDFs from current directory
-        self.load_all_pdfs()
+        # Paint the last known inbox listing right away; the real scan replaces it
+        self.set_listing(load_listing_snapshot())
+        self.status_var.set("Loading...")
         
         # Current file info
         self.current_file = None
         self.current_text = ""
+        self.current_ingested = None
+        
+        self.profiler.mark("window built")
+        self.after(0, self.process_ui_queue)
+        
+        # Tk draws the window from idle callbacks queued before this one
+        self.after_idle(lambda: self.profiler.mark("first paint"))
         
-    def load_categories(self):
-        # Load categories from JSON file
+        # Load categories and scan the inbox off the UI thread
+        threading.Thread(target=self.load_startup_data, daemon=True).start()
+        
+        # Learn which folders already exist once the window is up
+        self.after_idle(self.warm_folder_cache)
+    
+    def load_startup_data(self):
+        """Worker thread: load everything the window does not need to paint"""
         try:
-            with open("categories.json", "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Create empty categories dictionary instead of default categories
-            empty_categories = {}
-            with open("categories.json", "w") as f:
-                json.dump(empty_categories, f, indent=4)
-            return empty_categories
-    
-    def ensure_category_folders(self):
-        """Create folders for each category if they don't exist and handle special characters in paths"""
-        created_folders = []
-        
-        # First ensure the base folders exist
-        for folder in [self.sorted_folder, self.needs_processing_folder]:
-            if not os.path.exists(folder):
+            # Join the shared inbox first so files left claimed by crashed instances are listed
+            for claims in self.inbox_claims.values():
+                claims.start()
+                claims.release_all()
+                claims.reclaim_stale()
+        except Exception as e:
+            print(f"Error joining the shared inbox: {str(e)}")
+        try:
+            category_store = CategoryStore()
+            learned_model = ManualDecisionModel.load()
+            inbox = list_inbox_roots(self.inbox_roots, self.fs)
+        except Exception as e:
+            print(f"Error during startup: {str(e)}")
+            category_store, learned_model, inbox = None, None, None
+        self.call_in_ui(lambda: self.finish_startup(category_store, learned_model, inbox))
+    
+    def finish_startup(self, category_store, learned_model, inbox):
+        """Install what the startup thread loaded and make the window fully interactive"""
+        if category_store is None:
+            # Fall back to loading on the UI thread so the app still works
+            try:
+                category_store = CategoryStore()
+            except Exception as e:
+                print(f"Error loading categories: {str(e)}")
+                messagebox.showerror("Error", f"Could not load categories: {str(e)}\n\n"
+                                     "Categories cannot be changed until this is fixed and the app is restarted.")
+                # Empty and read-only, so the unreadable files are not overwritten
+                category_store = CategoryStore(read_only=True, load=False)
+            learned_model = ManualDecisionModel.load()
+            try:
+                inbox = list_inbox_roots(self.inbox_roots)
+            except Exception as e:
+                print(f"Error listing the inbox: {str(e)}")
+                inbox = []
+        
+        self.category_store = category_store
+        self.category_version = category_store.version
+        self.categories = category_store.snapshot()
+        self.learned_model = learned_model
+        
+        # Fix up folder names (no filesystem access; folders are created on first filing)
+        self.sanitize_category_folders()
+        
+        # Analysis workers read categories only through published snapshots
+        self.publish_categories()
+        self.category_combo['values'] = list(self.categories.keys())
+        self.populate_category_folders_menu()
+        
+        # Replace the snapshot listing with the real one, unless the user has moved on
+        if not self.current_folder:
+            self.set_listing(inbox)
+            self.save_listing_snapshot()
+        else:
+            self.load_pdfs_page()
+        
+        # Hash anything in the archive the content-hash index has not seen yet
+        if self.settings.get("hash_archive", True):
+            self.backfill_content_hashes()
+        
+        self.startup_complete = True
+        self.profiler.mark("interactive")
+        print(f"Startup: {self.profiler.report()}")
+        self.status_var.set(f"Found {len(self.all_pdfs)} files (ready in {self.profiler.marks['interactive']:.2f} s)")
+    
+    def backfill_content_hashes(self):
+        """Catalog and hash the category folders and sorted in the background, once per file"""
+        folders = [(data.get("folder", name.capitalize()), name) for name, data in self.categories.items()]
+        folders.append((self.sorted_folder, None))
+        
+        def report(hashed, total):
+            self.call_in_ui(lambda: self.status_var.set(f"Indexing archive content: {hashed} of {total} files hashed"))
+        
+        def backfill():
+            try:
+                for folder, category in folders:
+                    if os.path.isdir(folder):
+                        self.catalog.reconcile(folder, category, self.fs)
+                paths = self.catalog.unhashed_paths()
+                hashes = []
+                for count, path in enumerate(paths, 1):
+                    try:
+                        sha256, size = hash_file(path)
+                        hashes.append((path, sha256, size))
+                    except FileNotFoundError:
+                        self.catalog.remove(path)
+                    except OSError as e:
+                        print(f"Error hashing {path}: {str(e)}")
+                    if len(hashes) >= 500 or count == len(paths):
+                        self.catalog.set_hashes(hashes)
+                        hashes = []
+                        report(count, len(paths))
+                
+                # Filed documents already have their text in the search index
+                self.fingerprints.backfill_from_search_index()
+            except Exception as e:
+                print(f"Error indexing archive content: {str(e)}")
+        
+        threading.Thread(target=backfill, daemon=True).start()
+    
+    def find_known_copy(self, sha256):
+        """(path, category) of an archived copy with this content, or None
+        
+        Copies in the needs-processing folder do not count: they were never filed.
+        """
+        unfiled = os.path.normpath(self.needs_processing_folder) + os.sep
+        originals = os.path.normpath(self.sorted_folder) + os.sep
+        copies = [(path, category) for path, category in self.catalog.find_by_hash(sha256)
+                  if not path.startswith(unfiled) and os.sep in path]
+        # Prefer the filed copy in a category folder over the original in sorted
+        copies.sort(key=lambda copy: copy[0].startswith(originals))
+        for path, category in copies:
+            if os.path.exists(path):
+                return path, category
+        return None
+    
+    def find_near_duplicate(self, fingerprint, sha256):
+        """(path, distance) of a filed document with almost the same text, or None"""
+        for distance, other in self.fingerprints.near(fingerprint, self.settings.get(
+                "near_duplicate_distance", NEAR_DUPLICATE_DISTANCE)):
+            if other == sha256:
+                continue
+            copy = self.find_known_copy(other)
+            if copy:
+                return copy[0], distance
+        return None
+    
+    def wait_for_startup(self):
+        """True once categories are loaded; otherwise tell the user to wait a moment"""
+        if not self.startup_complete:
+            self.status_var.set("Still loading categories, please try again in a moment")
+        return self.startup_complete
+    
+    def save_listing_snapshot(self):
+        """Remember the inbox listing for the next startup"""
+        try:
+            save_listing_snapshot(self.all_pdfs)
+        except Exception as e:
+            print(f"Error saving listing snapshot: {str(e)}")
+        
+    def call_in_ui(self, callback):
+        """Schedule a callback on the Tk thread (safe to call from worker threads)"""
+        self.ui_queue.put(callback)
+    
+    def process_ui_queue(self):
+        """Run callbacks queued by background threads, then poll again"""
+        try:
+            while True:
+                callback = self.ui_queue.get(block=False)
                 try:
-                    os.makedirs(folder)
-                    created_folders.append(folder)
+                    callback()
                 except Exception as e:
-                    print(f"Error creating folder {folder}: {str(e)}")
+                    print(f"Error in UI callback: {str(e)}")
+        except queue.Empty:
+            pass
+        # Poll quickly until startup has finished so it is not held up by the poll interval
+        self.after(100 if self.startup_complete else 10, self.process_ui_queue)
+    
+    def publish_categories(self):
+        """Publish an immutable snapshot of the current categories to the analysis workers
+        
+        Assigning the attribute is atomic; workers pick the new snapshot up at their
+        next file, and a file that is already being analyzed finishes on the old one.
+        """
+        self.category_snapshot = CategorySnapshot(self.categories, self.category_version)
+    
+    def sanitize_category_folders(self):
+        """Give every category a usable folder name, without touching the filesystem"""
+        # Categories whose folder name had to be fixed; only these are written back
+        changed = {}
         
-        # Then create category folders
         for category, data in self.categories.items():
             folder_path = data.get("folder", category.capitalize())
             
@@ -937,44 +4296,99 @@ class PDFOrganizer(tk.Tk):
             # Make sure folder path is valid
             if not folder_path:
                 folder_path = category.capitalize()
-                # Update the category data with the valid folder name
+            
+            # Update the category data with the valid folder name
+            if folder_path != data.get("folder"):
                 self.categories[category]["folder"] = folder_path
-                
+                changed[category] = self.categories[category]
+        
+        # Save only the categories whose folder names were fixed
+        if changed:
             try:
-                if not os.path.exists(folder_path):
-                    os.makedirs(folder_path)
-                    created_folders.append(folder_path)
+                self.category_version = self.category_store.commit(changed)
+                print(f"Updated folder names for {len(changed)} categories")
             except Exception as e:
-                # If there's an error, try to create a simplified version of the folder name
-                print(f"Error creating folder '{folder_path}': {str(e)}")
-                simplified_path = re.sub(r'[\\/:*?"<>|]', '_', category.capitalize())
-                try:
-                    if not os.path.exists(simplified_path):
-                        os.makedirs(simplified_path)
-                        created_folders.append(simplified_path)
-                    # Update the category data with the simplified folder name
-                    self.categories[category]["folder"] = simplified_path
-                    print(f"Created simplified folder '{simplified_path}' instead")
-                except Exception as e2:
-                    print(f"Error creating simplified folder '{simplified_path}': {str(e2)}")
-        
-        # If any folders were created, save the updated categories
-        if any(folder_path != category.capitalize() for category, data in self.categories.items() 
-               for folder_path in [data.get("folder", category.capitalize())]):
+                print(f"Error saving updated categories: {str(e)}")
+    
+    def ensure_folder(self, folder):
+        """Create a folder on first use; later calls are answered from memory"""
+        key = os.path.normpath(folder)
+        if key in self.existing_folders:
+            return True
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except Exception as e:
+            print(f"Error creating folder '{folder}': {str(e)}")
+            return False
+        self.existing_folders.add(key)
+        return True
+    
+    def ensure_folders(self, folders):
+        """Create any of these folders not yet known to exist, in parallel; returns the ones that failed"""
+        missing = {folder for folder in folders if os.path.normpath(folder) not in self.existing_folders}
+        failed = set()
+        for folder, error in self.fs.makedirs_many(missing).items():
+            if error is not None:
+                print(f"Error creating folder '{folder}': {str(error)}")
+                failed.add(folder)
+            else:
+                self.existing_folders.add(os.path.normpath(folder))
+        return failed
+    
+    def folder_for_category(self, category):
+        """Folder a category files into, created on first use; None if it cannot be created"""
+        folder = self.categories.get(category, {}).get("folder", category.capitalize())
+        if self.ensure_folder(folder):
+            return folder
+        
+        # If there's an error, try a simplified version of the folder name
+        simplified_path = re.sub(r'[\\/:*?"<>|]', '_', category.capitalize())
+        if simplified_path == folder or not self.ensure_folder(simplified_path):
+            return None
+        print(f"Created simplified folder '{simplified_path}' instead")
+        
+        # Remember the simplified folder name for this category
+        if category in self.categories:
+            self.categories[category]["folder"] = simplified_path
             try:
-                with open("categories.json", "w") as f:
-                    json.dump(self.categories, f, indent=4)
-                print("Updated categories.json with simplified folder names")
+                self.category_version = self.category_store.commit({category: self.categories[category]})
             except Exception as e:
                 print(f"Error saving updated categories: {str(e)}")
+            self.publish_categories()
+        return simplified_path
+    
+    def folder_for_document(self, category, date):
+        """Folder a document of this category and date is filed into, honouring the category layout"""
+        folder = self.folder_for_category(category)
+        if folder is None:
+            return None
+        shard = shard_folder(folder, category_layout(self.categories.get(category, {})), date)
+        if shard != folder and not self.ensure_folder(shard):
+            # Better filed flat than not at all; a later layout migration moves it
+            return folder
+        return shard
+    
+    def warm_folder_cache(self):
+        """List the working directory once in the background so first filings can skip mkdir"""
+        def scan():
+            try:
+                with os.scandir('.') as entries:
+                    folders = [os.path.normpath(entry.name) for entry in entries if entry.is_dir()]
+            except OSError as e:
+                print(f"Error listing folders: {str(e)}")
+                return
+            # existing_folders belongs to the UI thread; merge there
+            self.call_in_ui(lambda: self.existing_folders.update(folders))
         
-        return created_folders
+        threading.Thread(target=scan, daemon=True).start()
 
     def load_settings(self):
         """Load settings from JSON file"""
         default_settings = {
             "date_format": "ddmmyy",  # Default: DDMMYY
-            "dark_mode": False        # Default: Light mode
+            "dark_mode": False,       # Default: Light mode
+            "date_confidence_threshold": DATE_CONFIDENCE_THRESHOLD,
+            "classifier_threshold": CLASSIFIER_THRESHOLD
         }
         
         try:
@@ -1117,6 +4531,14 @@ class PDFOrganizer(tk.Tk):
         self.file_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="File", menu=self.file_menu)
         self.file_menu.add_command(label="Refresh", command=self.refresh_pdfs)
+        self.file_menu.add_command(label="Dry Run Auto Process", command=lambda: self.auto_process_all(dry_run=True))
+        if len(self.inbox_roots) > 1:
+            # Process one department's inbox without waiting on the others
+            inbox_menu = tk.Menu(self.file_menu, tearoff=0)
+            self.file_menu.add_cascade(label="Auto Process Inbox", menu=inbox_menu)
+            for root in self.inbox_roots:
+                inbox_menu.add_command(label=f"{root['name']} ({root['path']})",
+                                       command=lambda root=root: self.auto_process_all(roots=[root]))
         self.file_menu.add_separator()
         self.file_menu.add_command(label="Exit", command=self.quit)
         
@@ -1125,6 +4547,9 @@ class PDFOrganizer(tk.Tk):
         self.menu_bar.add_cascade(label="Settings", menu=self.settings_menu)
         self.settings_menu.add_command(label="Edit Categories", command=self.edit_categories)
         self.settings_menu.add_command(label="Date Format", command=self.edit_date_format)
+        self.settings_menu.add_command(label="Train Classifier", command=self.train_category_classifier)
+        self.settings_menu.add_command(label="Apply Folder Layouts", command=self.migrate_folder_layouts)
+        self.settings_menu.add_command(label="Deduplicate Sorted Folder", command=self.deduplicate_sorted_folder)
         # Add Theme toggle option
         theme_label = "Light Mode" if self.settings.get("dark_mode", False) else "Dark Mode"
         self.settings_menu.add_command(label=f"Toggle {theme_label}", command=self.toggle_theme)
@@ -1154,9 +4579,31 @@ class PDFOrganizer(tk.Tk):
         self.left_frame = ttk.Frame(self.main_paned)
         self.main_paned.add(self.left_frame, weight=1)
         
+        # Full-text search across all filed documents
+        self.search_frame = ttk.Frame(self.left_frame)
+        self.search_frame.pack(fill=tk.X, padx=2, pady=(2, 0))
+        
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(self.search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind("<Return>", lambda e: self.search_documents())
+        
+        self.search_button = ttk.Button(self.search_frame, text="Search", command=self.search_documents, width=8)
+        self.search_button.pack(side=tk.LEFT, padx=(2, 0))
+        
         self.file_frame = ttk.LabelFrame(self.left_frame, text="PDF Files")
         self.file_frame.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
         
+        # Filter-as-you-type over the current listing
+        self.filter_frame = ttk.Frame(self.file_frame)
+        self.filter_frame.pack(fill=tk.X, padx=2, pady=(2, 0))
+        ttk.Label(self.filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(self.filter_frame, textvariable=self.filter_var)
+        self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(4, 0))
+        self.filter_entry.bind("<Escape>", lambda e: self.filter_var.set(""))
+        self.filter_var.trace_add("write", self.on_filter_change)
+        
         # Create listbox with scrollbar
         self.file_list_container = ttk.Frame(self.file_frame)
         self.file_list_container.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
@@ -1388,6 +4835,8 @@ class PDFOrganizer(tk.Tk):
         pass
     
     def edit_categories(self):
+        if not self.wait_for_startup():
+            return
         # Open category editor dialog
         editor = CategoryEditor(self, self.categories, self.update_categories)
         # Apply current theme to dialog
@@ -1396,65 +4845,348 @@ class PDFOrganizer(tk.Tk):
         self.wait_window(editor)
     
     def update_categories(self, new_categories):
+        # The published snapshot still holds the layouts from before the edit
+        old_layouts = {name: category_layout(data) for name, data in self.category_snapshot.categories.items()}
+        relaid = [name for name, data in new_categories.items()
+                  if category_layout(data) != old_layouts.get(name, LAYOUT_FLAT)]
+        
         # Update categories
         self.categories = new_categories
         
-        # Save to file
-        with open("categories.json", "w") as f:
-            json.dump(self.categories, f, indent=4)
+        # Forget what was learned for categories that no longer exist
+        for category in list(self.learned_model.categories):
+            if category not in self.categories:
+                self.learned_model.forget_category(category)
+        self.save_learned_model()
+        
+        # Save only what changed
+        self.category_version = self.category_store.replace_all(self.categories)
         
         # Update UI
         self.category_combo['values'] = list(self.categories.keys())
         
-        # Ensure folders exist
-        self.ensure_category_folders()
+        # Fix up folder names; the folders themselves are created on first filing
+        self.sanitize_category_folders()
+        
+        # Hand the new categories to any analysis that is running
+        self.publish_categories()
         
         # Update folders menu
         self.populate_category_folders_menu()
         
         # Show success message
         messagebox.showinfo("Success", "Categories updated successfully")
+        
+        # New filings already follow a changed layout; existing files move only on request
+        if relaid and messagebox.askyesno("Folder Layout",
+                                          f"The folder layout changed for {', '.join(sorted(relaid))}. "
+                                          "Move the files already filed there into the new layout now?"):
+            self.migrate_folder_layouts(relaid)
+    
+    def migrate_folder_layouts(self, categories=None):
+        """Move already-filed documents into each category's configured folder layout in the background"""
+        if not self.wait_for_startup():
+            return
+        targets = [(data.get("folder", name.capitalize()), category_layout(data))
+                   for name, data in self.category_snapshot.categories.items()
+                   if categories is None or name in categories]
+        date_format = self.settings.get("date_format", "ddmmyy")
+        
+        def report(folder, moved):
+            self.call_in_ui(lambda: self.status_var.set(f"Rearranging {folder}: moved {moved} files"))
+        
+        def done(moved, skipped):
+            # Flattening removes shard folders, so forget which folders exist
+            self.existing_folders.clear()
+            if self.current_folder:
+                self.refresh_pdfs(rescan=False)
+            message = f"Folder layouts applied: moved {moved} files"
+            if skipped:
+                message += f", {skipped} without a date left in place"
+            self.status_var.set(message)
+        
+        def migrate():
+            total_moved = total_skipped = 0
+            for folder, layout in targets:
+                if not os.path.isdir(folder):
+                    continue
+                try:
+                    moved, skipped = migrate_folder_layout(
+                        folder, layout, self.catalog, self.search_index, date_format,
+                        progress=lambda moved, folder=folder: report(folder, moved)
+                    )
+                except Exception as e:
+                    print(f"Error rearranging {folder}: {str(e)}")
+                    continue
+                total_moved += moved
+                total_skipped += skipped
+            self.call_in_ui(lambda: done(total_moved, total_skipped))
+        
+        threading.Thread(target=migrate, daemon=True).start()
+        self.status_var.set("Rearranging category folders...")
+    
+    def load_all_pdfs(self):
+        """Load all PDFs from current directory into memory"""
+        # Clear current list of all PDFs
+        self.all_pdfs = []
+        
+        # If viewing root directory
+        if not self.current_folder:
+            # Get all PDF files waiting in the inbox roots (excluding the sorted directory)
+            self.all_pdfs = list_inbox_roots(self.inbox_roots, self.fs)
+        elif self.current_folder == self.sorted_folder and self.using_blob_store():
+            # Originals are listed by name from the manifest (plus any not yet moved into the store)
+            self.all_pdfs = self.load_blob_listing()
+            self.all_pdfs += [name for name in self.fs.scan_category_folder(self.sorted_folder)
+                              if name not in self.blob_listing]
+        elif self.catalog.available:
+            # Serve the folder from the catalog; a background rescan catches outside changes
+            self.all_pdfs = self.catalog.list_folder(self.current_folder)
+            self.reconcile_folder(self.current_folder)
+        else:
+            # We're viewing a category folder, get all files (not just PDFs), date shards included
+            self.all_pdfs = self.fs.scan_category_folder(self.current_folder)
+        
+        self.set_listing(self.all_pdfs)
+        
+        # Remember the inbox for an instant first paint next time
+        if not self.current_folder:
+            self.save_listing_snapshot()
+    
+    def set_listing(self, files):
+        """Show a listing of the current folder: sort, index, filter and page it"""
+        # Sort files alphabetically
+        self.all_pdfs = sorted(files)
+        
+        # Set the file frame title
+        if self.current_folder:
+            self.file_frame.configure(text=f"Files in {self.current_folder}")
+        else:
+            self.file_frame.configure(text="PDF Files")
+        
+        # Index the listing for the filter field in the background
+        self.rebuild_listing_index()
+        
+        # Apply the filter and recalculate pages
+        self.update_filtered_pdfs()
+            
+        # Load the current page
+        self.load_pdfs_page()
+        
+        # Update status
+        self.status_var.set(f"Found {len(self.all_pdfs)} files")
+    
+    def rebuild_listing_index(self):
+        """Build the filter index for the current listing off the UI thread"""
+        self.listing_generation += 1
+        generation = self.listing_generation
+        names = list(self.all_pdfs)
+        folder = self.current_folder
+        
+        # Reloading the folder the index was built for: patch in the differences instead
+        index = self.listing_index
+        if index is not None and self.listing_index_folder == folder:
+            current = set(names)
+            gone = [name for name in index.name_terms if name not in current]
+            new = current - index.name_terms.keys()
+            if len(gone) + len(new) <= len(names) // 4:
+                for name in gone:
+                    index.remove(name)
+                for name in new:
+                    index.add(name)
+                return
+        self.listing_index = None
+        
+        def install(index):
+            # A newer listing was loaded while we were building; its own build will land later
+            if generation != self.listing_generation:
+                return
+            # Catch up with files added or filed while the index was being built
+            current = set(self.all_pdfs)
+            for name in set(index.name_terms) - current:
+                index.remove(name)
+            for name in current - set(index.name_terms):
+                index.add(name)
+            self.listing_index = index
+            self.listing_index_folder = folder
+            if self.filter_var.get().strip():
+                self.update_filtered_pdfs()
+                self.load_pdfs_page()
+        
+        def build():
+            try:
+                # Catalogued files can also be found by category and date
+                metadata = self.catalog.folder_metadata(folder) if folder else None
+                index = ListingIndex()
+                index.rebuild(names, metadata)
+            except Exception as e:
+                print(f"Error building file filter index: {str(e)}")
+                return
+            self.call_in_ui(lambda: install(index))
+        
+        threading.Thread(target=build, daemon=True).start()
+    
+    def update_filtered_pdfs(self):
+        """Recompute the filter matches and the page count"""
+        text = self.filter_var.get()
+        if self.listing_index is not None:
+            matches = self.listing_index.query(text)
+        else:
+            # Index still building: fall back to a plain substring scan
+            words = FILTER_TOKEN_RE.findall(text.lower())
+            matches = {name for name in self.all_pdfs if all(word in name.lower() for word in words)} if words else None
+        
+        if matches is None:
+            self.filter_matches = None
+            self.filtered_pdfs = self.all_pdfs
+            match_count = len(self.all_pdfs)
+        elif len(matches) * 8 < len(self.all_pdfs):
+            # Few matches: sorting them is cheaper than walking the whole listing
+            self.filter_matches = matches
+            self.filtered_pdfs = sorted(matches)
+            match_count = len(matches)
+        else:
+            # Many matches: pages are pulled from the sorted listing on demand
+            self.filter_matches = matches
+            self.filtered_pdfs = None
+            match_count = len(matches)
+        self.filtered_count = match_count
+        
+        # Calculate total pages
+        self.total_pages = max(1, (match_count + self.page_size - 1) // self.page_size)
+        
+        # Ensure current page is valid
+        if self.current_page > self.total_pages:
+            self.current_page = self.total_pages
+    
+    def filtered_page(self, start_idx, end_idx):
+        """The filtered listing between two positions, in listing order"""
+        if self.filtered_pdfs is None and start_idx > 0:
+            # Paging on: sort the matches once rather than walk the listing again for every page
+            self.filtered_pdfs = sorted(self.filter_matches)
+        if self.filtered_pdfs is not None:
+            return self.filtered_pdfs[start_idx:end_idx]
+        # First page of many matches: they are dense, so it ends early in the listing
+        matches = self.filter_matches
+        return list(itertools.islice((name for name in self.all_pdfs if name in matches), start_idx, end_idx))
+    
+    def on_filter_change(self, *args):
+        """Narrow the file list on every keystroke in the filter field"""
+        start = time.perf_counter()
+        self.current_page = 1
+        self.update_filtered_pdfs()
+        self.load_pdfs_page()
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.filter_var.get().strip():
+            self.status_var.set(f"{self.filtered_count} of {len(self.all_pdfs)} files match ({elapsed:.0f} ms)")
+        else:
+            self.status_var.set(f"Found {len(self.all_pdfs)} files")
+    
+    def _add_to_listing(self, name, metadata=()):
+        """Add a file to the in-memory listing and its filter index without reloading"""
+        index = bisect.bisect_left(self.all_pdfs, name)
+        if index == len(self.all_pdfs) or self.all_pdfs[index] != name:
+            self.all_pdfs.insert(index, name)
+        if self.listing_index is not None:
+            self.listing_index.add(name, metadata)
+        self.update_filtered_pdfs()
+    
+    def _remove_from_listing(self, name):
+        """Drop a file from the in-memory listing and its filter index without reloading"""
+        index = bisect.bisect_left(self.all_pdfs, name)
+        if index < len(self.all_pdfs) and self.all_pdfs[index] == name:
+            del self.all_pdfs[index]
+        elif name in self.all_pdfs:
+            self.all_pdfs.remove(name)
+        if self.listing_index is not None:
+            self.listing_index.remove(name)
+        self.update_filtered_pdfs()
+    
+    def _is_listed(self, name):
+        index = bisect.bisect_left(self.all_pdfs, name)
+        return index < len(self.all_pdfs) and self.all_pdfs[index] == name
+    
+    def _update_listing(self, removed=(), added=None):
+        """Apply a batch of listing changes (added: {name: metadata}) with a single filter update"""
+        removed = set(removed)
+        added = added or {}
+        if removed:
+            self.all_pdfs = [name for name in self.all_pdfs if name not in removed]
+        if added:
+            # Two sorted runs: timsort merges them in linear time
+            new = sorted(name for name in added if not self._is_listed(name))
+            self.all_pdfs = sorted(self.all_pdfs + new)
+        if self.listing_index is not None:
+            for name in removed:
+                self.listing_index.remove(name)
+            for name, metadata in added.items():
+                self.listing_index.add(name, metadata)
+        self.update_filtered_pdfs()
+    
+    def apply_filing_to_listing(self, filed_originals, catalog_entries):
+        """Follow a filed batch in the open listing rather than reloading the folder and its index"""
+        if not self.current_folder and self.inbox_claims:
+            # Other instances change a shared inbox too; a reload only patches the index
+            self.load_all_pdfs()
+            return
+        elif not self.current_folder:
+            self._update_listing(removed=filed_originals)
+            self.save_listing_snapshot()
+        elif self.current_folder == self.sorted_folder and self.using_blob_store():
+            # Stored originals are listed through their manifest entries; the reload keeps the index
+            self.load_all_pdfs()
+            return
+        else:
+            prefix = os.path.normpath(self.current_folder) + os.sep
+            added = {}
+            for path, category, date, _, _ in catalog_entries:
+                path = os.path.normpath(path)
+                if path.startswith(prefix):
+                    if isinstance(date, datetime):
+                        date = date.date().isoformat()
+                    added[path[len(prefix):]] = (category, date)
+            self._update_listing(added=added)
+        self.load_pdfs_page()
+        self.status_var.set(f"Found {len(self.all_pdfs)} files")
     
-    def load_all_pdfs(self):
-        """Load all PDFs from current directory into memory"""
-        # Clear current list of all PDFs
-        self.all_pdfs = []
+    def _rename_in_listing(self, old_name, new_name):
+        """Follow a rename in the listing, keeping the file's catalog metadata searchable"""
+        metadata = self.listing_index.metadata.get(old_name, ()) if self.listing_index is not None else ()
+        self._remove_from_listing(old_name)
+        self._add_to_listing(new_name, metadata)
+    
+    def reconcile_folder(self, folder, force=False):
+        """Rescan a folder in the background and refresh the view if the catalog was stale"""
+        last_scan = self.reconciled_at.get(folder)
+        if folder in self.reconciling_folders:
+            return
+        if not force and last_scan is not None and time.monotonic() - last_scan < CATALOG_RECONCILE_INTERVAL:
+            return
+        self.reconciling_folders.add(folder)
         
-        # If viewing root directory
-        if not self.current_folder:
-            # Get all PDF files in current directory (excluding the sorted directory)
-            for file in os.listdir('.'):
-                if file.lower().endswith('.pdf'):
-                    self.all_pdfs.append(file)
-            
-            # Set the file frame title
-            self.file_frame.configure(text="PDF Files")
-        else:
-            # We're viewing a category folder, get all files (not just PDFs)
-            if os.path.exists(self.current_folder):
-                for file in os.listdir(self.current_folder):
-                    file_path = os.path.join(self.current_folder, file)
-                    if os.path.isfile(file_path):
-                        self.all_pdfs.append(file)
-            
-            # Set the file frame title to current folder
-            self.file_frame.configure(text=f"Files in {self.current_folder}")
-                
-        # Sort files alphabetically
-        self.all_pdfs.sort()
+        # Files found by the scan are attributed to the category owning the folder
+        category = None
+        for name, data in self.categories.items():
+            if data.get("folder", name.capitalize()) == folder:
+                category = name
+                break
         
-        # Calculate total pages
-        self.total_pages = max(1, (len(self.all_pdfs) + self.page_size - 1) // self.page_size)
+        def done(added, removed):
+            self.reconciling_folders.discard(folder)
+            self.reconciled_at[folder] = time.monotonic()
+            if (added or removed) and self.current_folder == folder:
+                self.refresh_pdfs(rescan=False)
+                self.status_var.set(f"Found {len(self.all_pdfs)} files ({added} new, {removed} gone since last scan)")
         
-        # Ensure current page is valid
-        if self.current_page > self.total_pages:
-            self.current_page = self.total_pages
-            
-        # Load the current page
-        self.load_pdfs_page()
+        def scan():
+            try:
+                added, removed = self.catalog.reconcile(folder, category, self.fs)
+            except Exception as e:
+                print(f"Error rescanning {folder}: {str(e)}")
+                added = removed = 0
+            self.call_in_ui(lambda: done(added, removed))
         
-        # Update status
-        self.status_var.set(f"Found {len(self.all_pdfs)} files")
+        threading.Thread(target=scan, daemon=True).start()
     
     def load_pdfs_page(self):
         """Load a specific page of PDFs into the listbox"""
@@ -1483,11 +5215,11 @@ class PDFOrganizer(tk.Tk):
         
         # Calculate start and end indices
         start_idx = (self.current_page - 1) * self.page_size
-        end_idx = min(start_idx + self.page_size, len(self.all_pdfs))
+        end_idx = start_idx + self.page_size
         
         # Add PDFs for the current page to the listbox
-        for i in range(start_idx, end_idx):
-            self.file_listbox.insert(tk.END, self.all_pdfs[i])
+        for name in self.filtered_page(start_idx, end_idx):
+            self.file_listbox.insert(tk.END, name)
             
         # Update page info
         self.page_info_var.set(f"Page {self.current_page} of {self.total_pages}")
@@ -1508,11 +5240,15 @@ class PDFOrganizer(tk.Tk):
             self.current_page -= 1
             self.load_pdfs_page()
     
-    def refresh_pdfs(self):
+    def refresh_pdfs(self, rescan=True):
         """Refresh the PDF list"""
         # Save current page before refresh
         current_page = self.current_page
         
+        # An explicit refresh rescans the folder instead of trusting the catalog
+        if rescan and self.current_folder:
+            self.reconciled_at.pop(self.current_folder, None)
+        
         # Reload all PDFs
         self.load_all_pdfs()
         
@@ -1539,22 +5275,16 @@ class PDFOrganizer(tk.Tk):
         # Check if this is a folder in the root directory
         if not self.current_folder and item_text.startswith("[") and item_text.endswith("]"):
             folder_name = item_text[1:-1]  # Remove brackets
-            # Navigate to the selected folder
-            if os.path.exists(folder_name):
-                self.current_folder = folder_name
-                self.current_page = 1  # Reset to first page
-                self.load_all_pdfs()
-            else:
-                messagebox.showerror("Error", f"Folder not found: {folder_name}")
+            # Navigate to the selected folder (folders are created on first filing, so it may be empty)
+            self.current_folder = folder_name
+            self.current_page = 1  # Reset to first page
+            self.load_all_pdfs()
             return
             
         # Handle file selection
         try:
             # Determine the full path based on current folder
-            if self.current_folder:
-                filename = os.path.join(self.current_folder, item_text)
-            else:
-                filename = item_text
+            filename = self.listed_path(item_text)
                 
             # Check if file exists
             if os.path.exists(filename):
@@ -1585,28 +5315,37 @@ class PDFOrganizer(tk.Tk):
                 
                 # If it's a PDF, extract text and try to detect date/category
                 if filename.lower().endswith('.pdf'):
+                    # Read once; the buffer also gives the size and hash recorded when filing
+                    self.current_ingested = ingest_pdf(filename)
+                    
                     # Extract text from PDF
-                    self.current_text = self.extract_text_from_pdf(filename)
+                    self.current_text = self.extract_text_from_pdf(filename, ingested=self.current_ingested)
                     
                     # Display text in text box
                     self.text_box.insert(tk.END, self.current_text[:10000])  # Limit display for performance
                     
+                    # Normalize once and share the document with the date and category detectors
+                    document = NormalizedDocument(self.current_text)
+                    
                     # Auto-fill date field
-                    detected_date = self.extract_date_from_pdf(self.current_text)
+                    detected_date, date_confidence, _ = self.extract_date_with_confidence(document)
                     if not detected_date:
                         # Try to extract from filename if not found in content
                         detected_date = self.extract_date_from_filename(os.path.basename(filename))
+                        date_confidence = FILENAME_DATE_CONFIDENCE
                     
                     if detected_date:
                         formatted_date = self.format_date(detected_date)
                         self.date_var.set(formatted_date)
+                        self.detected_date_var.set(formatted_date)
                     else:
                         # If no date detected, set to today's date
                         self.set_today()
+                        self.detected_date_var.set("")
                     
                     # Auto-detect category for files in main folder
                     if not self.current_folder:
-                        detected_category = self.detect_category(self.current_text)
+                        detected_category = self.detect_category(document)
                         if detected_category:
                             self.detected_var.set(detected_category)
                             # Also set the category for preview
@@ -1617,7 +5356,7 @@ class PDFOrganizer(tk.Tk):
                             self.category_var.set("")
                     else:
                         # In category folder, just display detected category
-                        detected_category = self.detect_category(self.current_text)
+                        detected_category = self.detect_category(document)
                         if detected_category:
                             self.detected_var.set(detected_category)
                         else:
@@ -1643,6 +5382,7 @@ class PDFOrganizer(tk.Tk):
                             self.text_box.insert(tk.END, file_info + "(Binary file or unsupported format)")
                             
                         self.current_text = ""
+                        self.current_ingested = None
                         self.date_var.set("")
                         self.detected_var.set("")
                         
@@ -1652,7 +5392,10 @@ class PDFOrganizer(tk.Tk):
                         self.text_box.insert(tk.END, f"Error reading file: {str(e)}")
                 
                 # Update status
-                self.status_var.set(f"Loaded: {filename}")
+                if filename.lower().endswith('.pdf') and detected_date:
+                    self.status_var.set(f"Loaded: {filename} (date confidence {date_confidence:.0%})")
+                else:
+                    self.status_var.set(f"Loaded: {filename}")
             else:
                 messagebox.showerror("Error", f"File not found: {filename}")
                 self.status_var.set("Error loading file")
@@ -1666,288 +5409,108 @@ class PDFOrganizer(tk.Tk):
         # Update preview
         self.update_preview()
     
-    def open_pdf_external(self):
-        if not self.current_file or not os.path.exists(self.current_file):
-            messagebox.showinfo("Info", "No file selected")
+    def search_documents(self):
+        """Run a full-text search over filed documents and show ranked results"""
+        query = self.search_var.get().strip()
+        if not query:
             return
             
-        # Open file in system default viewer
+        start = datetime.now()
         try:
-            if platform.system() == 'Darwin':  # macOS
-                subprocess.call(('open', self.current_file))
-            elif platform.system() == 'Windows':  # Windows
-                os.startfile(os.path.abspath(self.current_file))
-            else:  # Linux variants
-                subprocess.call(('xdg-open', self.current_file))
-                
-            self.status_var.set(f"Opened {self.current_file} in external viewer")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not open file: {str(e)}")
+            results = self.search_index.search(query)
+        except sqlite3.Error as e:
+            messagebox.showerror("Search Error", f"Could not search documents: {str(e)}")
+            return
+        elapsed_ms = (datetime.now() - start).total_seconds() * 1000
+        
+        self.status_var.set(f"Found {len(results)} documents matching '{query}' in {elapsed_ms:.0f} ms")
+        self.show_search_results(query, results)
     
-    def extract_text_from_pdf(self, filename, max_pages=3):
-        """Extract text from PDF file with optimized performance
+    def show_search_results(self, query, results):
+        """Display search results; double-click opens the document"""
+        results_window = tk.Toplevel(self)
+        results_window.title(f"Search: {query}")
+        results_window.geometry("700x400")
+        results_window.transient(self)
         
-        Args:
-            filename: Path to the PDF file
-            max_pages: Maximum number of pages to extract (default 3)
+        # Apply theme if in dark mode
+        if self.settings.get("dark_mode", False):
+            if not SV_TTK_AVAILABLE:
+                results_window.configure(bg="#333333")
         
-        Returns:
-            Extracted text as string
-        """
-        # Use pdfplumber if available, it's faster and more reliable
-        if PDFPLUMBER_AVAILABLE:
-            try:
-                with pdfplumber.open(filename) as pdf:
-                    # Only process the first few pages for speed
-                    pages_to_extract = min(len(pdf.pages), max_pages)
-                    
-                    text = ""
-                    # Process pages in batches for better performance
-                    for i in range(pages_to_extract):
-                        try:
-                            page = pdf.pages[i]
-                            page_text = page.extract_text(x_tolerance=3) or ""
-                            
-                            # Only add non-empty pages
-                            if page_text.strip():
-                                text += page_text + "\n\n"
-                                
-                                # If we found substantial text, we can stop early
-                                if len(text) > 2000:
-                                    break
-                        except Exception as e:
-                            print(f"Error extracting text from page {i}: {str(e)}")
-                            continue
-                    
-                    return text
-            except Exception as e:
-                print(f"Error with pdfplumber: {str(e)}. Falling back to PyPDF2.")
-                # Fall back to PyPDF2
+        main_frame = ttk.Frame(results_window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
         
-        # PyPDF2 fallback
-        try:
-            with open(filename, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                # Extract text from limited pages
-                num_pages = min(len(reader.pages), max_pages)
-                
-                for i in range(num_pages):
-                    try:
-                        page_text = reader.pages[i].extract_text() or ""
-                        if page_text.strip():
-                            text += page_text + "\n\n"
-                            
-                            # If we found substantial text, we can stop early for performance
-                            if len(text) > 2000:
-                                break
-                    except Exception as page_error:
-                        print(f"Error extracting text from page {i}: {str(page_error)}")
-                        continue
-                        
-                return text
-        except Exception as e:
-            print(f"Error extracting text with PyPDF2: {str(e)}")
-            return ""
-    
-    def extract_date_from_pdf(self, text):
-        # Clean up text - remove extra spaces and normalize
-        clean_text = re.sub(r'\s+', ' ', text)
+        # Results list with scrollbar
+        list_frame = ttk.Frame(main_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Look for common OCR errors in years and fix them
-        # Fix cases like "202 5" or "2 023" to "2025" or "2023"
-        clean_text = re.sub(r'(\b20\d{1,2})\s+(\d{1})\b', r'\1\2', clean_text)  # Fix split years like "202 5"
-        clean_text = re.sub(r'(\b2)\s+(\d{3})\b', r'\1\2', clean_text)  # Fix split years like "2 023"
-
-        # List of month names and abbreviations for pattern matching
-        months = r'(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)'
+        results_listbox = tk.Listbox(list_frame, font=("Courier", 10))
+        results_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        results_listbox.config(
+            bg=self.list_colors["bg"],
+            fg=self.list_colors["fg"],
+            selectbackground=self.list_colors["selectbackground"],
+            selectforeground=self.list_colors["selectforeground"]
+        )
         
-        # First try ISO format explicitly since it's unambiguous
-        iso_matches = re.findall(r'(\d{4})-(\d{2})-(\d{2})', clean_text)
-        if iso_matches:
-            for year, month, day in iso_matches:
-                try:
-                    year, month, day = int(year), int(month), int(day)
-                    # Validate month and day
-                    if 1 <= month <= 12 and 1 <= day <= 31 and 1900 <= year <= 2100:
-                        return datetime(year, month, day)
-                except:
-                    continue
+        scrollbar = ttk.Scrollbar(list_frame, command=results_listbox.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        results_listbox.config(yscrollcommand=scrollbar.set)
         
-        # Look for date patterns in the text - expanded with more patterns
-        date_patterns = [
-            # Standard formats with separators
-            r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})',  # DD/MM/YYYY or MM/DD/YYYY
-            r'(\d{2,4})[/.-](\d{1,2})[/.-](\d{1,2})',  # YYYY/MM/DD
-            
-            # Text formats
-            rf'(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({months})[,\s]+(\d{{2,4}})',  # DD Month YYYY
-            rf'({months})\s+(\d{{1,2}})(?:st|nd|rd|th)?[,\s]+(\d{{2,4}})',  # Month DD, YYYY
-            rf'({months})\s+(\d{{1,2}})(?:st|nd|rd|th)?[,\s]+(20\d{{2}})',  # Month DD 20XX specific for recent years
-            
-            # Formats with text month and no separators
-            rf'(\d{{1,2}})\s+({months})\s+(\d{{4}})',  # DD Month YYYY without commas
-            
-            # Special fixes for OCR errors
-            r'(\d{1,2})[/.-](\d{1,2})[/.-]\s*(\d{2,4})',  # Handle space before year
-            r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{2})(\d{2})',  # Split year like 20 23
-        ]
+        if not results:
+            results_listbox.insert(tk.END, "No matching documents")
+        for path, category, snippet in results:
+            results_listbox.insert(tk.END, f"{path}  [{category}]  {snippet}")
         
-        # Try our custom patterns first for more control
-        for pattern in date_patterns:
-            matches = re.findall(pattern, clean_text)
-            if matches:
-                for match in matches:
-                    try:
-                        # Turn tuple into a string for dateutil to parse
-                        date_str = ' '.join(str(part) for part in match if part)
-                        
-                        # Use parse to handle various date formats
-                        date = dateutil.parser.parse(date_str, fuzzy=True)
-                        
-                        # Ensure date is valid (year >= 1900 to avoid Windows formatting issues)
-                        if 1900 <= date.year <= 2100:  # Add reasonable upper bound
-                            return date
-                    except:
-                        continue
-                        
-        # Try dateutil parser as a fallback - with dayfirst=True to prioritize DD/MM/YYYY format
-        try:
-            date = dateutil.parser.parse(clean_text, fuzzy=True, dayfirst=True)
-            # Verify the date is reasonable (between 1900 and 2100)
-            if 1900 <= date.year <= 2100:
-                return date
-        except:
-            pass
-            
-        # Try explicit parsing with month names to avoid ambiguity
-        month_pattern = rf'({months})\s+(\d{{1,2}})[,\s]+(\d{{4}})'
-        month_matches = re.findall(month_pattern, clean_text)
-        if month_matches:
-            for match in month_matches:
-                try:
-                    month_name, day, year = match
-                    # Convert month name to month number
-                    month_str = month_name.lower()
-                    month_num = None
-                    
-                    # Map month names to numbers
-                    month_map = {
-                        'jan': 1, 'january': 1,
-                        'feb': 2, 'february': 2,
-                        'mar': 3, 'march': 3,
-                        'apr': 4, 'april': 4,
-                        'may': 5,
-                        'jun': 6, 'june': 6,
-                        'jul': 7, 'july': 7,
-                        'aug': 8, 'august': 8,
-                        'sep': 9, 'sept': 9, 'september': 9,
-                        'oct': 10, 'october': 10,
-                        'nov': 11, 'november': 11,
-                        'dec': 12, 'december': 12
-                    }
-                    
-                    for name, num in month_map.items():
-                        if name in month_str:
-                            month_num = num
-                            break
-                    
-                    if month_num and 1 <= int(day) <= 31:
-                        return datetime(int(year), month_num, int(day))
-                except:
-                    continue
+        def open_result(event=None):
+            if not results_listbox.curselection() or not results:
+                return
+            path = results[results_listbox.curselection()[0]][0]
+            if not os.path.exists(path):
+                messagebox.showerror("Error", f"File not found: {path}", parent=results_window)
+                return
+            self.open_path_external(path)
         
-        # If we get here, try more aggressive search for just a year
-        year_matches = re.findall(r'\b(19\d{2}|20\d{2})\b', clean_text)
-        if year_matches:
-            try:
-                # If we just found a year, use today's month and day with that year
-                today = datetime.now()
-                year = int(year_matches[0])
-                if 1900 <= year <= 2100:
-                    return datetime(year, today.month, today.day)
-            except:
-                pass
+        results_listbox.bind("<Double-Button-1>", open_result)
+        results_listbox.bind("<Return>", open_result)
         
-        return None
+        ttk.Button(main_frame, text="Close", command=results_window.destroy).pack(side=tk.RIGHT, pady=(10, 0))
     
-    def _process_date_matches(self, matches):
-        """Helper to process date matches from a pattern"""
-        if not matches:
-            return None
+    def open_pdf_external(self):
+        if not self.current_file or not os.path.exists(self.current_file):
+            messagebox.showinfo("Info", "No file selected")
+            return
             
-        for match in matches:
-            try:
-                # Try to determine date format
-                part1, part2, part3 = match[0], match[1], match[2]
-                
-                # Try to determine if it's YYYYMMDD, DDMMYYYY, etc.
-                if len(part1) == 4:  # First part is 4 digits, likely YYYY
-                    # YYYY-MM-DD format
-                    year = int(part1)
-                    month = int(part2)
-                    day = int(part3)
-                elif len(part3) == 4:  # Last part is 4 digits, likely YYYY
-                    # DD-MM-YYYY or MM-DD-YYYY format
-                    # Check plausible ranges to determine which is day vs month
-                    if int(part1) <= 31 and int(part2) <= 12:
-                        # Likely DD-MM-YYYY
-                        day = int(part1)
-                        month = int(part2)
-                        year = int(part3)
-                    elif int(part1) <= 12 and int(part2) <= 31:
-                        # Likely MM-DD-YYYY
-                        month = int(part1)
-                        day = int(part2)
-                        year = int(part3)
-                    else:
-                        continue  # Invalid date format
-                else:
-                    # Handle 2-digit years
-                    if int(part1) <= 31 and int(part2) <= 12:
-                        # Likely DD-MM-YY
-                        day = int(part1)
-                        month = int(part2)
-                        year = 2000 + int(part3) if int(part3) < 50 else 1900 + int(part3)
-                    elif int(part1) <= 12 and int(part2) <= 31:
-                        # Likely MM-DD-YY
-                        month = int(part1)
-                        day = int(part2)
-                        year = 2000 + int(part3) if int(part3) < 50 else 1900 + int(part3)
-                    else:
-                        # Try YY-MM-DD
-                        year = 2000 + int(part1) if int(part1) < 50 else 1900 + int(part1)
-                        month = int(part2)
-                        day = int(part3)
-                
-                # Validate month and day
-                if not (1 <= month <= 12 and 1 <= day <= 31):
-                    continue
-                
-                # Additional validation - check if day is valid for the given month and year
-                max_days = 31
-                if month in [4, 6, 9, 11]:  # Apr, Jun, Sep, Nov
-                    max_days = 30
-                elif month == 2:  # February
-                    # Check for leap year
-                    if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0):
-                        max_days = 29
-                    else:
-                        max_days = 28
-                
-                if day > max_days:
-                    continue
+        self.open_path_external(self.current_file)
+    
+    def open_path_external(self, path):
+        """Open a file in the system default viewer"""
+        try:
+            if platform.system() == 'Darwin':  # macOS
+                subprocess.call(('open', path))
+            elif platform.system() == 'Windows':  # Windows
+                os.startfile(os.path.abspath(path))
+            else:  # Linux variants
+                subprocess.call(('xdg-open', path))
                 
-                # Ensure year is valid for Windows (>= 1900)
-                if year < 1900 or year > 2100:
-                    continue
-                    
-                # Create date object
-                return datetime(year, month, day)
-            except:
-                continue
-        
-        return None
+            self.status_var.set(f"Opened {path} in external viewer")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open file: {str(e)}")
+    
+    def extract_text_from_pdf(self, filename, max_pages=3, ingested=None):
+        """Extract text from PDF file (see extract_pdf_text)"""
+        return extract_pdf_text(filename, max_pages, ingested)
+    
+    def extract_date_from_pdf(self, text):
+        """Detect the document date from extracted text or a NormalizedDocument"""
+        return self.extract_date_with_confidence(text)[0]
+    
+    def extract_date_with_confidence(self, text):
+        """Return (date, confidence, ranked candidates) using the configured day/month order"""
+        # Ambiguous numeric dates like 03/04/2024 are read in the order of the configured date format
+        dayfirst = self.settings.get("date_format", "ddmmyy") != "mmddyy"
+        return extract_date_with_confidence(text, dayfirst)
     
     def format_date(self, date_obj):
         """Format a date object according to the current date format setting"""
@@ -1967,75 +5530,12 @@ class PDFOrganizer(tk.Tk):
             return date_obj.strftime("%d%m%y")  # Default
     
     def extract_date_from_filename(self, filename):
-        # Clean filename - remove potential OCR artifacts
-        clean_filename = re.sub(r'\s+', '', filename)  # Remove all spaces
-        
-        # First try ISO format explicitly
-        iso_matches = re.findall(r'(\d{4})[_-]?(\d{2})[_-]?(\d{2})', clean_filename)
-        if iso_matches:
-            for year_str, month_str, day_str in iso_matches:
-                try:
-                    year, month, day = int(year_str), int(month_str), int(day_str)
-                    if 1900 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
-                        return datetime(year, month, day)
-                except:
-                    pass
-        
-        # Try to find date pattern in filename - expanded patterns
-        date_patterns = [
-            r'(\d{2})(\d{2})(\d{2,4})',  # DDMMYY or DDMMYYYY
-            r'(\d{2,4})(\d{2})(\d{2})',  # YYYYMMDD or YYMMDD
-            r'(\d{2})[_-](\d{2})[_-](\d{2,4})',  # DD-MM-YY or DD_MM_YYYY
-            r'(\d{2})[_-](\d{2})[_-](\d{2})'     # YY-MM-DD
-        ]
-        
-        # First try clean filename
-        for pattern in date_patterns:
-            matches = re.findall(pattern, clean_filename)
-            found_date = self._process_date_matches(matches)
-            if found_date:
-                return found_date
-        
-        # If that fails, try the original filename
-        for pattern in date_patterns:
-            matches = re.findall(pattern, filename)
-            found_date = self._process_date_matches(matches)
-            if found_date:
-                return found_date
-                
-        return None
+        """Date embedded in a filename (see date_from_filename)"""
+        return date_from_filename(filename)
     
     def detect_category(self, text):
-        # Convert text to lowercase for case-insensitive matching
-        text_lower = text.lower()
-        
-        # Normalize spaces in text (replace multiple spaces with single space)
-        normalized_text = re.sub(r'\s+', ' ', text_lower)
-        
-        best_match = None
-        max_matches = 0
-        
-        # Check each category's keywords
-        for category, data in self.categories.items():
-            keywords = data.get("keywords", [])
-            if not keywords:
-                continue
-                
-            matches = 0
-            for keyword in keywords:
-                # Normalize spaces in keyword too
-                normalized_keyword = re.sub(r'\s+', ' ', keyword.lower())
-                
-                # Try both original and normalized matching
-                if normalized_keyword in normalized_text or keyword.lower() in text_lower:
-                    matches += 1
-            
-            # Update if this category has more matching keywords
-            if matches > max_matches:
-                max_matches = matches
-                best_match = category
-        
-        return best_match
+        """Detect the best matching category from extracted text or a NormalizedDocument"""
+        return self.detect_category_with_confidence(text)[0]
     
     def apply_detected(self):
         detected = self.detected_var.get()
@@ -2157,6 +5657,8 @@ class PDFOrganizer(tk.Tk):
                 
                 # Rename the file
                 os.rename(file_path, new_path)
+                self.search_index.rename(file_path, new_path)
+                self.catalog.rename(file_path, new_path)
                 
                 # Update the current file reference
                 self.current_file = new_path
@@ -2172,9 +5674,8 @@ class PDFOrganizer(tk.Tk):
                 # Update status
                 self.status_var.set(f"Renamed '{original_name}' to '{new_name}'")
                 
-                # If the renamed file is in the all_pdfs list, update it
-                if original_name in self.all_pdfs:
-                    self.all_pdfs[self.all_pdfs.index(original_name)] = new_name
+                # Keep the listing and its filter index in step with the rename
+                self._rename_in_listing(original_name, new_name)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not rename file: {str(e)}")
             
@@ -2250,24 +5751,23 @@ class PDFOrganizer(tk.Tk):
             messagebox.showinfo("Info", f"Category '{category}' not found")
             return
             
-        # Get folder from category
-        category_data = self.categories[category]
-        folder = category_data.get("folder", category.capitalize())
+        # Get date (remove dashes for filename)
+        date = date_input.replace("-", "")
+        filed_date = parse_filename_date(date, self.settings.get("date_format", "ddmmyy"))
         
-        # Ensure folder exists
-        if not os.path.exists(folder):
-            try:
-                os.makedirs(folder)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not create folder: {str(e)}")
-                return
+        # Get folder from category (and date, for sharded categories), creating it on first use
+        category_data = self.categories[category]
+        folder = self.folder_for_document(category, filed_date)
+        if folder is None:
+            messagebox.showerror("Error", f"Could not create folder for category '{category}'")
+            return
+        if not self.ensure_folder(self.sorted_folder):
+            messagebox.showerror("Error", f"Could not create folder: {self.sorted_folder}")
+            return
                 
         # Get abbreviation
         abbreviation = category_data.get("abbreviation", "")
         
-        # Get date (remove dashes for filename)
-        date = date_input.replace("-", "")
-        
         # Get specific name
         specific = self.specific_var.get().strip()
         
@@ -2296,32 +5796,45 @@ class PDFOrganizer(tk.Tk):
         
         try:
             # Copy file to category folder with new name
-            shutil.copy2(self.current_file, destination)
+            durability = self.durability_journal()
+            copy_file(self.current_file, destination, durability)
             
-            # Move original file to sorted folder
-            sorted_destination = os.path.join(self.sorted_folder, os.path.basename(self.current_file))
+            # Make the filed document searchable using the text we already extracted
+            try:
+                self.search_index.add_document(destination, category, self.current_text)
+                if self.current_ingested:
+                    self.fingerprints.add(self.current_ingested.sha256, NormalizedDocument(self.current_text).fingerprint)
+            except Exception as e:
+                print(f"Error updating search index: {str(e)}")
             
-            # Check if a file with the same name already exists in the sorted folder
-            if os.path.exists(sorted_destination):
-                # Add a timestamp to make filename unique
-                filename, ext = os.path.splitext(os.path.basename(self.current_file))
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                sorted_destination = os.path.join(self.sorted_folder, f"{filename}_{timestamp}{ext}")
+            # Learn from a category the user picked that keyword detection did not suggest
+            if self.current_text and category != self.detected_var.get():
+                self.learned_model.learn(self.current_text, category)
+                self.save_learned_model()
             
-            # Move the original file to sorted folder
-            shutil.move(self.current_file, sorted_destination)
+            # Move the original file to sorted folder (or its deduplicated store)
+            sorted_destination = self.archive_original(
+                self.current_file,
+                self.current_ingested.sha256 if self.current_ingested else None,
+                self.current_ingested.size if self.current_ingested else None,
+                copy_from=destination,
+                durability=durability
+            )
+            durability.commit(self.fs)
             
-            # Remove the file from the all_pdfs list
-            original_filename = os.path.basename(self.current_file)
-            if original_filename in self.all_pdfs:
-                self.all_pdfs.remove(original_filename)
-                
-            # Update total pages
-            self.total_pages = max(1, (len(self.all_pdfs) + self.page_size - 1) // self.page_size)
+            # Record both copies in the catalog so the folder views pick them up without a rescan
+            try:
+                size = self.current_ingested.size if self.current_ingested else None
+                sha256 = self.current_ingested.sha256 if self.current_ingested else None
+                self.catalog.add_entries([
+                    (destination, category, filed_date, size, sha256),
+                    (sorted_destination, category, filed_date, size, sha256)
+                ])
+            except Exception as e:
+                print(f"Error updating catalog: {str(e)}")
             
-            # Ensure current page is valid
-            if self.current_page > self.total_pages:
-                self.current_page = self.total_pages
+            # Remove the file from the listing (this also recalculates the pages)
+            self._remove_from_listing(os.path.basename(self.current_file))
             
             self.status_var.set(f"File saved as {destination} and original moved to {self.sorted_folder} folder")
             
@@ -2345,10 +5858,7 @@ class PDFOrganizer(tk.Tk):
                 # Skip folders and navigation items
                 if item_text != ".." and not (item_text.startswith("[") and item_text.endswith("]")):
                     # Determine the full path based on current folder
-                    if self.current_folder:
-                        filename = os.path.join(self.current_folder, item_text)
-                    else:
-                        filename = item_text
+                    filename = self.listed_path(item_text)
                         
                     # Load the selected file if it exists
                     if os.path.exists(filename):
@@ -2366,8 +5876,11 @@ class PDFOrganizer(tk.Tk):
                             # Display text in text box
                             self.text_box.insert(tk.END, self.current_text[:10000])  # Limit display for performance
                             
+                            # Normalize once and share the document with both detectors
+                            document = NormalizedDocument(self.current_text)
+                            
                             # Auto-fill date field
-                            detected_date = self.extract_date_from_pdf(self.current_text)
+                            detected_date = self.extract_date_from_pdf(document)
                             if not detected_date:
                                 # Try to extract from filename if not found in content
                                 detected_date = self.extract_date_from_filename(os.path.basename(filename))
@@ -2382,7 +5895,7 @@ class PDFOrganizer(tk.Tk):
                                 self.detected_date_var.set("")
                             
                             # Auto-detect category
-                            detected_category = self.detect_category(self.current_text)
+                            detected_category = self.detect_category(document)
                             if detected_category:
                                 self.detected_var.set(detected_category)
                                 # Also set the category for preview
@@ -2446,9 +5959,17 @@ class PDFOrganizer(tk.Tk):
         # Close the dialog
         return True
     
-    def auto_process_all(self):
-        """Automatically process all PDFs in the current directory using background threads"""
-        if not self.all_pdfs:
+    def auto_process_all(self, dry_run=False, roots=None):
+        """Automatically process all PDFs in the current directory using background threads
+        
+        On a dry run the filing plan is shown before anything is moved. With roots, only the
+        PDFs waiting in those inbox roots are processed.
+        """
+        if not self.wait_for_startup():
+            return
+        self.filing_dry_run = dry_run
+        pdf_files = self.all_pdfs if roots is None else list_inbox_roots(roots, self.fs)
+        if not pdf_files:
             messagebox.showinfo("Info", "No PDF files found to process")
             return
             
@@ -2458,13 +5979,29 @@ class PDFOrganizer(tk.Tk):
             return
             
         # Ask for confirmation
-        if not messagebox.askyesno("Confirm", f"This will automatically process {len(self.all_pdfs)} PDF files.\nContinue?"):
+        if not messagebox.askyesno("Confirm", f"This will automatically process {len(pdf_files)} PDF files.\nContinue?"):
             return
+        
+        # Put back anything a crashed instance (or an interrupted run of ours) left claimed
+        for claims in self.inbox_claims.values():
+            try:
+                claims.release_all()
+                claims.reclaim_stale()
+            except OSError as e:
+                print(f"Error checking inbox leases: {str(e)}")
     
         # Create a queue for thread communication
+        self.analysis_canceled = False
+        self.claimed_elsewhere = 0
         self.analysis_queue = queue.Queue()
         self.analysis_results = {}
         self.manual_processing_needed = []
+        
+        # Inbox roots whose workers finish early are filed while the others are still analyzed
+        self.inbox_threads = {}
+        self.inbox_filed_early = set()
+        self.early_filed = 0
+        self.early_filing = False
     
         # Create progress dialog for analysis
         analysis_window = tk.Toplevel(self)
@@ -2496,7 +6033,7 @@ class PDFOrganizer(tk.Tk):
         
         # Progress bar
         analysis_progress_var = tk.DoubleVar(value=0.0)
-        analysis_progress_bar = ttk.Progressbar(analysis_frame, variable=analysis_progress_var, maximum=len(self.all_pdfs))
+        analysis_progress_bar = ttk.Progressbar(analysis_frame, variable=analysis_progress_var, maximum=len(pdf_files))
         analysis_progress_bar.pack(fill=tk.X, pady=(0, 10))
         
         # Cancel button
@@ -2510,57 +6047,133 @@ class PDFOrganizer(tk.Tk):
         # Start worker threads to analyze PDFs
         self.worker_threads = []
         max_threads = max(1, min(8, (os.cpu_count() or 4) - 1))  # Use up to N-1 CPU cores, max 8
-    
-        # Split files among threads
-        files_per_thread = [[] for _ in range(max_threads)]
-        for i, pdf_file in enumerate(self.all_pdfs):
-            files_per_thread[i % max_threads].append(pdf_file)
-    
-        # Start threads
-        for thread_files in files_per_thread:
-            if not thread_files:
-                continue
-            thread = threading.Thread(target=self.analyze_pdfs_thread, args=(thread_files,))
-            thread.daemon = True
-            self.worker_threads.append(thread)
-            thread.start()
+        
+        # Each inbox root gets its own threads, so a large dump in one cannot hold up another
+        files_per_root = {}
+        for pdf_file in pdf_files:
+            files_per_root.setdefault(self.inbox_root_of(pdf_file), []).append(pdf_file)
+        default_threads = max(1, max_threads // len(files_per_root))
+        
+        for root, root_files in files_per_root.items():
+            root_threads = (root or {}).get("workers") or default_threads
+            
+            # Split files among threads
+            files_per_thread = [[] for _ in range(root_threads)]
+            for i, pdf_file in enumerate(root_files):
+                files_per_thread[i % root_threads].append(pdf_file)
+        
+            # Start threads
+            for thread_files in files_per_thread:
+                if not thread_files:
+                    continue
+                thread = threading.Thread(target=self.analyze_pdfs_thread, args=(thread_files, root))
+                thread.daemon = True
+                self.worker_threads.append(thread)
+                self.inbox_threads.setdefault((root or {}).get("path"), []).append(thread)
+                thread.start()
     
         # Schedule progress check
-        self.after(100, lambda: self.check_analysis_progress(len(self.all_pdfs)))
+        self.after(100, lambda: self.check_analysis_progress(len(pdf_files)))
 
+    def inbox_root_of(self, pdf_file):
+        """The configured inbox root a listed file is waiting in (None outside the inbox roots)"""
+        folder = os.path.normpath(os.path.dirname(pdf_file) or ".")
+        for root in self.inbox_roots:
+            if root["path"] == folder:
+                return root
+        return None
+    
     def cancel_analysis(self, window=None):
         """Cancel the analysis process"""
         self.analysis_canceled = True
         if window:
             window.destroy()
+        # An inbox being filed early gives its files back once its filing is done
+        if not self.early_filing:
+            self.release_claimed_files(self.worker_threads)
+    
+    def release_claimed_files(self, threads=()):
+        """Give files this instance claimed from a shared inbox back, once the given workers have stopped"""
+        if not self.inbox_claims:
+            return
+        
+        def release():
+            for thread in threads:
+                thread.join()
+            try:
+                released = sum(claims.release_all() for claims in self.inbox_claims.values())
+            except OSError as e:
+                print(f"Error releasing claimed files: {str(e)}")
+                return
+            if released and not self.current_folder:
+                self.call_in_ui(self.load_all_pdfs)
+        
+        threading.Thread(target=release, daemon=True).start()
 
-    def analyze_pdfs_thread(self, pdf_files):
-        """Worker thread to analyze PDFs"""
+    def analyze_pdfs_thread(self, pdf_files, root=None):
+        """Worker thread to analyze PDFs (waiting in the given inbox root)"""
+        claims = self.inbox_claims.get(root["path"]) if root else None
+        inbox = root["name"] if root else None
+        inbox_path = root["path"] if root else None
         for pdf_file in pdf_files:
             if self.analysis_canceled:
                 return
+            listed_name = pdf_file  # Claiming moves the file; the inbox listing keeps this name
                 
             try:
+                if claims is not None:
+                    staged = claims.claim(pdf_file)
+                    if staged is None:
+                        # Another instance sharing the inbox got to this file first
+                        self.analysis_queue.put({"pdf_file": pdf_file, "claimed_elsewhere": True})
+                        continue
+                    pdf_file = staged
+                
                 if os.path.exists(pdf_file):
+                    # Read the file once; hashing and both parser backends share this buffer
+                    ingested = ingest_pdf(pdf_file)
+                    
+                    # Byte-identical to something already archived: no parsing needed at all
+                    known_copy = self.find_known_copy(ingested.sha256)
+                    if known_copy:
+                        self.analysis_queue.put({
+                            "pdf_file": pdf_file,
+                            "known_copy": known_copy[0],
+                            "category": known_copy[1],
+                            "file_size": ingested.size,
+                            "sha256": ingested.sha256,
+                            "bytes_read": ingested.bytes_read,
+                            "inbox": inbox,
+                            "inbox_path": inbox_path,
+                            "listed_name": listed_name
+                        })
+                        continue
+                    parse_start = time.perf_counter()
+                    
                     # Extract text from PDF
-                    pdf_text = self.extract_text_from_pdf(pdf_file)
+                    pdf_text = self.extract_text_from_pdf(pdf_file, ingested=ingested)
                     
-                    # Extract date
-                    detected_date = self.extract_date_from_pdf(pdf_text)
-                    if not detected_date:
-                        detected_date = self.extract_date_from_filename(pdf_file)
+                    # Date and category, detected with the categories published when this file started
+                    # (ambiguous numeric dates are read in the order of the configured date format)
+                    dayfirst = self.settings.get("date_format", "ddmmyy") != "mmddyy"
+                    result = analyze_text(pdf_file, pdf_text, self.category_snapshot, self.learned_model, dayfirst)
                     
-                    # Detect category
-                    detected_category, confidence = self.detect_category_with_confidence(pdf_text)
+                    # Rescans of a filed document differ byte-wise but not in their text
+                    near_duplicate = self.find_near_duplicate(result["fingerprint"], ingested.sha256)
                     
                     # Store results
-                    result = {
+                    result.update({
                         "pdf_file": pdf_file,
-                        "text": pdf_text,
-                        "date": detected_date,
-                        "category": detected_category,
-                        "confidence": confidence
-                    }
+                        "file_size": ingested.size,
+                        "sha256": ingested.sha256,
+                        "bytes_read": ingested.bytes_read,
+                        "parse_seconds": time.perf_counter() - parse_start,
+                        "inbox": inbox,
+                        "inbox_path": inbox_path,
+                        "listed_name": listed_name
+                    })
+                    if near_duplicate:
+                        result["near_duplicate"], result["near_distance"] = near_duplicate
                     
                     # Put in queue
                     self.analysis_queue.put(result)
@@ -2576,6 +6189,10 @@ class PDFOrganizer(tk.Tk):
             return
                 
         try:
+            # Roots whose workers stopped before the queue is drained below have all their results in
+            finished = [path for path, threads in self.inbox_threads.items()
+                        if path not in self.inbox_filed_early and not any(t.is_alive() for t in threads)]
+            
             # Process all available results in the queue
             processed = 0
             while not self.analysis_queue.empty():
@@ -2587,32 +6204,163 @@ class PDFOrganizer(tk.Tk):
                 self.current_file_var.set(f"Analyzing: {pdf_file}")
                 
                 # Store the result
-                if "error" in result:
+                if result.get("claimed_elsewhere"):
+                    self.claimed_elsewhere += 1
+                elif "error" in result:
                     # Mark for manual processing on error
                     self.manual_processing_needed.append(pdf_file)
                 else:
                     self.analysis_results[pdf_file] = result
                     # Check if needs manual processing
-                    if not result.get("date") or not result.get("category") or result.get("confidence", 0) < 1:
+                    if self.needs_manual_review(result):
                         self.manual_processing_needed.append(pdf_file)
                 
                 # Update progress bar
-                current = len(self.analysis_results) + len(self.manual_processing_needed) 
+                current = len(self.analysis_results) + len(self.manual_processing_needed) + self.claimed_elsewhere
                 self.analysis_progress_var.set(current)
             
-            # Check if all threads are done
-            active_threads = sum(1 for t in self.worker_threads if t.is_alive())
+            # Check if all threads are done
+            active_threads = sum(1 for t in self.worker_threads if t.is_alive())
+            
+            # A small inbox is filed as soon as it is done rather than waiting for a large dump
+            # (one at a time, and not on dry runs, which preview the whole run)
+            if (active_threads and finished and not self.early_filing and not self.filing_dry_run
+                    and not self.settings.get("preview_filing_plan", False)):
+                self.file_finished_inbox(finished[0])
+            
+            if active_threads == 0 and self.analysis_queue.empty() and not self.early_filing:
+                # All threads completed
+                self.finish_analysis()
+            else:
+                # Check again after a delay
+                self.after(100, lambda: self.check_analysis_progress(total_files))
+                
+        except Exception as e:
+            print(f"Error in progress update: {str(e)}")
+            self.after(100, lambda: self.check_analysis_progress(total_files))
+
+    def file_finished_inbox(self, inbox_path):
+        """File what an inbox root's finished workers were sure about; its reviews wait for the run's end"""
+        self.inbox_filed_early.add(inbox_path)
+        results = {pdf_file: data for pdf_file, data in self.analysis_results.items()
+                   if data.get("inbox_path") == inbox_path}
+        if self.apply_category_classifier(results):
+            self.manual_processing_needed = [
+                pdf_file for pdf_file in self.manual_processing_needed
+                if pdf_file not in results or self.needs_manual_review(results[pdf_file])
+            ]
+        manual = set(self.manual_processing_needed)
+        ready = {pdf_file: data for pdf_file, data in results.items() if pdf_file not in manual}
+        if not ready:
+            return
+        
+        # Filed now, so the run's final plan (made after this filing finished) sees these files on disk
+        for pdf_file in ready:
+            del self.analysis_results[pdf_file]
+        self.early_filed += len(ready)
+        self.early_filing = True
+        self.execute_filing_plan(self.plan_filing(ready), ready, early=True)
+
+    def needs_manual_review(self, result):
+        """Whether an analysis result is too uncertain to file automatically"""
+        # Already-archived documents need no decision
+        if result.get("known_copy"):
+            return False
+        
+        # Near-duplicates of filed documents can be sent to a person by policy
+        if result.get("near_duplicate") and self.settings.get("near_duplicate_action", "flag") == "review":
+            return True
+        return needs_review(
+            result,
+            self.settings.get("classifier_threshold", CLASSIFIER_THRESHOLD),
+            self.settings.get("date_confidence_threshold", DATE_CONFIDENCE_THRESHOLD)
+        )
+
+    def save_learned_model(self):
+        """Write the learned category model to disk if it changed"""
+        try:
+            self.learned_model.save()
+        except Exception as e:
+            print(f"Error saving learned categories: {str(e)}")
+
+    def record_manual_review_rate(self, total_files, manual_files):
+        """Append this run's manual-review fraction to the history kept in settings"""
+        history = self.settings.get("manual_review_history", [])
+        history.append({
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "files": total_files,
+            "manual": manual_files
+        })
+        # Keep the most recent runs only
+        self.settings["manual_review_history"] = history[-20:]
+        self.save_settings()
+
+    def manual_review_summary(self):
+        """Summary lines comparing this run's manual-review fraction with the previous run"""
+        history = self.settings.get("manual_review_history", [])
+        if not history:
+            return []
+        current = history[-1]
+        fraction = current["manual"] / current["files"] if current["files"] else 0.0
+        line = f"Needed manual review: {current['manual']} of {current['files']} files ({fraction:.0%})"
+        if len(history) > 1 and history[-2]["files"]:
+            previous = history[-2]["manual"] / history[-2]["files"]
+            line += f", previous run {previous:.0%}"
+        return [line]
+
+    def load_category_classifier(self):
+        """Load the trained classifier if one exists, reloading it when the model file changes"""
+        if not NUMPY_AVAILABLE or not os.path.exists(CLASSIFIER_MODEL_FILE):
+            self.category_classifier = None
+            return None
+            
+        mtime = os.path.getmtime(CLASSIFIER_MODEL_FILE)
+        if getattr(self, 'category_classifier', None) is None or mtime != getattr(self, 'classifier_mtime', None):
+            try:
+                self.category_classifier = CategoryClassifier.load(CLASSIFIER_MODEL_FILE)
+                self.classifier_mtime = mtime
+            except Exception as e:
+                print(f"Error loading category classifier: {str(e)}")
+                self.category_classifier = None
+        return self.category_classifier
+
+    def apply_category_classifier(self, analysis_results):
+        """Classify all analyzed documents in one batch and fill in categories keywords missed
+        
+        Returns True if the classifier ran.
+        """
+        return apply_classifier(self.load_category_classifier(), analysis_results, self.categories)
+
+    def train_category_classifier(self):
+        """Train the category classifier from already-filed documents in the background"""
+        if not self.wait_for_startup():
+            return
+        if not NUMPY_AVAILABLE:
+            messagebox.showinfo("Classifier", "Training the classifier requires numpy:\n\npip install numpy")
+            return
             
-            if active_threads == 0 and self.analysis_queue.empty():
-                # All threads completed
-                self.finish_analysis()
-            else:
-                # Check again after a delay
-                self.after(100, lambda: self.check_analysis_progress(total_files))
-                
-        except Exception as e:
-            print(f"Error in progress update: {str(e)}")
-            self.after(100, lambda: self.check_analysis_progress(total_files))
+        if not messagebox.askyesno("Train Classifier",
+                                   "This reads every PDF in the category folders to train the classifier "
+                                   "and may take a while. Continue?"):
+            return
+            
+        # The training thread reads an immutable snapshot, so edits meanwhile cannot tear it
+        categories = self.category_snapshot.categories
+        
+        def report(count, path):
+            if count % 50 == 0:
+                self.call_in_ui(lambda: self.status_var.set(f"Training classifier: read {count} documents"))
+        
+        def train():
+            try:
+                _, used = train_classifier_from_folders(categories, progress=report)
+                message = f"Classifier trained on {used} documents"
+            except Exception as e:
+                message = f"Classifier training failed: {str(e)}"
+            self.call_in_ui(lambda: self.status_var.set(message))
+        
+        threading.Thread(target=train, daemon=True).start()
+        self.status_var.set("Training classifier...")
 
     def finish_analysis(self):
         """Complete the analysis and proceed with processing"""
@@ -2622,6 +6370,17 @@ class PDFOrganizer(tk.Tk):
         
         if self.analysis_canceled:
             return
+        
+        # Classify the whole batch with the trained model and release files it is sure about
+        if self.apply_category_classifier(self.analysis_results):
+            self.manual_processing_needed = [
+                pdf_file for pdf_file in self.manual_processing_needed
+                if pdf_file not in self.analysis_results or self.needs_manual_review(self.analysis_results[pdf_file])
+            ]
+        
+        # Track how many files needed a human this run
+        total_files = len(set(self.analysis_results) | set(self.manual_processing_needed)) + self.early_filed
+        self.record_manual_review_rate(total_files, len(self.manual_processing_needed))
                 
         # Handle manual processing if needed
         if self.manual_processing_needed:
@@ -2650,6 +6409,9 @@ class PDFOrganizer(tk.Tk):
     def handle_manual_processing(self, index=0):
         """Handle manual processing of files one at a time"""
         if index >= len(self.manual_processing_needed) or self.analysis_canceled:
+            # Persist what was learned from this session's decisions
+            self.save_learned_model()
+            
             # All manual files processed, proceed with automated processing
             self.process_analyzed_files(self.analysis_results)
             return
@@ -2708,6 +6470,10 @@ class PDFOrganizer(tk.Tk):
                        ("\n\n[...content truncated...]" if len(pdf_text) > 2000 else ""))
         text_box.config(state="disabled")  # Make read-only
         
+        # Rescans of filed documents are pointed out before the decision
+        if pdf_data.get("near_duplicate"):
+            ttk.Label(info_frame, text=f"Looks like a rescan of {pdf_data['near_duplicate']}").pack(anchor=tk.W, pady=(0, 10))
+        
         # Category selection
         category_frame = ttk.Frame(info_frame)
         category_frame.pack(fill=tk.X, pady=(0, 5))
@@ -2734,20 +6500,17 @@ class PDFOrganizer(tk.Tk):
         date_var = tk.StringVar()
         # Format the date if available
         if pdf_data.get("date"):
-            detected_date = pdf_data["date"]
-            if date_format == "ddmmyy":
-                formatted_date = detected_date.strftime("%d%m%y")
-            elif date_format == "mmddyy":
-                formatted_date = detected_date.strftime("%m%d%y")
-            elif date_format == "yymmdd":
-                formatted_date = detected_date.strftime("%y%m%d")
-            else:
-                formatted_date = detected_date.strftime("%d%m%y")  # Default
-            date_var.set(formatted_date)
+            date_var.set(self.format_date(pdf_data["date"]))
         
-        date_entry = ttk.Entry(date_frame, textvariable=date_var, width=8)
+        # Offer the other ranked candidates so a doubtful date can be corrected without retyping
+        date_entry = ttk.Combobox(date_frame, textvariable=date_var, width=8)
+        date_entry['values'] = [self.format_date(date) for date in pdf_data.get("date_candidates", [])]
         date_entry.pack(side=tk.LEFT, padx=5)
         
+        if pdf_data.get("date"):
+            confidence_text = f"{pdf_data.get('date_confidence', 0.0):.0%} sure"
+            ttk.Label(date_frame, text=confidence_text).pack(side=tk.LEFT)
+        
         # Store the result
         result_data = {
             "processed": False,
@@ -2844,6 +6607,11 @@ class PDFOrganizer(tk.Tk):
                 self.analysis_results[pdf_file] = {}
             self.analysis_results[pdf_file]["manual_category"] = result_data["category"]
             self.analysis_results[pdf_file]["manual_date"] = result_data["date"]
+            
+            # Learn from the decision so similar documents are recognized next run
+            document = pdf_data.get("document") or pdf_data.get("text")
+            if document:
+                self.learned_model.learn(document, result_data["category"])
         else:
             # Mark for further processing folder if skipped
             if pdf_file not in self.analysis_results:
@@ -2854,58 +6622,260 @@ class PDFOrganizer(tk.Tk):
         self.after(100, lambda: self.handle_manual_processing(index + 1))
 
     def verify_folders_before_processing(self):
-        """Ensure all needed folders exist before processing files"""
-        # Check if needs_processing_folder exists
-        if not os.path.exists(self.needs_processing_folder):
-            try:
-                os.makedirs(self.needs_processing_folder)
-                print(f"Created missing folder: {self.needs_processing_folder}")
-            except Exception as e:
-                print(f"Error creating folder {self.needs_processing_folder}: {str(e)}")
-                return False
-        
-        # Check if sorted_folder exists
-        if not os.path.exists(self.sorted_folder):
-            try:
-                os.makedirs(self.sorted_folder)
-                print(f"Created missing folder: {self.sorted_folder}")
-            except Exception as e:
-                print(f"Error creating folder {self.sorted_folder}: {str(e)}")
-                return False
-        
-        # Verify all category folders exist
-        for category, data in self.categories.items():
-            folder_path = data.get("folder", category.capitalize())
-            if not os.path.exists(folder_path):
-                try:
-                    os.makedirs(folder_path)
-                    print(f"Created missing folder: {folder_path}")
-                except Exception as e:
-                    # Try to create a simplified version
-                    print(f"Error creating folder '{folder_path}': {str(e)}")
-                    simplified_path = re.sub(r'[\\/:*?"<>|]', '_', category.capitalize())
-                    try:
-                        if not os.path.exists(simplified_path):
-                            os.makedirs(simplified_path)
-                        # Update the category with the simplified path
-                        self.categories[category]["folder"] = simplified_path
-                        print(f"Created simplified folder '{simplified_path}' instead")
-                    except Exception as e2:
-                        print(f"Error creating simplified folder '{simplified_path}': {str(e2)}")
-                        return False
-        
-        # If we got here, all folders exist or were created
-        return True
+        """Ensure the sorted and needs-processing folders exist; category folders are created when first used"""
+        return not self.ensure_folders([self.needs_processing_folder, self.sorted_folder])
 
     def process_analyzed_files(self, analysis_results):
-        """Process files based on analysis results"""
+        """Plan where every analyzed file goes, then carry out the plan (after a preview on a dry run)"""
         if not analysis_results:
+            self.release_claimed_files()
             return
         
         # Verify all needed folders exist before starting
         if not self.verify_folders_before_processing():
             messagebox.showerror("Error", "Unable to create necessary folders. Please check folder permissions and try again.")
+            self.release_claimed_files()
+            return
+        
+        plan = self.plan_filing(analysis_results)
+        if self.filing_dry_run or self.settings.get("preview_filing_plan", False):
+            self.show_filing_plan(plan, analysis_results)
+        else:
+            self.execute_filing_plan(plan, analysis_results)
+    
+    def planned_folder(self, category, filed_date):
+        """Folder a document would be filed into, without creating anything"""
+        data = self.categories.get(category, {})
+        return shard_folder(data.get("folder", category.capitalize()), category_layout(data), filed_date)
+    
+    def likely_filing_folders(self, analysis_results):
+        """Folders a batch will probably be filed into, for listing ahead of planning"""
+        date_format = self.settings.get("date_format", "ddmmyy")
+        folders = {self.needs_processing_folder, self.sorted_folder}
+        for data in analysis_results.values():
+            category = data.get("manual_category") or data.get("category")
+            if category:
+                date = parse_filename_date(data["manual_date"], date_format) if "manual_date" in data else data.get("date")
+                folders.add(self.planned_folder(category, date))
+        return folders
+    
+    def plan_sorted_destination(self, plan, pdf_file, data):
+        """Where the original of a filed document goes: its blob, or a free name in sorted"""
+        if self.using_blob_store() and data.get("sha256"):
+            return self.sorted_store.blob_path(data["sha256"])
+        return plan.claim(self.sorted_folder, os.path.basename(pdf_file), "timestamp")
+    
+    def plan_filing(self, analysis_results):
+        """Decide every destination, collision suffix and sorted name for a batch; nothing is moved"""
+        plan = FilingPlan()
+        date_format = self.settings.get("date_format", "ddmmyy")
+        
+        # Track processed date+category combinations to avoid duplicates
+        processed_combinations = set()
+        
+        # Content already in the archive (or filed earlier in this batch) is not filed again
+        known_action = self.settings.get("known_document_action", "skip")
+        planned_hashes = {}
+        
+        # Near-duplicates of filed documents are flagged, reviewed or set aside by policy
+        near_action = self.settings.get("near_duplicate_action", "flag")
+        near_distance = self.settings.get("near_duplicate_distance", NEAR_DUPLICATE_DISTANCE)
+        planned_bands = {}  # (band, value) -> [(fingerprint, destination)] planned in this batch
+        
+        # Check the inbox files and list every likely destination folder in parallel up front
+        present = self.fs.exists_many(analysis_results)
+        plan.prefetch(self.fs, self.likely_filing_folders(analysis_results))
+        
+        for pdf_file, data in analysis_results.items():
+            if not present[pdf_file]:
+                continue
+            try:
+                # Determine if we should use manual or auto-detected values
+                use_manual = "manual_category" in data
+                
+                known_copy = data.get("known_copy") or planned_hashes.get(data.get("sha256"))
+                if known_copy and not use_manual:
+                    action = FilingAction(pdf_file, "known", data, category=data.get("category"),
+                                          note=" (identical content)")
+                    action.known_copy = known_copy
+                    # Only copies archived before this batch exist yet to link to
+                    action.link = (known_action == "link" and not self.using_blob_store()
+                                   and known_copy == data.get("known_copy"))
+                    action.sorted_destination = self.plan_sorted_destination(plan, pdf_file, data)
+                    plan.actions.append(action)
+                    continue
+                
+                # Get category and date
+                if use_manual:
+                    category = data["manual_category"]
+                    date_str = data["manual_date"]
+                else:
+                    # Also catch rescans of documents planned earlier in this batch
+                    fingerprint = data.get("fingerprint")
+                    if fingerprint is not None and not data.get("near_duplicate"):
+                        for key in enumerate(simhash_bands(fingerprint)):
+                            for other, other_destination in planned_bands.get(key, ()):
+                                if hamming_distance(fingerprint, other) <= near_distance:
+                                    data["near_duplicate"] = other_destination
+                                    data["near_distance"] = hamming_distance(fingerprint, other)
+                                    break
+                            if data.get("near_duplicate"):
+                                break
+                    set_aside = near_action == "needs_processing" and data.get("near_duplicate")
+                    
+                    # Files marked to skip or without sufficient info go to "needs further processing"
+                    if data.get("skip") or set_aside or self.needs_manual_review(data):
+                        action = FilingAction(
+                            pdf_file, "set_aside", data,
+                            plan.claim(self.needs_processing_folder, os.path.basename(pdf_file), "timestamp"),
+                            note=f" (near-duplicate of {data['near_duplicate']})" if set_aside else ""
+                        )
+                        action.near = bool(set_aside)
+                        plan.actions.append(action)
+                        continue
+                    
+                    category = data["category"]
+                    
+                    # Format the date
+                    detected_date = data["date"]
+                    if date_format == "ddmmyy":
+                        date_str = detected_date.strftime("%d%m%y")
+                    elif date_format == "mmddyy":
+                        date_str = detected_date.strftime("%m%d%y")
+                    elif date_format == "yymmdd":
+                        date_str = detected_date.strftime("%y%m%d")
+                    else:
+                        date_str = detected_date.strftime("%d%m%y")  # Default
+                
+                # Get abbreviation for category
+                abbr = self.categories.get(category, {}).get("abbreviation", category.upper()[:4])
+                
+                # Generate a combination key for duplicate checking
+                combination_key = f"{date_str}_{abbr}"
+                is_duplicate = combination_key in processed_combinations
+                processed_combinations.add(combination_key)
+                
+                # Destination folder (a date shard for sharded categories); numbered (1), (2)
+                # suffixes resolve collisions with files on disk and earlier files in this batch
+                filed_date = parse_filename_date(date_str, date_format)
+                folder = self.planned_folder(category, filed_date)
+                destination = plan.claim(folder, f"{date_str}_{abbr}.pdf", force=is_duplicate)
+                
+                note = ""
+                if data.get("category_source") == "classifier" and not use_manual:
+                    note += f" (classifier {data.get('classifier_confidence', 0.0):.0%})"
+                elif data.get("category_source") == "learned" and not use_manual:
+                    note += " (learned from manual decisions)"
+                if is_duplicate:
+                    note += " (duplicate)"
+                if data.get("near_duplicate"):
+                    note += f" (near-duplicate of {data['near_duplicate']}, {data['near_distance']} bits apart)"
+                
+                action = FilingAction(pdf_file, "file", data, destination, category=category,
+                                      filed_date=filed_date, note=note)
+                action.sorted_destination = self.plan_sorted_destination(plan, pdf_file, data)
+                action.duplicate = is_duplicate
+                action.near = bool(data.get("near_duplicate"))
+                plan.actions.append(action)
+                
+                if data.get("sha256"):
+                    planned_hashes[data["sha256"]] = destination
+                if data.get("fingerprint") is not None:
+                    for key in enumerate(simhash_bands(data["fingerprint"])):
+                        planned_bands.setdefault(key, []).append((data["fingerprint"], destination))
+            except Exception as e:
+                print(f"Error planning {pdf_file}: {str(e)}")
+                plan.actions.append(FilingAction(
+                    pdf_file, "set_aside", data,
+                    plan.claim(self.needs_processing_folder, os.path.basename(pdf_file), "timestamp"),
+                    note=f" (error: {str(e)})"
+                ))
+        return plan
+    
+    def show_filing_plan(self, plan, analysis_results):
+        """Dry run: show what the plan would do and let the user carry it out or leave everything alone"""
+        plan_window = tk.Toplevel(self)
+        plan_window.title("Filing Plan (Dry Run)")
+        plan_window.geometry("850x500")
+        plan_window.resizable(True, True)
+        plan_window.transient(self)
+        
+        # Apply theme if in dark mode
+        if self.settings.get("dark_mode", False):
+            if not SV_TTK_AVAILABLE:
+                plan_window.configure(bg="#333333")
+        
+        main_frame = ttk.Frame(plan_window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        kinds = Counter(action.kind for action in plan.actions)
+        ttk.Label(main_frame, text=(
+            f"Nothing has been moved yet. {kinds['file']} files would be filed, "
+            f"{kinds['set_aside']} set aside for review and {kinds['known']} recognised as already archived. "
+            f"{len(plan.folders)} folders are involved."
+        ), wraplength=800).pack(anchor=tk.W, pady=(0, 10))
+        
+        # Text widget with scrollbar for the plan
+        text_frame = ttk.Frame(main_frame)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+        plan_text = tk.Text(text_frame, wrap=tk.NONE, font=("Courier", 10))
+        plan_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        if self.settings.get("dark_mode", False):
+            plan_text.config(
+                bg=self.text_colors["bg"],
+                fg=self.text_colors["fg"],
+                insertbackground=self.text_colors["insertbackground"]
+            )
+        v_scrollbar = ttk.Scrollbar(text_frame, orient="vertical", command=plan_text.yview)
+        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        plan_text.config(yscrollcommand=v_scrollbar.set)
+        
+        plan_content = "\n".join(action.describe() for action in plan.actions)
+        plan_text.insert("1.0", plan_content)
+        plan_text.config(state="disabled")
+        
+        def execute():
+            plan_window.destroy()
+            # Plan again so anything that changed on disk since the preview is taken into account
+            self.execute_filing_plan(self.plan_filing(analysis_results), analysis_results)
+        
+        def cancel():
+            plan_window.destroy()
+            self.status_var.set("Dry run finished: no files were moved")
+            self.release_claimed_files()
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="Copy to Clipboard",
+                   command=lambda: self.copy_log_to_clipboard(plan_content)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=cancel).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Execute Plan", command=execute).pack(side=tk.RIGHT, padx=5)
+        plan_window.protocol("WM_DELETE_WINDOW", cancel)
+    
+    def prepare_filing_folders(self, plan):
+        """Create the plan's folders; files whose folder cannot be created are redirected"""
+        failed = self.ensure_folders(plan.folders)
+        if not failed:
             return
+        for action in plan.actions:
+            if action.kind != "file" or os.path.dirname(action.destination) not in failed:
+                continue
+            # Fall back to a simplified folder name, or set the file aside
+            folder = self.folder_for_document(action.category, action.filed_date)
+            if folder is not None and folder not in failed:
+                action.destination = plan.claim(folder, os.path.basename(action.destination))
+            else:
+                action.kind = "set_aside"
+                action.note = f" (error: could not create a folder for category '{action.category}')"
+                action.destination = plan.claim(self.needs_processing_folder,
+                                                os.path.basename(action.pdf_file), "timestamp")
+    
+    def execute_filing_plan(self, plan, analysis_results, early=False):
+        """Carry out a filing plan on a thread pool, keeping the UI responsive
+        
+        An early plan files one inbox root while the other roots are still being analyzed.
+        """
+        self.prepare_filing_folders(plan)
         
         # Create progress dialog
         progress_window = tk.Toplevel(self)
@@ -2926,191 +6896,366 @@ class PDFOrganizer(tk.Tk):
         
         # Status label
         status_var = tk.StringVar(value="Processing files...")
-        status_label = ttk.Label(progress_frame, textvariable=status_var)
-        status_label.pack(pady=(0, 10))
+        ttk.Label(progress_frame, textvariable=status_var).pack(pady=(0, 10))
         
         # Current file label
         current_file_var = tk.StringVar(value="")
-        current_file_label = ttk.Label(progress_frame, textvariable=current_file_var)
-        current_file_label.pack(pady=(0, 10))
+        ttk.Label(progress_frame, textvariable=current_file_var).pack(pady=(0, 10))
         
         # Progress bar
         progress_var = tk.DoubleVar(value=0.0)
-        progress_bar = ttk.Progressbar(progress_frame, variable=progress_var, maximum=len(analysis_results))
+        progress_bar = ttk.Progressbar(progress_frame, variable=progress_var, maximum=max(1, len(plan.actions)))
         progress_bar.pack(fill=tk.X, pady=(0, 10))
         
+        # Every action is independent once names are planned; the limiter keeps each filesystem sane
+        limiter = DeviceLimiter(self.settings.get("filing_threads_per_device", FILING_THREADS_PER_DEVICE))
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.settings.get("filing_threads", FILING_THREADS)
+        )
+        durability = self.durability_journal()
+        # Interleave the inbox roots so a small inbox's files are not queued behind a large dump
+        by_inbox = {}
+        for action in plan.actions:
+            by_inbox.setdefault(action.data.get("inbox"), []).append(action)
+        order = [action for group in itertools.zip_longest(*by_inbox.values()) for action in group if action]
+        futures = [executor.submit(self.run_filing_action, plan, action, limiter, durability)
+                   for action in order]
+        executor.shutdown(wait=False)
+        
+        def sync():
+            # One sync pass for the whole batch (batch mode); strict mode has already synced every file
+            start = time.perf_counter()
+            durability.commit(self.fs)
+            plan.sync_seconds = time.perf_counter() - start
+            self.call_in_ui(lambda: finish())
+        
+        def finish():
+            progress_window.destroy()
+            self.finish_filing(plan, analysis_results, durability, early)
+            if early:
+                self.early_filing = False
+                # Hand the grab back to the analysis progress dialog
+                if not self.analysis_canceled and self.analysis_window.winfo_exists():
+                    self.analysis_window.grab_set()
+        
+        def poll():
+            done = sum(1 for future in futures if future.done())
+            progress_var.set(done)
+            current_file_var.set(f"Filed {done} of {len(futures)} files")
+            if done < len(futures):
+                self.after(100, poll)
+                return
+            plan.filing_seconds = time.perf_counter() - plan.started
+            status_var.set("Syncing to disk...")
+            threading.Thread(target=sync, daemon=True).start()
+        
+        plan.started = time.perf_counter()
+        poll()
+    
+    def archive_planned_original(self, action, copy_from=None, durability=NO_DURABILITY):
+        """Move an original to the sorted name (or blob) chosen for it by the plan"""
+        if action.sorted_destination.startswith(self.sorted_store.root + os.sep):
+            action.sorted_destination, _ = self.sorted_store.store(
+                action.pdf_file, sha256=action.data.get("sha256"), size=action.data.get("file_size"),
+                copy_from=copy_from, durability=durability
+            )
+        else:
+            move_file(action.pdf_file, action.sorted_destination, copy_from, durability)
+    
+    def run_filing_action(self, plan, action, limiter, durability=NO_DURABILITY):
+        """Worker thread: carry out one planned action, setting the file aside if it fails"""
+        source = action.pdf_file
+        try:
+            with limiter.hold(source, action.destination, action.sorted_destination):
+                if action.kind == "file":
+                    # Copy to category folder, then archive the original; across mounts the
+                    # archive copy is made from the filed copy rather than the source again
+                    copy_file(source, action.destination, durability)
+                    self.archive_planned_original(action, action.destination, durability)
+                elif action.kind == "known":
+                    if not (action.link and self.link_known_copy(source, action.known_copy,
+                                                                 action.sorted_destination, durability)):
+                        action.link = False
+                        self.archive_planned_original(action, durability=durability)
+                else:
+                    move_file(source, action.destination, durability=durability)
+        except Exception as e:
+            print(f"Error processing {source}: {str(e)}")
+            action.error = e
+            # Move to needs_processing on error
+            try:
+                if os.path.exists(source):
+                    action.fallback_destination = plan.claim(self.needs_processing_folder,
+                                                             os.path.basename(source), "timestamp")
+                    move_file(source, action.fallback_destination, durability=durability)
+            except Exception as move_error:
+                print(f"Error moving file to needs processing: {str(move_error)}")
+                action.move_error = move_error
+    
+    def durability_journal(self):
+        """Journal for one batch of file operations in the configured durability mode"""
+        return DurabilityJournal(self.settings.get("durability", DURABILITY_NONE))
+    
+    def finish_filing(self, plan, analysis_results, durability=NO_DURABILITY, early=False):
+        """Record what the executed plan did: indexes, catalog, listing and the processing log"""
         # Results variables for the summary
         processed_count = 0
         categorized_count = 0
         needs_processing_count = 0
         duplicate_count = 0
-        
-        # Track processed date+category combinations to avoid duplicates
-        processed_combinations = {}
+        known_count = 0
+        near_count = 0
+        disk_saved = 0
         
         # Create a detailed log of what happened to each file
         detailed_log = []
         
-        # Process files
-        progress_window.update()
+        # Filed documents are added to the search index and catalog in one transaction each
+        filed_originals = []  # Listed inbox names of the originals that left the inbox
+        indexed_documents = []
+        filed_fingerprints = []
+        catalog_entries = []
         
-        # Process each file
-        for i, (pdf_file, data) in enumerate(analysis_results.items()):
-            # Update progress UI
-            progress_var.set(i + 1)
-            current_file_var.set(f"Processing: {pdf_file}")
-            progress_window.update()
+        for action in plan.actions:
+            data = action.data
+            pdf_file = action.pdf_file
+            size, sha256 = data.get("file_size"), data.get("sha256")
             
-            try:
-                if os.path.exists(pdf_file):
-                    # Determine if we should use manual or auto-detected values
-                    use_manual = "manual_category" in data
-                    
-                    # Get category and date
-                    if use_manual:
-                        category = data["manual_category"]
-                        date_str = data["manual_date"]
-                    else:
-                        # Skip files marked to skip or without sufficient info
-                        if data.get("skip") or not data.get("category") or not data.get("date") or data.get("confidence", 0) < 1:
-                            # Move to "needs further processing" folder
-                            needs_processing_destination = os.path.join(self.needs_processing_folder, os.path.basename(pdf_file))
-                            
-                            # Handle filename collision
-                            if os.path.exists(needs_processing_destination):
-                                filename, ext = os.path.splitext(os.path.basename(pdf_file))
-                                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                                needs_processing_destination = os.path.join(self.needs_processing_folder, f"{filename}_{timestamp}{ext}")
-                            
-                            # Move file
-                            shutil.move(pdf_file, needs_processing_destination)
-                            if pdf_file in self.all_pdfs:
-                                self.all_pdfs.remove(pdf_file)
-                            needs_processing_count += 1
-                            processed_count += 1
-                            
-                            # Add to log
-                            detailed_log.append(f"{pdf_file} → Needs further processing")
-                            continue
-                        
-                        category = data["category"]
-                        
-                        # Format the date
-                        detected_date = data["date"]
-                        date_format = self.settings.get("date_format", "ddmmyy")
-                        
-                        if date_format == "ddmmyy":
-                            date_str = detected_date.strftime("%d%m%y")
-                        elif date_format == "mmddyy":
-                            date_str = detected_date.strftime("%m%d%y")
-                        elif date_format == "yymmdd":
-                            date_str = detected_date.strftime("%y%m%d")
-                        else:
-                            date_str = detected_date.strftime("%d%m%y")  # Default
-                    
-                    # Get abbreviation for category
-                    abbr = self.categories.get(category, {}).get("abbreviation", category.upper()[:4])
-                    
-                    # Generate a combination key for duplicate checking
-                    combination_key = f"{date_str}_{abbr}"
-                    
-                    # Get destination folder
-                    folder = self.categories.get(category, {}).get("folder", category.capitalize())
-                    
-                    # Create new filename (simple format)
-                    new_filename = f"{date_str}_{abbr}.pdf"
-                    
-                    # Create full destination path
-                    destination = os.path.join(folder, new_filename)
-                    
-                    # Check if this file would be a duplicate (already processed in this batch)
-                    is_duplicate = combination_key in processed_combinations
-                    
-                    # Handle filename collision with numbered suffixes (1), (2), etc.
-                    if os.path.exists(destination) or is_duplicate:
-                        # Extract base name (without extension) and extension
-                        basename, ext = os.path.splitext(new_filename)
-                        
-                        # Find next available number
-                        counter = 1
-                        while os.path.exists(os.path.join(folder, f"{basename} ({counter}){ext}")):
-                            counter += 1
-                            
-                        # Update destination with numbered suffix
-                        destination = os.path.join(folder, f"{basename} ({counter}){ext}")
-                        
-                        # Update duplicate count if it was a duplicate in this batch
-                        if is_duplicate:
-                            duplicate_count += 1
-                    
-                    # Copy to category folder
-                    shutil.copy2(pdf_file, destination)
-                    
-                    # Add to processed combinations
-                    processed_combinations[combination_key] = True
-                    
-                    # Move original to sorted folder
-                    sorted_destination = os.path.join(self.sorted_folder, os.path.basename(pdf_file))
-                    
-                    # Handle filename collision in sorted folder
-                    if os.path.exists(sorted_destination):
-                        filename, ext = os.path.splitext(os.path.basename(pdf_file))
-                        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                        sorted_destination = os.path.join(self.sorted_folder, f"{filename}_{timestamp}{ext}")
-                    
-                    # Move file
-                    shutil.move(pdf_file, sorted_destination)
-                    if pdf_file in self.all_pdfs:
-                        self.all_pdfs.remove(pdf_file)
-                    categorized_count += 1
+            if action.error is not None:
+                # A folder may have been removed behind our back; check them all again from now on
+                if isinstance(action.error, FileNotFoundError):
+                    self.existing_folders.clear()
+                if action.fallback_destination:
+                    filed_originals.append(data.get("listed_name", pdf_file))
+                    catalog_entries.append((action.fallback_destination, None, None, size, sha256))
+                    needs_processing_count += 1
                     processed_count += 1
-                    
-                    # Add to log
-                    dest_filename = os.path.basename(destination)
-                    log_entry = f"{pdf_file} → {folder}/{dest_filename}"
-                    if is_duplicate:
-                        log_entry += " (duplicate)"
-                    detailed_log.append(log_entry)
-                    
-            except Exception as e:
-                print(f"Error processing {pdf_file}: {str(e)}")
-                # Move to needs_processing on error
+                    detailed_log.append(f"{pdf_file} → Needs further processing (error: {str(action.error)})")
+                elif action.move_error is not None:
+                    detailed_log.append(f"{pdf_file} → ERROR: {str(action.error)}, then {str(action.move_error)}")
+                else:
+                    detailed_log.append(f"{pdf_file} → ERROR: {str(action.error)}")
+                continue
+            
+            processed_count += 1
+            filed_originals.append(data.get("listed_name", pdf_file))
+            if action.kind == "known":
+                known_count += 1
+                # A hard-linked original shares the archived copy's blocks
+                disk_saved += (2 if action.link else 1) * (size or 0)
+                catalog_entries.append((action.sorted_destination, action.category, None, size, sha256))
+                detailed_log.append(f"{pdf_file} → already filed as {action.known_copy}{action.note}")
+            elif action.kind == "set_aside":
+                needs_processing_count += 1
+                near_count += action.near
+                catalog_entries.append((action.destination, None, None, size, sha256))
+                detailed_log.append(f"{pdf_file} → Needs further processing{action.note}")
+            else:
+                categorized_count += 1
+                duplicate_count += action.duplicate
+                near_count += action.near
+                indexed_documents.append((action.destination, action.category, data.get("text", "")))
+                if data.get("fingerprint") is not None:
+                    filed_fingerprints.append((sha256, data["fingerprint"]))
+                # Catalog both the filed copy and the original
+                for path in (action.destination, action.sorted_destination):
+                    catalog_entries.append((path, action.category, action.filed_date, size, sha256))
+                folder, dest_filename = os.path.split(action.destination)
+                detailed_log.append(f"{pdf_file} → {folder}/{dest_filename}{action.note}")
+        
+        # Make the newly filed documents searchable, and findable as near-duplicates
+        try:
+            self.search_index.add_documents(indexed_documents)
+        except Exception as e:
+            print(f"Error updating search index: {str(e)}")
+        try:
+            self.fingerprints.add_many(filed_fingerprints)
+        except Exception as e:
+            print(f"Error updating fingerprints: {str(e)}")
+        
+        # Record where everything went so the folder views stay current without a rescan
+        try:
+            self.catalog.add_entries(catalog_entries)
+        except Exception as e:
+            print(f"Error updating catalog: {str(e)}")
+        
+        # Files claimed from a shared inbox but not filed (analysis errors) go back for another try;
+        # after an early plan the rest of the run still needs its claims, unless it was canceled
+        if not early:
+            for claims in self.inbox_claims.values():
                 try:
-                    needs_processing_destination = os.path.join(self.needs_processing_folder, os.path.basename(pdf_file))
-                    
-                    # Handle filename collision
-                    if os.path.exists(needs_processing_destination):
-                        filename, ext = os.path.splitext(os.path.basename(pdf_file))
-                        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                        needs_processing_destination = os.path.join(self.needs_processing_folder, f"{filename}_{timestamp}{ext}")
-                    
-                    # Move file
-                    if os.path.exists(pdf_file):
-                        shutil.move(pdf_file, needs_processing_destination)
-                        if pdf_file in self.all_pdfs:
-                            self.all_pdfs.remove(pdf_file)
-                        needs_processing_count += 1
-                        processed_count += 1
-                        
-                        # Add to log
-                        detailed_log.append(f"{pdf_file} → Needs further processing (error: {str(e)})")
-                        
-                except Exception as move_error:
-                    print(f"Error moving file to needs processing: {str(move_error)}")
-                    detailed_log.append(f"{pdf_file} → ERROR: {str(e)}, then {str(move_error)}")
+                    claims.release_all()
+                except OSError as e:
+                    print(f"Error releasing claimed files: {str(e)}")
+        elif self.analysis_canceled:
+            self.release_claimed_files(self.worker_threads)
+        
+        # Update the open listing with what moved
+        self.apply_filing_to_listing(filed_originals, catalog_entries)
+        
+        # Summarize how much was read from disk during analysis
+        summary_lines = []
+        total_size = sum(data.get("file_size", 0) for data in analysis_results.values())
+        total_read = sum(data.get("bytes_read", 0) for data in analysis_results.values())
+        if total_size:
+            summary_lines.append(
+                f"Bytes read during analysis: {total_read / (1024 * 1024):.1f} MB "
+                f"for {total_size / (1024 * 1024):.1f} MB of PDFs ({total_read / total_size:.2f}x)"
+            )
+        
+        # Report what the content-hash index saved
+        if known_count:
+            skipped = [data for data in analysis_results.values() if data.get("known_copy")]
+            parse_times = [data["parse_seconds"] for data in analysis_results.values() if "parse_seconds" in data]
+            if parse_times:
+                self.settings["average_parse_seconds"] = sum(parse_times) / len(parse_times)
+                self.save_settings()
+            parse_saved = len(skipped) * self.settings.get("average_parse_seconds", 0.0)
+            summary_lines.append(
+                f"Already in the archive: {known_count} files (identical content), "
+                f"saved ~{parse_saved:.1f} s of parsing and {disk_saved / (1024 * 1024):.1f} MB of disk"
+            )
         
-        # Close progress window
-        progress_window.destroy()
+        if self.using_blob_store():
+            summary_lines.append(self.sorted_store_summary())
         
-        # Reload PDFs list
-        self.load_all_pdfs()
+        # How long filing took, and how much of it was spent making it crash-safe
+        if durability.mode == DURABILITY_BATCH:
+            synced_files, synced_folders = durability.synced
+            summary_lines.append(
+                f"Filing took {plan.filing_seconds:.1f} s; syncing {synced_files} files and "
+                f"{synced_folders} folders to disk (durability: batch) took {plan.sync_seconds:.1f} s"
+            )
+        else:
+            summary_lines.append(f"Filing took {plan.filing_seconds + plan.sync_seconds:.1f} s "
+                                 f"(durability: {durability.mode})")
+        
+        if self.inbox_claims:
+            worker_id = next(iter(self.inbox_claims.values())).worker_id
+            summary_lines.append(f"Shared inbox: {self.claimed_elsewhere} files were taken by other instances "
+                                 f"(this is {worker_id})")
+        
+        # Per-root counts when several inboxes are configured
+        if len(self.inbox_roots) > 1:
+            per_inbox = Counter(action.data.get("inbox") for action in plan.actions if action.error is None)
+            summary_lines.append("By inbox: " + ", ".join(
+                f"{name}: {count}" for name, count in sorted(per_inbox.items(), key=lambda item: str(item[0]))
+            ))
+        
+        if near_count:
+            summary_lines.append(f"Near-duplicates of filed documents: {near_count} files "
+                                 f"(policy: {self.settings.get('near_duplicate_action', 'flag')})")
+        
+        # Say so if categories were edited while this batch was being analyzed
+        versions = {data["category_version"] for data in analysis_results.values() if "category_version" in data}
+        if len(versions) > 1:
+            summary_lines.append(
+                f"Categories changed during analysis: files were matched against "
+                f"versions {min(versions)} to {max(versions)}"
+            )
+        
+        # Report the manual-review fraction for this run (recorded once the whole run is analyzed)
+        if not early:
+            summary_lines.extend(self.manual_review_summary())
         
         # Create a results log window
         self.show_processing_log(processed_count, categorized_count, duplicate_count, 
-                                needs_processing_count, detailed_log)
+                                needs_processing_count, detailed_log, summary_lines)
+    
+    def using_blob_store(self):
+        """True when originals go into the content-addressed store instead of loose files"""
+        return self.sorted_store.available and self.settings.get("sorted_store", "folder") == "blobs"
+    
+    def sorted_destination_for(self, pdf_file):
+        """Loose-file path for an original in the sorted folder, timestamped if the name is taken"""
+        sorted_destination = os.path.join(self.sorted_folder, os.path.basename(pdf_file))
+        if os.path.exists(sorted_destination):
+            filename, ext = os.path.splitext(os.path.basename(pdf_file))
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            sorted_destination = os.path.join(self.sorted_folder, f"{filename}_{timestamp}{ext}")
+        return sorted_destination
+    
+    def archive_original(self, pdf_file, sha256=None, size=None, copy_from=None, durability=NO_DURABILITY):
+        """Move a processed original into sorted (or its blob store); returns where it went"""
+        if self.using_blob_store():
+            blob, _ = self.sorted_store.store(pdf_file, sha256=sha256, size=size,
+                                              copy_from=copy_from, durability=durability)
+            return blob
+        sorted_destination = self.sorted_destination_for(pdf_file)
+        move_file(pdf_file, sorted_destination, copy_from, durability)
+        return sorted_destination
+    
+    def sorted_store_summary(self):
+        """Summary line on how much the deduplicated sorted archive saves"""
+        originals, blobs, logical, stored = self.sorted_store.stats()
+        return (f"Sorted archive: {originals} originals in {blobs} blobs, "
+                f"{stored / (1024 * 1024):.1f} MB stored for {logical / (1024 * 1024):.1f} MB of originals")
+    
+    def deduplicate_sorted_folder(self):
+        """Switch sorted to the content-addressed store and move the existing originals into it"""
+        if not self.wait_for_startup():
+            return
+        if not self.sorted_store.available:
+            messagebox.showerror("Error", "The deduplicated archive needs the organizer database")
+            return
+        if not messagebox.askyesno("Deduplicate Sorted Folder",
+                                   "Originals will be stored once per distinct content under sorted/.blobs, "
+                                   "with their names kept in the database. Move the existing files now?"):
+            return
+        self.settings["sorted_store"] = "blobs"
+        self.save_settings()
+        
+        def report(count, total):
+            self.call_in_ui(lambda: self.status_var.set(f"Deduplicating sorted folder: {count} of {total} files"))
+        
+        def done(moved):
+            if self.current_folder == self.sorted_folder:
+                self.refresh_pdfs(rescan=False)
+            self.status_var.set(f"Moved {moved} originals. {self.sorted_store_summary()}")
+        
+        def migrate():
+            try:
+                moved = self.sorted_store.import_folder(self.sorted_folder, progress=report)
+                self.catalog.rename_many(moved)
+            except Exception as e:
+                print(f"Error deduplicating sorted folder: {str(e)}")
+                moved = []
+            self.call_in_ui(lambda: done(len(moved)))
+        
+        threading.Thread(target=migrate, daemon=True).start()
+        self.status_var.set("Deduplicating sorted folder...")
+    
+    def load_blob_listing(self):
+        """Names for the sorted view from the manifest; repeated names get a content suffix"""
+        entries = self.sorted_store.entries()
+        counts = Counter(name for _, name, _ in entries)
+        self.blob_listing = {}
+        for entry_id, name, sha256 in entries:
+            if counts[name] > 1:
+                stem, ext = os.path.splitext(name)
+                name = f"{stem} [{sha256[:8]}]{ext}"
+            self.blob_listing[name] = (entry_id, self.sorted_store.blob_path(sha256))
+        return list(self.blob_listing)
+    
+    def listed_path(self, name):
+        """Path of an item in the file list of the current folder"""
+        if self.current_folder == self.sorted_folder and name in self.blob_listing:
+            return self.blob_listing[name][1]
+        return os.path.join(self.current_folder, name) if self.current_folder else name
+    
+    def link_known_copy(self, pdf_file, known_copy, destination, durability=NO_DURABILITY):
+        """Replace a re-scanned file with a hard link to its archived copy; False if linking is not possible"""
+        try:
+            os.link(known_copy, destination)
+        except (OSError, AttributeError) as e:
+            print(f"Could not link {pdf_file} to {known_copy}: {str(e)}")
+            return False
+        durability.renamed(pdf_file, destination)
+        durability.remove(pdf_file)
+        return True
     
     def show_processing_log(self, processed_count, categorized_count, duplicate_count, 
-                           needs_processing_count, detailed_log):
+                           needs_processing_count, detailed_log, summary_lines=None):
         """Display a dialog with processing results and copyable log"""
         log_window = tk.Toplevel(self)
         log_window.title("Processing Results")
@@ -3138,6 +7283,10 @@ class PDFOrganizer(tk.Tk):
             f"Needs further processing: {needs_processing_count}"
         )
         
+        # Append any extra statistics gathered during the run
+        if summary_lines:
+            summary_text += "\n" + "\n".join(summary_lines)
+        
         summary_label = ttk.Label(summary_frame, text=summary_text)
         summary_label.pack(anchor=tk.W)
         
@@ -3225,36 +7374,17 @@ class PDFOrganizer(tk.Tk):
     
     def detect_category_with_confidence(self, text):
         """Detect category from text and return the confidence level"""
-        # Convert text to lowercase for case-insensitive matching
-        text_lower = text.lower()
-        
-        # Normalize spaces in text (replace multiple spaces with single space)
-        normalized_text = re.sub(r'\s+', ' ', text_lower)
-        
-        best_match = None
-        max_matches = 0
-        
-        # Check each category's keywords
-        for category, data in self.categories.items():
-            keywords = data.get("keywords", [])
-            if not keywords:
-                continue
-                
-            matches = 0
-            for keyword in keywords:
-                # Normalize spaces in keyword too
-                normalized_keyword = re.sub(r'\s+', ' ', keyword.lower())
-                
-                # Try both original and normalized matching
-                if normalized_keyword in normalized_text or keyword.lower() in text_lower:
-                    matches += 1
-            
-            # Update if this category has more matching keywords
-            if matches > max_matches:
-                max_matches = matches
-                best_match = category
+        category, confidence, _ = self.detect_category_with_source(text)
+        return category, confidence
+    
+    def detect_category_with_source(self, text, snapshot=None):
+        """Detect category and return (category, confidence, source)
         
-        return best_match, max_matches
+        Keyword matches come first; when no keyword matches, what was learned from
+        earlier manual decisions is used and counted as a confident match. Workers
+        pass the snapshot they took for the current file; otherwise the latest is used.
+        """
+        return detect_category_with_source(text, snapshot or self.category_snapshot, self.learned_model)
 
     def open_folder(self, folder_path):
         """Open a folder in the system file explorer, optimized for renaming files"""
@@ -3358,6 +7488,11 @@ class PDFOrganizer(tk.Tk):
         # Skip if the selected item is the navigation item
         if filename == ".." or (filename.startswith("[") and filename.endswith("]")):
             return
+        
+        # Originals in the deduplicated store are renamed in the manifest only
+        if listbox == self.file_listbox and self.current_folder == self.sorted_folder and filename in self.blob_listing:
+            self.rename_archived_original(filename)
+            return
             
         # Get full file path
         file_path = os.path.join(folder_path, filename)
@@ -3383,12 +7518,18 @@ class PDFOrganizer(tk.Tk):
             
             # Rename the file
             os.rename(file_path, new_path)
+            self.search_index.rename(file_path, new_path)
+            self.catalog.rename(file_path, new_path)
             
             # Update the listbox
             listbox.delete(selected_index)
             listbox.insert(selected_index, new_name)
             listbox.selection_set(selected_index)
             
+            # Keep the main listing's filter index in step
+            if listbox == self.file_listbox and self.current_folder:
+                self._rename_in_listing(filename, new_name)
+            
             # Update status
             listbox.status_var.set(f"Renamed '{filename}' to '{new_name}'")
         except Exception as e:
@@ -3407,6 +7548,11 @@ class PDFOrganizer(tk.Tk):
         if filename == ".." or (filename.startswith("[") and filename.endswith("]")):
             return
         
+        # Originals in the deduplicated store share blobs; the blob goes with its last name
+        if listbox == self.file_listbox and self.current_folder == self.sorted_folder and filename in self.blob_listing:
+            self.delete_archived_original(filename)
+            return
+        
         # Get full file path
         file_path = os.path.join(folder_path, filename)
         
@@ -3417,6 +7563,8 @@ class PDFOrganizer(tk.Tk):
         try:
             # Delete the file
             os.remove(file_path)
+            self.search_index.remove(file_path)
+            self.catalog.remove(file_path)
             
             # Update the listbox
             listbox.delete(selected_index)
@@ -3432,11 +7580,42 @@ class PDFOrganizer(tk.Tk):
             
             # If this is in the main UI and the current_folder is set
             if hasattr(self, 'current_folder') and self.current_folder and listbox == self.file_listbox:
-                # Remove from all_pdfs list if it's there
-                if filename in self.all_pdfs:
-                    self.all_pdfs.remove(filename)
+                # Remove from the listing and its filter index
+                self._remove_from_listing(filename)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not delete file: {str(e)}")
+
+    def rename_archived_original(self, listed_name):
+        """Rename an original in the deduplicated store"""
+        entry_id, _ = self.blob_listing[listed_name]
+        new_name = simpledialog.askstring("Rename File", "Enter new filename:", initialvalue=listed_name)
+        if not new_name or new_name == listed_name:
+            return
+        try:
+            self.sorted_store.rename(entry_id, new_name)
+        except sqlite3.IntegrityError:
+            messagebox.showinfo("Info", f"'{new_name}' is already recorded for this content")
+            return
+        self.refresh_pdfs(rescan=False)
+        self.status_var.set(f"Renamed '{listed_name}' to '{new_name}'")
+    
+    def delete_archived_original(self, listed_name):
+        """Delete an original from the deduplicated store"""
+        if not messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{listed_name}'?"):
+            return
+        entry_id, _ = self.blob_listing[listed_name]
+        try:
+            blob = self.sorted_store.remove(entry_id)
+            if blob:
+                self.catalog.remove(blob)
         except Exception as e:
             messagebox.showerror("Error", f"Could not delete file: {str(e)}")
+            return
+        # Only forget the entry once it is really gone, so a failed delete can be retried
+        del self.blob_listing[listed_name]
+        self._remove_from_listing(listed_name)
+        self.load_pdfs_page()
+        self.status_var.set(f"Deleted '{listed_name}'")
 
     def on_double_click(self, event):
         """Handle double-click on file listbox - rename files or navigate folders"""
@@ -3456,13 +7635,10 @@ class PDFOrganizer(tk.Tk):
         # Check if this is a folder in the root directory
         if not self.current_folder and item_text.startswith("[") and item_text.endswith("]"):
             folder_name = item_text[1:-1]  # Remove brackets
-            # Navigate to the selected folder
-            if os.path.exists(folder_name):
-                self.current_folder = folder_name
-                self.current_page = 1  # Reset to first page
-                self.load_all_pdfs()
-            else:
-                messagebox.showerror("Error", f"Folder not found: {folder_name}")
+            # Navigate to the selected folder (folders are created on first filing, so it may be empty)
+            self.current_folder = folder_name
+            self.current_page = 1  # Reset to first page
+            self.load_all_pdfs()
             return
             
         # If this is a file, allow renaming
@@ -3576,6 +7752,60 @@ class PDFOrganizer(tk.Tk):
         
         return "break"
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Organize scanned PDFs into category folders")
+    parser.add_argument("--train-classifier", action="store_true",
+                        help="Train the category classifier from already-filed PDFs and exit")
+    parser.add_argument("--max-per-category", type=int, default=None,
+                        help="Limit the number of documents read per category when training")
+    parser.add_argument("--migrate-layouts", action="store_true",
+                        help="Move filed documents into each category's folder layout and exit")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run the local HTTP classification service instead of the window")
+    parser.add_argument("--host", default=SERVICE_HOST, help="Address the service listens on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="Port the service listens on")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parser processes for the service (default: one per CPU core but one)")
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.host, args.port, args.workers)
+        return
+    
+    if args.migrate_layouts:
+        date_format = "ddmmyy"
+        if os.path.exists("pdf_organizer_settings.json"):
+            with open("pdf_organizer_settings.json", "r") as f:
+                date_format = json.load(f).get("date_format", date_format)
+        catalog, search_index = DocumentCatalog(), SearchIndex()
+        for category, data in CategoryStore(read_only=True).snapshot().items():
+            folder = data.get("folder", category.capitalize())
+            if not os.path.isdir(folder):
+                continue
+            moved, skipped = migrate_folder_layout(
+                folder, category_layout(data), catalog, search_index, date_format,
+                progress=lambda moved, folder=folder: print(f"{folder}: moved {moved} files")
+            )
+            print(f"{folder} ({category_layout(data)}): moved {moved}, left {skipped} undated files in place")
+        return
+    
+    if args.train_classifier:
+        if not NUMPY_AVAILABLE:
+            parser.error("training the classifier requires numpy")
+        categories = CategoryStore().snapshot()
+        _, used = train_classifier_from_folders(
+            categories, max_per_category=args.max_per_category,
+            progress=lambda count, path: print(f"[{count}] {path}") if count % 100 == 0 else None
+        )
+        print(f"Classifier trained on {used} documents and saved to {CLASSIFIER_MODEL_FILE}")
+        return
+    
     app = PDFOrganizer()
-    app.mainloop() 
+    app.mainloop()
+    
+    # Leave the shared inbox cleanly so other instances need not wait for our lease to expire
+    for claims in app.inbox_claims.values():
+        claims.stop()
+
+if __name__ == "__main__":
+    main()